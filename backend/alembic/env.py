@@ -16,7 +16,8 @@ config = context.config  # F811 # noqa: F811
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# When run from the application (app.db.migrations) logging is already set up
+if config.config_file_name is not None and "connection" not in config.attributes:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -86,6 +87,11 @@ def run_migrations_online() -> None:
 
     """
 
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+
     asyncio.run(run_async_migrations())
 
 
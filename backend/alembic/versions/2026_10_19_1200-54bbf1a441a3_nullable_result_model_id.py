@@ -0,0 +1,33 @@
+"""Nullable simulation_results.model_id for batch jobs
+
+Revision ID: 54bbf1a441a3
+Revises: ebf9fb831509
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "54bbf1a441a3"
+down_revision: Union[str, Sequence[str], None] = "ebf9fb831509"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "simulation_results", "model_id", existing_type=sa.UUID(), nullable=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM simulation_results WHERE model_id IS NULL")
+    op.alter_column(
+        "simulation_results", "model_id", existing_type=sa.UUID(), nullable=False
+    )
@@ -0,0 +1,40 @@
+"""Add unlogged user_sessions table
+
+Revision ID: c03b4fa743f2
+Revises: 54bbf1a441a3
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c03b4fa743f2"
+down_revision: Union[str, Sequence[str], None] = "54bbf1a441a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_sessions",
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("token"),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index(
+        "ix_user_sessions_expires_at", "user_sessions", ["expires_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_user_sessions_expires_at", table_name="user_sessions")
+    op.drop_table("user_sessions")
@@ -0,0 +1,60 @@
+"""Add crypto_id/model_type to simulation_jobs and keyset index
+
+Revision ID: 8b0931b1aa06
+Revises: c03b4fa743f2
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "8b0931b1aa06"
+down_revision: Union[str, Sequence[str], None] = "c03b4fa743f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "simulation_jobs", sa.Column("crypto_id", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "simulation_jobs", sa.Column("model_type", sa.String(), nullable=True)
+    )
+    op.create_foreign_key(
+        "simulation_jobs_crypto_id_fkey",
+        "simulation_jobs",
+        "cryptocurrencies",
+        ["crypto_id"],
+        ["id"],
+    )
+    op.create_index(
+        "ix_simulation_jobs_user_created",
+        "simulation_jobs",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+    # Для старых задач тип модели известен только из результата
+    op.execute(
+        """
+        UPDATE simulation_jobs AS j
+        SET model_type = r.results ->> 'type'
+        FROM simulation_results AS r
+        WHERE r.job_id = j.id AND j.model_type IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_simulation_jobs_user_created", table_name="simulation_jobs")
+    op.drop_constraint(
+        "simulation_jobs_crypto_id_fkey", "simulation_jobs", type_="foreignkey"
+    )
+    op.drop_column("simulation_jobs", "model_type")
+    op.drop_column("simulation_jobs", "crypto_id")
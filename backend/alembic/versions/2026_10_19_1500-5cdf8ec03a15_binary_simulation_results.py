@@ -0,0 +1,200 @@
+"""Store simulation result arrays as binary
+
+Revision ID: 5cdf8ec03a15
+Revises: 8b0931b1aa06
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+import json
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import orjson
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5cdf8ec03a15"
+down_revision: Union[str, Sequence[str], None] = "8b0931b1aa06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Формат v1 из app.core.result_codec на момент миграции. Скопирован, чтобы
+# последующие изменения кодека не меняли то, что пишет и читает миграция.
+ARRAYS_KEY = "__arrays__"
+HORIZON_KEY = "__horizon_dates__"
+MIN_ARRAY_SIZE = 8
+
+
+def _float_leaves(value) -> Optional[bool]:
+    has_float = False
+    for item in value:
+        if isinstance(item, list):
+            nested = _float_leaves(item)
+            if nested is None:
+                return None
+            has_float |= nested
+        elif isinstance(item, float):
+            has_float = True
+        elif item is not None and (isinstance(item, bool) or not isinstance(item, int)):
+            return None
+    return has_float
+
+
+def _as_float_array(value) -> Optional[np.ndarray]:
+    if not isinstance(value, list) or not _float_leaves(value):
+        return None
+    try:
+        array = np.asarray(value, dtype=float)
+    except ValueError:
+        return None
+    return array if array.size >= MIN_ARRAY_SIZE else None
+
+
+def _is_horizon_dates(value) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and value == [f"+{i}d" for i in range(1, len(value) + 1)]
+    )
+
+
+def encode_v1(payload: dict):
+    """JSON-заголовок и блок float64 (result_codec.encode, формат v1)."""
+    chunks, arrays = [], []
+    offset = 0
+
+    def split(node: dict, path: list) -> dict:
+        nonlocal offset
+        header = {}
+        for key, value in node.items():
+            if isinstance(value, dict):
+                header[key] = split(value, path + [key])
+            elif (array := _as_float_array(value)) is not None:
+                array = np.ascontiguousarray(array, dtype=np.float64)
+                chunks.append(array.tobytes())
+                arrays.append(
+                    {
+                        "path": path + [key],
+                        "dtype": "float64",
+                        "shape": list(array.shape),
+                        "offset": offset,
+                    }
+                )
+                offset += array.nbytes
+            elif _is_horizon_dates(value):
+                header[key] = {HORIZON_KEY: len(value)}
+            else:
+                header[key] = value
+        return header
+
+    header = split(payload, [])
+    header[ARRAYS_KEY] = {"version": 1, "arrays": arrays}
+    return header, b"".join(chunks) if chunks else None
+
+
+def decode_v1(header: dict, blob: Optional[bytes]) -> dict:
+    """Обратное преобразование формата v1 (result_codec.decode)."""
+    if ARRAYS_KEY not in header:
+        return header
+
+    def restore(node: dict) -> dict:
+        result = {}
+        for key, value in node.items():
+            if key == ARRAYS_KEY:
+                continue
+            if isinstance(value, dict):
+                if set(value) == {HORIZON_KEY}:
+                    result[key] = [f"+{i}d" for i in range(1, value[HORIZON_KEY] + 1)]
+                else:
+                    result[key] = restore(value)
+            else:
+                result[key] = value
+        return result
+
+    dtypes = {"float32": np.float32, "float64": np.float64}
+    payload = restore(header)
+    for meta in header[ARRAYS_KEY]["arrays"]:
+        count = int(np.prod(meta["shape"]))
+        array = np.frombuffer(
+            blob, dtype=dtypes[meta["dtype"]], count=count, offset=meta["offset"]
+        ).reshape(meta["shape"])
+
+        node = payload
+        for key in meta["path"][:-1]:
+            node = node.setdefault(key, {})
+        node[meta["path"][-1]] = array.astype(np.float64, copy=False)
+    return payload
+
+
+def _dumps(value) -> str:
+    # NaN из массивов записывается как null, как и в исходном JSONB
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+results_table = sa.table(
+    "simulation_results",
+    sa.column("job_id", sa.UUID()),
+    sa.column("results", sa.Text()),
+    sa.column("arrays", sa.LargeBinary()),
+)
+
+
+def _convert(select_where, transform):
+    """Переписывает строки пачками по BATCH_SIZE, ключ - job_id."""
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        stmt = (
+            sa.select(
+                results_table.c.job_id,
+                sa.cast(results_table.c.results, sa.Text),
+                results_table.c.arrays,
+            )
+            .where(select_where)
+            .order_by(results_table.c.job_id)
+            .limit(BATCH_SIZE)
+        )
+        if last_id is not None:
+            stmt = stmt.where(results_table.c.job_id > last_id)
+        rows = bind.execute(stmt).all()
+        if not rows:
+            break
+
+        for job_id, results, arrays in rows:
+            header, blob = transform(json.loads(results), arrays)
+            bind.execute(
+                sa.text(
+                    "UPDATE simulation_results "
+                    "SET results = CAST(:results AS JSONB), arrays = :arrays "
+                    "WHERE job_id = :job_id"
+                ),
+                {"results": _dumps(header), "arrays": blob, "job_id": job_id},
+            )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "simulation_results", sa.Column("arrays", sa.LargeBinary(), nullable=True)
+    )
+    _convert(
+        sa.true(),
+        lambda results, arrays: encode_v1(results)
+        if ARRAYS_KEY not in results
+        else (results, arrays),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _convert(
+        results_table.c.arrays.isnot(None)
+        | sa.cast(results_table.c.results, sa.Text).contains(ARRAYS_KEY),
+        lambda results, arrays: (decode_v1(results, arrays), None),
+    )
+    op.drop_column("simulation_results", "arrays")
@@ -0,0 +1,221 @@
+"""Partition simulation_jobs and simulation_results by month
+
+Revision ID: a41f7c2d9e58
+Revises: 5cdf8ec03a15
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f7c2d9e58"
+down_revision: Union[str, Sequence[str], None] = "5cdf8ec03a15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_COLUMNS = (
+    "id, user_id, portfolio_id, crypto_id, model_type, status, created_at, completed_at"
+)
+
+# Схема секций из app.db.partitions на момент миграции, скопирована, чтобы
+# миграция не менялась вместе с кодом приложения. Секции на следующие
+# месяцы дальше создаёт приложение при старте.
+PARTITIONED_TABLES = {
+    "simulation_jobs": "created_at",
+    "simulation_results": "job_created_at",
+}
+PARTITIONS_AHEAD = 3
+
+
+def _month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_range(first: date, last: date) -> List[date]:
+    months, month = [], _month_start(first)
+    while month <= last:
+        months.append(month)
+        month = _add_months(month, 1)
+    return months
+
+
+def _create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {table}_p{month:%Y_%m} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ('{month.isoformat()} 00:00+00') "
+        f"TO ('{_add_months(month, 1).isoformat()} 00:00+00')"
+    )
+
+
+def _rename_old_tables():
+    op.rename_table("simulation_results", "simulation_results_old")
+    op.rename_table("simulation_jobs", "simulation_jobs_old")
+    op.drop_index("ix_simulation_jobs_user_created", table_name="simulation_jobs_old")
+    # Имена ограничений должны освободиться для новых таблиц
+    op.execute(
+        "ALTER TABLE simulation_results_old "
+        "DROP CONSTRAINT IF EXISTS simulation_results_job_id_fkey"
+    )
+    op.execute(
+        "ALTER TABLE simulation_results_old "
+        "RENAME CONSTRAINT simulation_results_pkey TO simulation_results_old_pkey"
+    )
+    op.execute(
+        "ALTER TABLE simulation_jobs_old "
+        "RENAME CONSTRAINT simulation_jobs_pkey TO simulation_jobs_old_pkey"
+    )
+    for constraint in (
+        "simulation_jobs_user_id_fkey",
+        "simulation_jobs_portfolio_id_fkey",
+        "simulation_jobs_crypto_id_fkey",
+    ):
+        op.execute(
+            f"ALTER TABLE simulation_jobs_old DROP CONSTRAINT IF EXISTS {constraint}"
+        )
+    op.execute(
+        "ALTER TABLE simulation_results_old "
+        "DROP CONSTRAINT IF EXISTS simulation_results_model_id_fkey"
+    )
+
+
+def _create_tables(partitioned: bool):
+    job_pk = ["id", "created_at"] if partitioned else ["id"]
+    result_pk = ["job_id", "job_created_at"] if partitioned else ["job_id"]
+    op.create_table(
+        "simulation_jobs",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("user_id", sa.UUID(), nullable=False),
+        sa.Column("portfolio_id", sa.UUID(), nullable=True),
+        sa.Column("crypto_id", sa.Integer(), nullable=True),
+        sa.Column("model_type", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="simulation_jobs_user_id_fkey"
+        ),
+        sa.ForeignKeyConstraint(
+            ["portfolio_id"],
+            ["portfolios.id"],
+            name="simulation_jobs_portfolio_id_fkey",
+        ),
+        sa.ForeignKeyConstraint(
+            ["crypto_id"],
+            ["cryptocurrencies.id"],
+            name="simulation_jobs_crypto_id_fkey",
+        ),
+        sa.PrimaryKeyConstraint(*job_pk, name="simulation_jobs_pkey"),
+        **({"postgresql_partition_by": "RANGE (created_at)"} if partitioned else {}),
+    )
+    op.create_index(
+        "ix_simulation_jobs_user_created",
+        "simulation_jobs",
+        ["user_id", "created_at", "id"],
+        unique=False,
+    )
+
+    result_columns = [sa.Column("job_id", sa.UUID(), nullable=False)]
+    if partitioned:
+        result_columns.append(
+            sa.Column("job_created_at", sa.DateTime(timezone=True), nullable=False)
+        )
+    result_columns += [
+        sa.Column("results", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("arrays", sa.LargeBinary(), nullable=True),
+        sa.Column("model_id", sa.UUID(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["model_id"], ["trained_models.id"], name="simulation_results_model_id_fkey"
+        ),
+        sa.PrimaryKeyConstraint(*result_pk, name="simulation_results_pkey"),
+    ]
+    if partitioned:
+        result_columns.append(
+            sa.ForeignKeyConstraint(
+                ["job_id", "job_created_at"],
+                ["simulation_jobs.id", "simulation_jobs.created_at"],
+                name="simulation_results_job_id_fkey",
+                ondelete="CASCADE",
+            )
+        )
+    else:
+        result_columns.append(
+            sa.ForeignKeyConstraint(
+                ["job_id"],
+                ["simulation_jobs.id"],
+                name="simulation_results_job_id_fkey",
+            )
+        )
+    op.create_table(
+        "simulation_results",
+        *result_columns,
+        **(
+            {"postgresql_partition_by": "RANGE (job_created_at)"} if partitioned else {}
+        ),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_old_tables()
+    _create_tables(partitioned=True)
+
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM simulation_jobs_old"))
+    first = (oldest.scalar() or now).astimezone(timezone.utc)
+    last = _add_months(_month_start(now), PARTITIONS_AHEAD)
+    for month in _month_range(_month_start(first), last):
+        for table in PARTITIONED_TABLES:
+            op.execute(_create_partition_sql(table, month))
+
+    op.execute(
+        f"INSERT INTO simulation_jobs ({JOB_COLUMNS}) "
+        f"SELECT {JOB_COLUMNS} FROM simulation_jobs_old"
+    )
+    op.execute(
+        """
+        INSERT INTO simulation_results
+            (job_id, job_created_at, results, arrays, model_id)
+        SELECT r.job_id, j.created_at, r.results, r.arrays, r.model_id
+        FROM simulation_results_old AS r
+        JOIN simulation_jobs_old AS j ON j.id = r.job_id
+        """
+    )
+    op.drop_table("simulation_results_old")
+    op.drop_table("simulation_jobs_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_old_tables()
+    _create_tables(partitioned=False)
+    op.execute(
+        f"INSERT INTO simulation_jobs ({JOB_COLUMNS}) "
+        f"SELECT {JOB_COLUMNS} FROM simulation_jobs_old"
+    )
+    op.execute(
+        """
+        INSERT INTO simulation_results (job_id, results, arrays, model_id)
+        SELECT job_id, results, arrays, model_id FROM simulation_results_old
+        """
+    )
+    # Секции удаляются вместе с родительскими таблицами
+    op.drop_table("simulation_results_old")
+    op.drop_table("simulation_jobs_old")
@@ -0,0 +1,63 @@
+"""Unique (crypto_id, model_type) on trained_models
+
+Revision ID: d7e2b5c8f013
+Revises: a41f7c2d9e58
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d7e2b5c8f013"
+down_revision: Union[str, Sequence[str], None] = "a41f7c2d9e58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Для каждой пары остаётся самая свежая модель
+RANKED = """
+    WITH ranked AS (
+        SELECT
+            id,
+            first_value(id) OVER (
+                PARTITION BY crypto_id, model_type
+                ORDER BY trained_at DESC, version DESC
+            ) AS keep_id
+        FROM trained_models
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        RANKED
+        + """
+        UPDATE simulation_results AS r
+        SET model_id = ranked.keep_id
+        FROM ranked
+        WHERE r.model_id = ranked.id AND ranked.id <> ranked.keep_id
+        """
+    )
+    op.execute(
+        RANKED
+        + """
+        DELETE FROM trained_models AS t
+        USING ranked
+        WHERE t.id = ranked.id AND ranked.id <> ranked.keep_id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_trained_models_crypto_model_type",
+        "trained_models",
+        ["crypto_id", "model_type"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "uq_trained_models_crypto_model_type", "trained_models", type_="unique"
+    )
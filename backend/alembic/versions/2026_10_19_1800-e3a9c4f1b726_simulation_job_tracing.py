@@ -0,0 +1,37 @@
+"""Trace id and stage timings on simulation_jobs
+
+Revision ID: e3a9c4f1b726
+Revises: d7e2b5c8f013
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a9c4f1b726"
+down_revision: Union[str, Sequence[str], None] = "d7e2b5c8f013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонки секционированной таблицы добавляются во все секции сразу
+    op.add_column(
+        "simulation_jobs", sa.Column("trace_id", sa.String(length=32), nullable=True)
+    )
+    op.add_column(
+        "simulation_jobs",
+        sa.Column("timings", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("simulation_jobs", "timings")
+    op.drop_column("simulation_jobs", "trace_id")
@@ -1,11 +1,17 @@
+import math
 from typing import Annotated
 from fastapi import Depends, HTTPException, status, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.db.session import get_db
-from app.core.sessions import active_sessions
-from app.models.user import User as UserModel
+from app.core import metrics
+from app.core.admission import job_admission
+from app.core.config import config
+from app.core.rate_limit import rate_limiter
+from app.core.sessions import session_store
+from app.core.user_cache import user_cache
+from app.models.user import Role, User as UserModel, UserRole
 
 
 async def get_current_user(
@@ -26,15 +32,19 @@ async def get_current_user(
             detail="Invalid authorization header format",
         )
 
-    if token_str not in active_sessions:
+    session_data = await session_store.get(token_str)
+    if session_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
 
-    session_data = active_sessions[token_str]
     user_id = session_data.get("user_id")
 
+    user = user_cache.get(user_id)
+    if user:
+        return user
+
     result = await db.execute(select(UserModel).where(UserModel.id == user_id))
     user = result.scalars().first()
 
@@ -44,4 +54,60 @@ async def get_current_user(
             detail="User not found",
         )
 
+    user_cache.set(user)
+    return user
+
+
+async def get_current_admin(
+    user: Annotated[UserModel, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> UserModel:
+    """Пользователь с ролью ADMIN_ROLE, иначе 403."""
+    stmt = (
+        select(UserRole.user_id)
+        .join(Role, Role.id == UserRole.role_id)
+        .where(UserRole.user_id == user.id, Role.name == config.ADMIN_ROLE)
+    )
+    if (await db.execute(stmt)).first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin role required",
+        )
     return user
+
+
+def rate_limited(scope: str):
+    """
+    Зависимость вместо get_current_user: берёт токен из корзины
+    пользователя для scope (RATE_LIMITS), иначе 429 с Retry-After.
+    """
+
+    async def dependency(
+        user: Annotated[UserModel, Depends(get_current_user)],
+    ) -> UserModel:
+        wait = await rate_limiter.hit(scope, str(user.id))
+        if wait > 0:
+            metrics.REQUESTS_REJECTED.inc(scope, "rate_limit")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+        return user
+
+    return dependency
+
+
+def admit_job(scope: str):
+    """Зависимость маршрутов с тяжёлой задачей: 503, пока очередь задач полна."""
+
+    async def dependency():
+        if job_admission.overloaded:
+            metrics.REQUESTS_REJECTED.inc(scope, "overloaded")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, retry later",
+                headers={"Retry-After": str(job_admission.retry_after())},
+            )
+
+    return dependency
@@ -0,0 +1,65 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app.api.deps import get_current_admin
+from app.core import profiling, tracing
+from app.db.query_stats import query_stats
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.get("/queries")
+async def get_query_stats(
+    admin: Annotated[User, Depends(get_current_admin)],
+    limit: int = Query(20, ge=1, le=500),
+):
+    """Самые затратные запросы по суммарному времени и число запросов по маршрутам."""
+    return {
+        "statements": query_stats.top(limit),
+        "routes": query_stats.route_summary(),
+    }
+
+
+@router.delete("/queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_stats(admin: Annotated[User, Depends(get_current_admin)]):
+    query_stats.reset()
+
+
+@router.get("/profiles")
+async def get_profiles(admin: Annotated[User, Depends(get_current_admin)]):
+    """Сохранённые профили запросов и фоновых задач, новые первыми."""
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{name}")
+async def download_profile(
+    name: str,
+    admin: Annotated[User, Depends(get_current_admin)],
+    format: str = Query("prof", pattern="^(prof|text)$"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Файл профиля в формате pstats (snakeviz, flameprof, gprof2dot) или,
+    при format=text, сводка топ-limit функций по cumulative time.
+    """
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    if format == "text":
+        return PlainTextResponse(await profiling.read_profile_summary(path, limit))
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, admin: Annotated[User, Depends(get_current_admin)]):
+    """Отрезки трассы из буфера этого воркера (последние TRACING_BUFFER_SIZE)."""
+    spans = tracing.memory_exporter.get_finished_spans(trace_id)
+    if not spans:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found"
+        )
+    return [span.to_dict() for span in sorted(spans, key=lambda s: s.start_time)]
@@ -2,12 +2,13 @@ import uuid
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from app.crud import crud_user
 from app.schemas.user import User, UserCreate, UserProfileCreate, UserRegister
 from app.db.session import get_db
-from app.core.sessions import active_sessions
+from app.core.sessions import session_store
+from app.core.user_cache import user_cache
 from app.core.logging_config import logger
 
 router = APIRouter()
@@ -87,12 +88,16 @@ async def login_for_access_token(
                 detail="Incorrect email or password",
             )
         token = str(uuid.uuid4())
-        active_sessions[token] = {
-            "user_id": str(user.id),
-            "user_email": user.email,
-            "created_at": datetime.now(),
-            "expires_at": datetime.now() + timedelta(hours=1),
-        }
+        now = datetime.now(timezone.utc)
+        await session_store.set(
+            token,
+            {
+                "user_id": str(user.id),
+                "user_email": user.email,
+                "created_at": now.isoformat(),
+                "expires_at": (now + timedelta(seconds=session_store.ttl)).isoformat(),
+            },
+        )
 
         logger.info(f"User {user.email} authenticated successfully. Token: {token}")
         return {"token": token, "email": user.email}
@@ -111,8 +116,10 @@ async def login_for_access_token(
 @router.get("/logout")
 async def logout(request: Request):
     token = request.headers.get("Authorization", "").replace("Bearer ", "")
-    if token in active_sessions:
-        del active_sessions[token]
+    session_data = await session_store.get(token)
+    if session_data:
+        user_cache.invalidate(session_data["user_id"])
+    await session_store.delete(token)
 
     logger.info("User logged out")
 
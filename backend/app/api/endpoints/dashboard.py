@@ -1,22 +1,54 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, BackgroundTasks
+import asyncio
+import numpy as np
+from uuid import UUID
+from typing import Annotated, List, Optional
+from fastapi import (
+    APIRouter,
+    Depends,
+    BackgroundTasks,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db, async_session_factory
+from app.db.session import (
+    async_session_factory,
+    get_db,
+    get_read_db,
+    jobs_session_factory,
+)
 
 from app.schemas.dashboard import (
     PortfolioCreate,
     PortfolioOut,
+    PortfolioRiskOut,
+    BatchForecastCreate,
+    CryptoOut,
     SimulationCreate,
     SimulationJobOut,
+    SimulationPage,
 )
 from app.models.user import User
 from app.crud import crud_dashboard
-from app.api.deps import get_current_user
+from app.api.deps import admit_job, get_current_user, rate_limited
+from app.core.config import config
+from app.core import job_events
+from app.core.admission import job_admission
+from app.core.serialization import dumps_str, model_response
+from app.core.response_cache import (
+    ACTIVE_MODELS,
+    CRYPTOS,
+    cached_json_response,
+    response_cache,
+)
+from app.services import covariance
 from app.services.market_data import sync_market_data
-from app.services.inference import run_prediction_task
+from app.services.inference import run_batch_prediction_task, run_prediction_task
 from app.services.model_loader import reload_models_in_db
 from app.models.crypto_data import Cryptocurrency
 from app.models.ml_model import TrainedModel
@@ -24,10 +56,10 @@ from app.models.ml_model import TrainedModel
 router = APIRouter()
 
 
-@router.post("/sync-data")
+@router.post("/sync-data", dependencies=[Depends(admit_job("sync_data"))])
 async def sync_crypto_data(
     background_tasks: BackgroundTasks,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(rate_limited("sync_data"))],
 ):
     """
     Запускает фоновую задачу: скачивание данных с Yahoo Finance.
@@ -35,7 +67,7 @@ async def sync_crypto_data(
     """
 
     async def _bg_sync_task():
-        async with async_session_factory() as db:
+        async with jobs_session_factory() as db:
             await sync_market_data(db)
 
     background_tasks.add_task(_bg_sync_task)
@@ -49,7 +81,7 @@ async def sync_crypto_data(
 @router.get("/portfolios", response_model=List[PortfolioOut])
 async def read_portfolios(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
     return await crud_dashboard.get_user_portfolios(db, user_id=current_user.id)
 
@@ -65,11 +97,95 @@ async def create_portfolio(
     )
 
 
-@router.post("/predict", response_model=SimulationJobOut)
+@router.get("/portfolios/{portfolio_id}/risk", response_model=PortfolioRiskOut)
+async def get_portfolio_risk(
+    portfolio_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    method: str = covariance.EWMA_COV,
+    horizon: int = Query(30, ge=1, le=covariance.MAX_HORIZON),
+):
+    """
+    Прогноз волатильности портфеля по закэшированной ковариационной матрице
+    (DCC или EWMA_COV): после построения модели это одна квадратичная форма.
+    """
+    portfolio = await crud_dashboard.get_portfolio_by_id(
+        db, portfolio_id=portfolio_id, user_id=current_user.id
+    )
+    if not portfolio:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Portfolio not found"
+        )
+
+    try:
+        state = await covariance.get_covariance_state(db, method)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    index = {crypto_id: i for i, crypto_id in enumerate(state.crypto_ids)}
+    amounts, symbols, excluded = {}, {}, []
+    for asset in portfolio.assets:
+        if asset.crypto_id not in index:
+            excluded.append(asset.crypto.symbol)
+            continue
+        amounts[asset.crypto_id] = amounts.get(asset.crypto_id, 0) + asset.amount
+        symbols[asset.crypto_id] = asset.crypto.symbol
+
+    prices = await crud_dashboard.get_last_prices(db, list(amounts))
+    values = np.zeros(len(state.crypto_ids))
+    for crypto_id, amount in amounts.items():
+        values[index[crypto_id]] = float(amount) * prices.get(crypto_id, 0.0)
+
+    total = float(values.sum())
+    if total <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Portfolio has no priced assets covered by the covariance model",
+        )
+
+    weights = values / total
+    volatility = state.portfolio_volatility(weights, horizon)
+
+    # Вклад каждого актива в дневную дисперсию портфеля (разложение Эйлера)
+    marginal = state.covariance[0] @ weights
+    contribution = weights * marginal / float(weights @ marginal)
+    held = [index[crypto_id] for crypto_id in amounts]
+    correlation = state.correlation
+
+    return {
+        "portfolio_id": portfolio.id,
+        "method": method,
+        "horizons": list(range(1, horizon + 1)),
+        "volatility": volatility.tolist(),
+        "value_usd": total,
+        "assets": [
+            {
+                "crypto_id": crypto_id,
+                "symbol": symbols[crypto_id],
+                "amount": amount,
+                "value_usd": float(values[index[crypto_id]]),
+                "weight": float(weights[index[crypto_id]]),
+                "risk_contribution": float(contribution[index[crypto_id]]),
+            }
+            for crypto_id, amount in amounts.items()
+        ],
+        "correlation": {
+            state.symbols[i]: {state.symbols[j]: float(correlation[i, j]) for j in held}
+            for i in held
+        },
+        "excluded": excluded,
+    }
+
+
+@router.post(
+    "/predict",
+    response_model=SimulationJobOut,
+    dependencies=[Depends(admit_job("predict"))],
+)
 async def run_simulation(
     sim_in: SimulationCreate,
     background_tasks: BackgroundTasks,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[User, Depends(rate_limited("predict"))],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     job = await crud_dashboard.create_simulation_job(
@@ -81,60 +197,208 @@ async def run_simulation(
         job_id=job.id,
         model_type=sim_in.model_type,
         crypto_id=sim_in.crypto_id,
-        db_session_factory=async_session_factory,
+        db_session_factory=jobs_session_factory,
     )
 
-    return job
+    return model_response(SimulationJobOut, job)
+
+
+@router.post(
+    "/predict/batch",
+    response_model=SimulationJobOut,
+    dependencies=[Depends(admit_job("predict_batch"))],
+)
+async def run_batch_simulation(
+    batch_in: BatchForecastCreate,
+    background_tasks: BackgroundTasks,
+    current_user: Annotated[User, Depends(rate_limited("predict_batch"))],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """
+    Один job на набор прогнозов (или на все активные модели, если items пуст).
+    Результат - матрица прогнозов (монета/модель x горизонт).
+    """
+    job = await crud_dashboard.create_simulation_job(
+        db, user_id=current_user.id, sim_in=batch_in
+    )
+
+    background_tasks.add_task(
+        run_batch_prediction_task,
+        job_id=job.id,
+        items=[item.model_dump(exclude_none=True) for item in batch_in.items],
+        horizon=batch_in.horizon,
+        db_session_factory=jobs_session_factory,
+    )
 
+    return model_response(SimulationJobOut, job)
 
-@router.get("/simulations", response_model=List[SimulationJobOut])
+
+@router.get("/simulations", response_model=SimulationPage)
 async def get_history(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    crypto_id: Optional[int] = None,
+    model_type: Optional[str] = None,
+    summary: bool = False,
+):
+    """
+    История симуляций постранично (курсор из next_cursor предыдущей страницы).
+    summary=true отдаёт только статусы, полный результат - /simulations/{job_id}.
+    """
+    filters = {
+        "status": status_filter,
+        "crypto_id": crypto_id,
+        "model_type": model_type,
+    }
+    try:
+        jobs, next_cursor = await crud_dashboard.get_user_simulations(
+            db,
+            user_id=current_user.id,
+            limit=limit,
+            cursor=cursor,
+            summary=summary,
+            **filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    total = await crud_dashboard.estimate_user_simulations_count(
+        db, user_id=current_user.id, **filters
+    )
+    return model_response(
+        SimulationPage,
+        {"items": jobs, "next_cursor": next_cursor, "total_estimate": total},
+    )
+
+
+# Пауза перед переподключением EventSource после обрыва
+SSE_RETRY_MS = 3000
+
+
+def _sse(event: dict) -> str:
+    return f"event: job\ndata: {dumps_str(event)}\n\n"
+
+
+async def _job_event_stream(user_id: UUID):
+    # Подписка до снимка: переход, случившийся между ними, не потеряется
+    queue = job_events.broker.subscribe(str(user_id))
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        async with async_session_factory() as db:
+            active = await crud_dashboard.get_active_simulations(db, user_id)
+        for job in active:
+            yield _sse(crud_dashboard.job_event(job))
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=config.JOB_EVENTS_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event)
+    finally:
+        job_events.broker.unsubscribe(str(user_id), queue)
+
+
+@router.get("/simulations/events")
+async def stream_simulation_events(
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """
+    Server-Sent Events со статусами задач пользователя вместо опроса
+    /simulations: сначала текущие pending/running, затем каждый переход
+    (running, completed, failed) со ссылкой на результат в result_url.
+    """
+    if not config.JOB_EVENTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job events are disabled",
+        )
+    return StreamingResponse(
+        _job_event_stream(current_user.id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx не копит поток в буфере
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/simulations/{job_id}", response_model=SimulationJobOut)
+async def get_simulation(
+    job_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
-    return await crud_dashboard.get_user_simulations(db, user_id=current_user.id)
+    job = await crud_dashboard.get_user_simulation(
+        db, user_id=current_user.id, job_id=job_id
+    )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Simulation not found"
+        )
+    return model_response(SimulationJobOut, job)
 
 
 @router.get("/cryptos")
 async def get_cryptos(
+    request: Request,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
-    result = await db.execute(select(Cryptocurrency).order_by(Cryptocurrency.symbol))
-    return result.scalars().all()
+    entry = response_cache.get(CRYPTOS)
+    if entry is None:
+        result = await db.execute(
+            select(Cryptocurrency).order_by(Cryptocurrency.symbol)
+        )
+        cryptos = [
+            CryptoOut.model_validate(c).model_dump() for c in result.scalars().all()
+        ]
+        entry = response_cache.set(CRYPTOS, cryptos)
+    return cached_json_response(request, entry)
 
 
 @router.get("/active-models")
 async def get_active_models(
+    request: Request,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
-    stmt = (
-        select(TrainedModel)
-        .options(selectinload(TrainedModel.crypto))
-        .order_by(TrainedModel.model_type)
-    )
-    result = await db.execute(stmt)
-    models = result.scalars().all()
-
-    data = []
-    for m in models:
-        data.append(
-            {
-                "id": str(m.id),
-                "symbol": m.crypto.symbol,
-                "type": m.model_type,
-                "version": m.version,
-                "trained_at": m.trained_at,
-                "parameters": m.parameters,
-            }
+    entry = response_cache.get(ACTIVE_MODELS)
+    if entry is None:
+        stmt = (
+            select(TrainedModel)
+            .options(selectinload(TrainedModel.crypto))
+            .order_by(TrainedModel.model_type)
         )
-    return data
+        result = await db.execute(stmt)
+        models = result.scalars().all()
+
+        data = []
+        for m in models:
+            data.append(
+                {
+                    "id": str(m.id),
+                    "symbol": m.crypto.symbol,
+                    "type": m.model_type,
+                    "version": m.version,
+                    "trained_at": m.trained_at,
+                    "parameters": m.parameters,
+                }
+            )
+        entry = response_cache.set(ACTIVE_MODELS, data)
+    return cached_json_response(request, entry)
 
 
-@router.post("/reload-models")
-async def reload_models_api(current_user: Annotated[User, Depends(get_current_user)]):
-    await reload_models_in_db()
+@router.post("/reload-models", dependencies=[Depends(admit_job("reload_models"))])
+async def reload_models_api(
+    current_user: Annotated[User, Depends(rate_limited("reload_models"))],
+):
+    # Выполняется в запросе, но делит слоты с фоновыми задачами
+    async with job_admission.slot():
+        await reload_models_in_db()
     return {"status": "ok", "message": "Models reloaded from disk"}
 
 
@@ -142,7 +406,7 @@ async def reload_models_api(current_user: Annotated[User, Depends(get_current_us
 async def get_models_for_crypto(
     crypto_id: int,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
 ):
     """Возвращает список обученных моделей для конкретной монеты"""
     stmt = select(TrainedModel).where(TrainedModel.crypto_id == crypto_id)
@@ -3,7 +3,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.db.session import get_db
+from app.db.pool import pool_status
+from app.db.session import engine, get_db, jobs_engine, replica_engine
 from app.core.logging_config import logger
 
 router = APIRouter()
@@ -40,3 +41,15 @@ async def health_check(db: Annotated[AsyncSession, Depends(get_db)]):
         )
 
     return {"api": api_status, "database": db_status}
+
+
+@router.get("/health/db-pool", summary="Database connection pool usage")
+async def db_pool_status():
+    """
+    Загрузка пулов соединений (API, фоновых задач и реплики): занятые соединения,
+    насыщение и время ожидания свободного соединения.
+    """
+    pools = {"api": pool_status(engine), "jobs": pool_status(jobs_engine)}
+    if replica_engine:
+        pools["replica"] = pool_status(replica_engine)
+    return pools
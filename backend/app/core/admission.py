@@ -0,0 +1,78 @@
+import math
+import time
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+
+from app.core import metrics
+from app.core.config import config
+
+
+class JobAdmission:
+    """
+    Допуск тяжёлых задач (инференс, синхронизация, перезагрузка моделей)
+    в воркере: одновременно выполняются не больше concurrency, остальные
+    ждут слота. Когда ожидающих больше queue_limit, новые запросы
+    отклоняются (overloaded), а retry_after оценивает время до
+    освобождения очереди по средней длительности задачи.
+    """
+
+    def __init__(self, concurrency: int, queue_limit: int):
+        self.concurrency = max(concurrency, 1)
+        self.queue_limit = queue_limit
+        # Выполняются или ждут слота
+        self.active = 0
+        self.avg_duration = 1.0
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    @property
+    def waiting(self) -> int:
+        return max(self.active - self.concurrency, 0)
+
+    @property
+    def overloaded(self) -> bool:
+        return self.waiting >= self.queue_limit
+
+    def retry_after(self) -> int:
+        rounds = self.waiting // self.concurrency + 1
+        return max(math.ceil(self.avg_duration * rounds), 1)
+
+    @asynccontextmanager
+    async def slot(self):
+        self.active += 1
+        try:
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    # Скользящее среднее: оценка сдвигается за последними задачами
+                    elapsed = time.perf_counter() - started
+                    self.avg_duration = 0.8 * self.avg_duration + 0.2 * elapsed
+        finally:
+            self.active -= 1
+
+    def limit(self, func):
+        """Декоратор фоновой задачи: выполняется, только получив слот."""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with self.slot():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+
+job_admission = JobAdmission(config.JOB_CONCURRENCY, config.JOB_QUEUE_LIMIT)
+
+metrics.registry.register(
+    metrics.Gauge(
+        "heavy_jobs_active",
+        "Heavy jobs running or waiting for a slot in this worker",
+        ("state",),
+        callback=lambda: {
+            ("running",): job_admission.active - job_admission.waiting,
+            ("waiting",): job_admission.waiting,
+        },
+    )
+)
@@ -0,0 +1,129 @@
+import gzip
+import asyncio
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+# Крупные тела сжимаются в отдельном потоке, чтобы не блокировать event loop
+THREAD_THRESHOLD = 256 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Выбирает br или gzip по заголовку Accept-Encoding (q=0 - запрет)."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """
+    Сильный ETag сжатого представления: RFC 9110 требует, чтобы он отличался
+    от ETag тела без сжатия, иначе кэш может отдать br клиенту без br.
+    """
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def base_etag(tag: str) -> str:
+    """ETag тела без сжатия для значения из If-None-Match (слабого или сжатого)."""
+    tag = tag.strip().removeprefix("W/")
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[: -len(suffix)] + '"'
+    return tag
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов: brotli или gzip по Accept-Encoding,
+    только для текстовых/JSON-ответов не меньше minimum_size байт.
+    Потоковые ответы (несколько body-сообщений) передаются без изменений.
+    """
+
+    def __init__(
+        self, app, minimum_size: int, gzip_level: int = 6, brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if start_message["status"] == 304:
+                # 304 повторяет ETag того представления, которое есть у клиента
+                etag = headers.get("etag")
+                if_none_match = request_headers.get("if-none-match", "")
+                if etag and coded_etag(etag, encoding) in (
+                    tag.strip() for tag in if_none_match.split(",")
+                ):
+                    headers["ETag"] = coded_etag(etag, encoding)
+                    headers.add_vary_header("Accept-Encoding")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or len(body) < self.minimum_size
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                start_message = None
+                await send(message)
+                return
+
+            if len(body) >= THREAD_THRESHOLD:
+                body = await asyncio.to_thread(self.compress, body, encoding)
+            else:
+                body = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers:
+                headers["ETag"] = coded_etag(headers["etag"], encoding)
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            start_message = None
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
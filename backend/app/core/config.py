@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Dict, Optional
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -17,6 +18,111 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Необязательная реплика для read-only эндпоинтов
+    REPLICA_HOST: Optional[str] = None
+    REPLICA_PORT: Optional[int] = None
+    REPLICA_RETRY_SECONDS: int = 30
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # auto - проверка ревизии в процессе и миграция под advisory lock,
+    # subprocess - прежний запуск alembic upgrade head, off - без миграций
+    STARTUP_MIGRATIONS: str = "auto"
+
+    # Логирование: вывод через очередь в отдельном потоке
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE_LEVEL: str = "INFO"
+    LOG_CONSOLE_FORMAT: str = "color"  # color, json
+    LOG_FILE_FORMAT: str = "json"  # json, text
+    LOG_DIR: str = "logs"
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUP_COUNT: int = 5
+    # С одного места вызова за окно: первые INITIAL записей, затем каждая THEREAFTER-я
+    LOG_SAMPLING_INITIAL: int = 20
+    LOG_SAMPLING_THEREAFTER: int = 100
+    LOG_SAMPLING_WINDOW: float = 1.0
+
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_JOBS_POOL_SIZE: int = 5
+    DB_JOBS_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    # Учёт запросов к БД: медленные запросы в лог, статистика по отпечаткам
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_MAX_STATEMENTS: int = 1000
+    SLOW_QUERY_MS: float = 200
+    QUERY_COUNT_WARN: int = 30
+
+    METRICS_ENABLED: bool = True
+    METRICS_LOOP_LAG_INTERVAL: float = 1.0
+
+    # Трассировка (отрезки в духе OpenTelemetry), буфер последних отрезков
+    TRACING_ENABLED: bool = True
+    TRACING_BUFFER_SIZE: int = 5000
+    TRACING_LOG_SPANS: bool = False
+
+    # cProfile по заголовку X-Profile: <PROFILING_TOKEN> или по выборке
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: SecretStr = SecretStr("")
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "/app/profiles"
+    PROFILING_MAX_FILES: int = 200
+
+    # Статусы задач в реальном времени (SSE + LISTEN/NOTIFY)
+    JOB_EVENTS_ENABLED: bool = True
+    JOB_EVENTS_HEARTBEAT: float = 15.0
+    JOB_EVENTS_QUEUE_SIZE: int = 100
+
+    REFERENCE_CACHE_TTL: int = 300
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    RESULT_STORAGE: str = "binary"  # binary, json
+    RESULT_FLOAT_DTYPE: str = "float64"  # float32, float64
+
+    # Срок хранения задач по статусам (дни), архив - Parquet на локальном диске
+    SIMULATION_RETENTION_DAYS: Dict[str, int] = {
+        "completed": 365,
+        "failed": 30,
+        "pending": 7,
+        "running": 7,
+    }
+    SIMULATION_ARCHIVE_DIR: str = "/app/archive/simulations"
+    SIMULATION_PARTITIONS_AHEAD: int = 3
+    RETENTION_INTERVAL_HOURS: int = 24
+    RETENTION_BATCH_SIZE: int = 1000
+
+    EWMA_LAMBDA: float = 0.94
+    COVARIANCE_CACHE_TTL: int = 3600
+
+    ADMIN_ROLE: str = "admin"
+
+    # Token bucket на пользователя и маршрут: "запросов/секунд"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory, postgres
+    RATE_LIMITS: Dict[str, str] = {
+        "predict": "30/60",
+        "predict_batch": "5/60",
+        "sync_data": "2/600",
+        "reload_models": "2/600",
+    }
+    RATE_LIMIT_SWEEP_INTERVAL: int = 300
+    # Тяжёлые задачи воркера: выполняются одновременно / ждут слота
+    JOB_CONCURRENCY: int = 2
+    JOB_QUEUE_LIMIT: int = 50
+
+    SESSION_BACKEND: str = "memory"  # memory, postgres
+    SESSION_MAX_SIZE: int = 100_000
+    SESSION_CACHE_TTL: int = 30
+    SESSION_SWEEP_INTERVAL: int = 60
+    USER_CACHE_TTL: int = 30
+    USER_CACHE_MAX_SIZE: int = 10_000
+
     model_config = SettingsConfigDict(env_file=ENV_FILE_PATH, extra="ignore")
 
     @property
@@ -29,5 +135,17 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_DB}"
         )
 
+    @property
+    def replica_url(self) -> Optional[str]:
+        if not self.REPLICA_HOST:
+            return None
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:"
+            f"{self.POSTGRES_PASSWORD.get_secret_value()}@"
+            f"{self.REPLICA_HOST}:"
+            f"{self.REPLICA_PORT or self.POSTGRES_PORT}/"
+            f"{self.POSTGRES_DB}"
+        )
+
 
 config = Settings()
@@ -0,0 +1,101 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+import asyncpg
+import orjson
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import config
+from app.core.logging_config import logger
+
+CHANNEL = "simulation_jobs"
+# Задержки переподключения слушателя, секунды
+_RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+async def notify(db: AsyncSession, event: dict):
+    """
+    NOTIFY в транзакции сессии: Postgres доставит событие слушателям всех
+    воркеров только после COMMIT, откат транзакции его отменяет.
+    """
+    if not config.JOB_EVENTS_ENABLED:
+        return
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CHANNEL, "payload": orjson.dumps(event).decode()},
+    )
+
+
+class JobEventBroker:
+    """
+    Подписки текущего воркера: у каждого открытого потока SSE своя
+    ограниченная очередь, события раздаются по user_id. Если клиент не
+    успевает читать, старые события вытесняются новыми.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def publish(self, event: dict):
+        for queue in self._subscribers.get(str(event.get("user_id")), ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+broker = JobEventBroker(config.JOB_EVENTS_QUEUE_SIZE)
+
+
+def _on_notification(connection, pid: int, channel: str, payload: str):
+    try:
+        event = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        logger.warning(f"⚠️ Malformed job event payload: {payload[:200]}")
+        return
+    broker.publish(event)
+
+
+async def listen_for_job_events():
+    """
+    Держит отдельное соединение asyncpg с LISTEN на канале задач и
+    переподключается при обрыве. Соединение не из пула SQLAlchemy: LISTEN
+    привязан к сессии Postgres и не переживёт возврат соединения в пул.
+    """
+    dsn = config.postgres_url.replace("+asyncpg", "")
+    attempt = 0
+    while True:
+        connection: Optional[asyncpg.Connection] = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(CHANNEL, _on_notification)
+            attempt = 0
+            logger.info(f"📡 Listening for job events on '{CHANNEL}'")
+            await lost.wait()
+            logger.warning("⚠️ Job events connection lost, reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Job events listener failed: {e}")
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+        await asyncio.sleep(_RECONNECT_DELAYS[min(attempt, len(_RECONNECT_DELAYS) - 1)])
+        attempt += 1
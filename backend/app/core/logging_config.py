@@ -1,29 +1,116 @@
 import sys
+import copy
+import time
+import queue
+import atexit
+import threading
 
 import logging
 from logging import Formatter, StreamHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
 from colorlog import ColoredFormatter
 
+from app.core.config import config
 
-def setup_logger():
-    log_dir = Path("logs")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / "app.log"
+TEXT_FORMAT = "[%(asctime)s] %(name)s:%(levelname)s | %(funcName)s: %(message)s"
+# Служебные атрибуты LogRecord: всё остальное (extra=...) попадает в JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "sampled",
+}
 
-    logger = logging.getLogger("cryptovol_api")
-    logger.setLevel(logging.DEBUG)
 
-    if logger.hasHandlers():
-        logger.handlers.clear()
+class JSONFormatter(Formatter):
+    """Одна строка JSON на запись: время UTC, уровень, место вызова, extra-поля."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "sampled", 0):
+            entry["sampled"] = record.sampled
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживание частых сообщений: с одного места вызова (файл и строка)
+    за окно LOG_SAMPLING_WINDOW секунд проходят первые LOG_SAMPLING_INITIAL
+    записей, дальше - каждая LOG_SAMPLING_THEREAFTER-я. Число пропущенных
+    записей попадает в поле sampled следующей прошедшей. WARNING и выше
+    не прореживаются.
+    """
 
+    def __init__(self, initial: int, thereafter: int, window: float):
+        super().__init__()
+        self.initial = initial
+        self.thereafter = max(thereafter, 1)
+        self.window = window
+        # место вызова -> [начало окна, записей в окне, пропущено]
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.initial <= 0:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.window:
+                state = self._sites[site] = [now, 0, 0]
+            state[1] += 1
+            seen = state[1]
+            if seen > self.initial and (seen - self.initial) % self.thereafter:
+                state[2] += 1
+                return False
+            record.sampled, state[2] = state[2], 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладёт запись в очередь, не форматируя её: сообщение и traceback
+    вычисляются здесь (аргументы могут измениться позже), а вывод на
+    консоль и запись в файл выполняет поток QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _console_formatter() -> Formatter:
+    if config.LOG_CONSOLE_FORMAT == "json":
+        return JSONFormatter()
     console_format = (
         "%(log_color)s[%(asctime)s] %(blue)s%(name)s:%(reset)s "
         "%(log_color)s%(levelname)s%(reset)s | "
         "%(cyan)s%(funcName)s:%(reset)s %(log_color)s%(message)s"
     )
-    console_formatter = ColoredFormatter(
+    return ColoredFormatter(
         console_format,
         datefmt="%Y-%m-%d %H:%M:%S",
         log_colors={
@@ -34,23 +121,71 @@ def setup_logger():
             "CRITICAL": "purple",
         },
     )
+
+
+# Поток, выводящий записи из очереди; останавливается при выходе из процесса
+listener = None
+
+
+def setup_logger():
+    global listener
+    log_dir = Path(config.LOG_DIR)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_file = log_dir / "app.log"
+
+    logger = logging.getLogger("cryptovol_api")
+
+    if logger.hasHandlers():
+        logger.handlers.clear()
+
     console_handler = StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_formatter)
-    console_handler.setLevel(logging.DEBUG)
+    console_handler.setFormatter(_console_formatter())
+    console_handler.setLevel(config.LOG_LEVEL)
 
-    file_handler = logging.FileHandler(log_file)
-    file_formatter = Formatter(
-        "[%(asctime)s] %(name)s:%(levelname)s | %(funcName)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=config.LOG_FILE_MAX_BYTES,
+        backupCount=config.LOG_FILE_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    if config.LOG_FILE_FORMAT == "json":
+        file_handler.setFormatter(JSONFormatter())
+    else:
+        file_handler.setFormatter(Formatter(TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+    file_handler.setLevel(config.LOG_FILE_LEVEL)
+
+    # Поток event loop только ставит запись в очередь
+    log_queue = queue.SimpleQueue()
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(
+        SamplingFilter(
+            config.LOG_SAMPLING_INITIAL,
+            config.LOG_SAMPLING_THEREAFTER,
+            config.LOG_SAMPLING_WINDOW,
+        )
+    )
+    listener = QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
     )
-    file_handler.setFormatter(file_formatter)
-    file_handler.setLevel(logging.INFO)
+    listener.start()
+    # Дописывает очередь при завершении процесса
+    atexit.register(listener.stop)
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    logger.setLevel(min(console_handler.level, file_handler.level))
+    logger.addHandler(queue_handler)
+    logger.propagate = False
 
     logger.info("Logger initialized successfully")
     return logger
 
 
+def add_context_filter(context_filter: logging.Filter):
+    """
+    Фильтр, добавляющий к записи поля контекста (trace_id и т.п.). Выполняется
+    в потоке, где вызван логгер, поэтому видит его ContextVar.
+    """
+    for handler in logger.handlers:
+        handler.addFilter(context_filter)
+
+
 logger = setup_logger()
@@ -0,0 +1,293 @@
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import config
+
+# Границы по умолчанию (секунды): от быстрых API-ответов до долгих задач
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    """
+    Метрика в текстовом формате Prometheus. Значения лежат в словаре по
+    кортежу значений меток: запись - одна операция со словарём, без
+    блокировок (всё выполняется в потоке event loop или атомарно под GIL).
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Строки экспорта: (имя, метки, значение)."""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines += [
+            f"{name}{labels} {_number(value)}" for name, labels, value in self.samples()
+        ]
+        return lines
+
+
+class Counter(Metric):
+    """
+    Монотонный счётчик. Если задан callback, значения вычисляются в момент
+    сбора метрик (словарь {значения меток: число}) и ничего не стоят
+    на горячем пути - так экспортируется уже накопленная где-то статистика.
+    """
+
+    type = "counter"
+
+    def __init__(
+        self,
+        name,
+        documentation,
+        labelnames=(),
+        callback: Optional[Callable[[], Dict[Tuple, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self.callback = callback
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        values = self.callback() if self.callback else self._values
+        for labels, value in values.items():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    """Текущее значение, может как расти, так и убывать."""
+
+    type = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Для каждой комбинации меток: счётчики корзин (без накопления), сумма
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def count(self, *labels) -> int:
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def sum(self, *labels) -> float:
+        state = self._values.get(labels)
+        return state[1] if state else 0.0
+
+    def samples(self):
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield (
+                    f"{self.name}_bucket",
+                    _labels(self.labelnames, labels, le),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", _labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _labels(self.labelnames, labels), cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route template",
+        ("method", "route", "status"),
+    )
+)
+JOBS = registry.register(
+    Counter(
+        "simulation_jobs_total",
+        "Finished simulation jobs",
+        ("status", "model_type"),
+    )
+)
+JOB_DURATION = registry.register(
+    Histogram(
+        "simulation_job_duration_seconds",
+        "Simulation job run time",
+        ("status", "model_type"),
+    )
+)
+MODEL_LOAD_DURATION = registry.register(
+    Histogram(
+        "model_load_duration_seconds",
+        "Time to load a serialized model from disk",
+        ("model_type",),
+    )
+)
+CACHE_REQUESTS = registry.register(
+    Counter(
+        "cache_requests_total",
+        "In-process cache lookups (hit ratio = hit / (hit + miss))",
+        ("cache", "result"),
+    )
+)
+SYNC_ROWS = registry.register(
+    Counter(
+        "market_data_rows_ingested_total",
+        "Market data rows saved by sync",
+        ("ticker",),
+    )
+)
+SYNC_DOWNLOAD_DURATION = registry.register(
+    Histogram(
+        "market_data_download_duration_seconds",
+        "yfinance download time",
+        ("ticker",),
+    )
+)
+REQUESTS_REJECTED = registry.register(
+    Counter(
+        "requests_rejected_total",
+        "Requests refused by rate limiting (429) or load shedding (503)",
+        ("scope", "reason"),
+    )
+)
+EVENT_LOOP_LAG = registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Delay of a scheduled event loop wakeup beyond its interval",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    )
+)
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+
+def job_finished(status: str, model_type: str, duration: float):
+    JOBS.inc(status, model_type)
+    JOB_DURATION.observe(duration, status, model_type)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: длительность запросов по шаблону маршрута
+    (/api/dashboard/simulations/{job_id}), а не по фактическому пути,
+    чтобы число рядов не росло с числом идентификаторов.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+            )
+
+
+async def measure_event_loop_lag():
+    """
+    Фоновая задача: засыпает на METRICS_LOOP_LAG_INTERVAL и записывает,
+    насколько позже запланированного event loop её разбудил.
+    """
+    interval = config.METRICS_LOOP_LAG_INTERVAL
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(time.perf_counter() - started - interval, 0.0))
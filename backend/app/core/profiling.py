@@ -0,0 +1,219 @@
+import io
+import re
+import time
+import pstats
+import random
+import asyncio
+import cProfile
+import functools
+import inspect
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import config
+from app.core.logging_config import logger
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_SUFFIX = ".prof"
+# Имя файла: <вид>-<идентификатор>-<время UTC>.prof, ничего кроме этого не отдаём
+PROFILE_NAME = re.compile(r"^[a-z_]+-[\w.-]+-\d{8}T\d{12}Z\.prof$")
+
+# Профиль, запрошенный заголовком: наследуется фоновыми задачами запроса
+_requested: ContextVar[bool] = ContextVar("profile_requested", default=False)
+# cProfile в процессе может быть активен только один
+_active = False
+
+
+def profiles_dir() -> Path:
+    return Path(config.PROFILING_DIR)
+
+
+def _sampled() -> bool:
+    rate = config.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def _header_matches(value: Optional[str]) -> bool:
+    token = config.PROFILING_TOKEN.get_secret_value()
+    return bool(token and value) and secrets.compare_digest(value, token)
+
+
+def _slug(value) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(value)).strip("_") or "root"
+
+
+def _save(profiler: cProfile.Profile, kind: str, ident) -> Path:
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = directory / f"{kind}-{_slug(ident)}-{stamp}{PROFILE_SUFFIX}"
+    profiler.dump_stats(path)
+    _prune(directory)
+    return path
+
+
+def _prune(directory: Path):
+    files = sorted(
+        directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime
+    )
+    for path in files[: max(len(files) - config.PROFILING_MAX_FILES, 0)]:
+        path.unlink(missing_ok=True)
+
+
+@contextmanager
+def profile(kind: str, ident):
+    """
+    Выполняет блок под cProfile и сохраняет результат в PROFILING_DIR.
+    Профилируется поток event loop целиком, поэтому в профиль попадают и
+    конкурентные корутины. Если профиль уже идёт, блок выполняется без него.
+    Отдаёт dict, в котором после выхода лежит путь к файлу ("path").
+    """
+    global _active
+    result = {"path": None}
+    if _active:
+        logger.debug(f"Profiler busy, {kind} {ident} runs unprofiled")
+        yield result
+        return
+
+    _active = True
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        _active = False
+        try:
+            result["path"] = _save(profiler, kind, ident)
+            logger.info(
+                f"🔬 Profile of {kind} {ident} saved to {result['path'].name} "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+        except OSError as e:
+            logger.error(f"❌ Failed to save profile of {kind} {ident}: {e}")
+
+
+def profile_job(kind: str, id_arg: Optional[str] = None):
+    """
+    Декоратор фоновой задачи: профилирует её, если профиль запрошен
+    заголовком в породившем задачу запросе или выпал по PROFILING_SAMPLE_RATE.
+    id_arg - аргумент, значение которого попадает в имя файла (job_id).
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not config.PROFILING_ENABLED or not (_requested.get() or _sampled()):
+                return await func(*args, **kwargs)
+
+            ident = "run"
+            if id_arg:
+                bound = signature.bind_partial(*args, **kwargs)
+                ident = bound.arguments.get(id_arg, ident)
+            with profile(kind, ident):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class ProfilingMiddleware:
+    """
+    ASGI-middleware: профилирует HTTP-запрос при заголовке X-Profile с
+    PROFILING_TOKEN или по PROFILING_SAMPLE_RATE. Профиль закрывается перед
+    отправкой заголовков ответа; фоновые задачи запроса профилируются
+    отдельно (profile_job) и сохраняются со своим job_id. Имя файла
+    запроса возвращается в X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        requested = _header_matches(
+            headers.get(PROFILE_HEADER.encode(), b"").decode("latin-1")
+        )
+        if not (requested or _sampled()):
+            await self.app(scope, receive, send)
+            return
+
+        token = _requested.set(requested)
+        session = profile("request", f"{scope['method']}-{scope['path']}")
+        result = session.__enter__()
+        closed = False
+
+        def close():
+            nonlocal closed
+            if not closed:
+                closed = True
+                session.__exit__(None, None, None)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Файл сохраняется до заголовков, чтобы вернуть его имя;
+                # тело к этому моменту уже сформировано (и сжато)
+                close()
+                if result["path"] is not None:
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (PROFILE_ID_HEADER, result["path"].name.encode()),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            close()
+            _requested.reset(token)
+
+
+def list_profiles() -> List[dict]:
+    directory = profiles_dir()
+    if not directory.exists():
+        return []
+    items = []
+    for path in directory.glob(f"*{PROFILE_SUFFIX}"):
+        stat = path.stat()
+        items.append(
+            {
+                "name": path.name,
+                "kind": path.name.split("-", 1)[0],
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+            }
+        )
+    return sorted(items, key=lambda item: item["created_at"], reverse=True)
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Путь к сохранённому профилю или None; имена вне формата не принимаются."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = profiles_dir() / name
+    return path if path.is_file() else None
+
+
+async def read_profile_summary(path: Path, limit: int) -> str:
+    """Текстовая сводка pstats (топ функций по cumulative) для быстрого взгляда."""
+
+    def render() -> str:
+        buffer = io.StringIO()
+        stats = pstats.Stats(str(path), stream=buffer)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return buffer.getvalue()
+
+    return await asyncio.to_thread(render)
@@ -0,0 +1,169 @@
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, func, text
+
+from app.core.config import config
+from app.core.logging_config import logger
+from app.models.rate_limit import RateLimitBucket
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Корзина на capacity запросов, полностью наполняется за period секунд."""
+
+    capacity: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Лимит из строки вида "30/60" (запросов / секунд)."""
+        capacity, _, period = value.partition("/")
+        return cls(int(capacity), float(period))
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+class RateLimitStore(ABC):
+    """Интерфейс хранилища корзин (token bucket)."""
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: Limit) -> float:
+        """Берёт токен: 0, а если токенов нет - секунды до появления следующего."""
+
+    @abstractmethod
+    async def sweep(self, max_idle: float) -> int:
+        """Удаляет корзины, не тронутые max_idle секунд (они уже полны)."""
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Корзины в памяти процесса: у каждого воркера свои лимиты."""
+
+    def __init__(self):
+        # ключ -> (токены, время обновления)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def acquire(self, key: str, limit: Limit) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / limit.rate
+
+    async def sweep(self, max_idle: float) -> int:
+        now = time.monotonic()
+        idle = [k for k, (_, at) in self._buckets.items() if now - at >= max_idle]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+
+# Пополнение корзины на текущий момент транзакции
+_REFILL = (
+    "LEAST(CAST(:capacity AS float8), "
+    "b.tokens + EXTRACT(EPOCH FROM now() - b.updated_at) * CAST(:rate AS float8))"
+)
+# Токен списывается одним оператором, без гонок между воркерами. Если
+# токена нет, строка не меняется: updated_at = now() в RETURNING означает,
+# что запрос пропущен, а available - сколько токенов в корзине сейчас.
+_ACQUIRE = text(
+    f"""
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (:key, CAST(:capacity AS float8) - 1, now())
+    ON CONFLICT (key) DO UPDATE SET
+        tokens = CASE WHEN {_REFILL} >= 1 THEN {_REFILL} - 1 ELSE b.tokens END,
+        updated_at = CASE WHEN {_REFILL} >= 1 THEN now() ELSE b.updated_at END
+    RETURNING b.updated_at = now() AS allowed, {_REFILL} AS available
+    """
+)
+
+
+class PostgresRateLimitStore(RateLimitStore):
+    """
+    Общие для всех воркеров корзины в UNLOGGED-таблице rate_limit_buckets:
+    при сбое сервера БД лимиты просто начнутся заново.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+
+    async def acquire(self, key: str, limit: Limit) -> float:
+        params = {"key": key, "capacity": limit.capacity, "rate": limit.rate}
+        async with self._session_factory() as db:
+            row = (await db.execute(_ACQUIRE, params)).one()
+            await db.commit()
+        if row.allowed:
+            return 0.0
+        return max((1 - row.available) / limit.rate, 0.0)
+
+    async def sweep(self, max_idle: float) -> int:
+        stmt = delete(RateLimitBucket).where(
+            RateLimitBucket.updated_at
+            <= func.now() - func.make_interval(0, 0, 0, 0, 0, 0, max_idle)
+        )
+        async with self._session_factory() as db:
+            result = await db.execute(stmt)
+            await db.commit()
+            return result.rowcount
+
+
+class RateLimiter:
+    """Лимиты RATE_LIMITS по маршрутам (scope), корзина на пару scope + пользователь."""
+
+    def __init__(self, store: RateLimitStore, limits: Dict[str, Limit]):
+        self.store = store
+        self.limits = limits
+
+    async def hit(self, scope: str, ident: str) -> float:
+        """0, если запрос пропущен, иначе секунды до следующей попытки."""
+        limit = self.limits.get(scope)
+        if not config.RATE_LIMIT_ENABLED or limit is None:
+            return 0.0
+        try:
+            return await self.store.acquire(f"{scope}:{ident}", limit)
+        except Exception as e:
+            # Недоступное хранилище лимитов не должно останавливать API
+            logger.error(f"❌ Rate limit check failed, request allowed: {e}")
+            return 0.0
+
+    async def sweep(self) -> int:
+        if not self.limits:
+            return 0
+        return await self.store.sweep(
+            max(limit.period for limit in self.limits.values())
+        )
+
+
+def build_rate_limiter() -> RateLimiter:
+    limits = {scope: Limit.parse(value) for scope, value in config.RATE_LIMITS.items()}
+
+    if config.RATE_LIMIT_BACKEND == "memory":
+        return RateLimiter(MemoryRateLimitStore(), limits)
+    elif config.RATE_LIMIT_BACKEND == "postgres":
+        from app.db.session import async_session_factory
+
+        return RateLimiter(PostgresRateLimitStore(async_session_factory), limits)
+    raise ValueError(f"Unknown rate limit backend: {config.RATE_LIMIT_BACKEND}")
+
+
+rate_limiter = build_rate_limiter()
+
+
+async def sweep_rate_limits_periodically():
+    """Фоновая очистка полных корзин, запускается в lifespan приложения."""
+    while True:
+        await asyncio.sleep(config.RATE_LIMIT_SWEEP_INTERVAL)
+        try:
+            removed = await rate_limiter.sweep()
+            if removed:
+                logger.info(f"🧹 Removed {removed} idle rate limit buckets")
+        except Exception as e:
+            logger.error(f"❌ Rate limit sweep failed: {e}")
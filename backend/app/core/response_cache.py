@@ -0,0 +1,86 @@
+import time
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import Request, Response, status
+
+from app.core.compression import base_etag
+from app.core.config import config
+from app.core.metrics import cache_lookup
+from app.core.serialization import dumps
+
+CRYPTOS = "cryptos"
+ACTIVE_MODELS = "active_models"
+
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass
+class CachedResponse:
+    version: int
+    body: bytes
+    etag: str
+    created_at: float
+
+
+class ResponseCache:
+    """
+    Кэш готовых JSON-ответов справочных эндпоинтов. Ключ - пространство имён
+    и его версия: изменение данных увеличивает версию, и старая запись больше
+    не используется. Версии локальны для процесса, поэтому записи дополнительно
+    ограничены REFERENCE_CACHE_TTL - так другие воркеры тоже увидят изменения.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, CachedResponse] = {}
+
+    def bump(self, *namespaces: str):
+        for namespace in namespaces:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def get(self, namespace: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(namespace)
+        if (
+            entry is None
+            or entry.version != self._versions.get(namespace, 0)
+            or time.time() - entry.created_at >= self.ttl
+        ):
+            cache_lookup(namespace, False)
+            return None
+        cache_lookup(namespace, True)
+        return entry
+
+    def set(self, namespace: str, data) -> CachedResponse:
+        body = dumps(data)
+        # Сильный ETag по содержимому совпадает у всех воркеров при одинаковых данных
+        entry = CachedResponse(
+            version=self._versions.get(namespace, 0),
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            created_at=time.time(),
+        )
+        self._entries[namespace] = entry
+        return entry
+
+
+response_cache = ResponseCache(config.REFERENCE_CACHE_TTL)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Клиент присылает ETag полученного представления: сжатого или слабого
+    return etag in (base_etag(tag) for tag in header.split(","))
+
+
+def cached_json_response(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,134 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+ARRAYS_KEY = "__arrays__"
+HORIZON_KEY = "__horizon_dates__"
+MIN_ARRAY_SIZE = 8
+DTYPES = {"float32": np.float32, "float64": np.float64}
+
+
+def _float_leaves(value) -> Optional[bool]:
+    """
+    Проверяет, что вложенный список состоит только из чисел и null.
+    Возвращает True, если среди них есть float, None - если встретилось
+    что-то другое.
+    """
+    has_float = False
+    for item in value:
+        if isinstance(item, list):
+            nested = _float_leaves(item)
+            if nested is None:
+                return None
+            has_float |= nested
+        elif isinstance(item, float):
+            has_float = True
+        elif item is not None and (isinstance(item, bool) or not isinstance(item, int)):
+            return None
+    return has_float
+
+
+def _as_float_array(value) -> Optional[np.ndarray]:
+    """
+    Массив float (ndarray или прямоугольный список чисел с хотя бы одним
+    float, null - NaN) либо None, если значение остаётся в JSON-заголовке.
+    Целочисленные списки (id, горизонты) не трогаются, чтобы не стать float.
+    """
+    if isinstance(value, np.ndarray):
+        return (
+            value if value.dtype.kind == "f" and value.size >= MIN_ARRAY_SIZE else None
+        )
+    if not isinstance(value, list) or not _float_leaves(value):
+        return None
+    try:
+        array = np.asarray(value, dtype=float)
+    except ValueError:
+        return None
+    return array if array.size >= MIN_ARRAY_SIZE else None
+
+
+def _is_horizon_dates(value) -> bool:
+    return (
+        isinstance(value, list)
+        and len(value) > 0
+        and value == [f"+{i}d" for i in range(1, len(value) + 1)]
+    )
+
+
+def encode(payload: dict, dtype: str = "float64") -> Tuple[dict, Optional[bytes]]:
+    """
+    Делит результат на JSON-заголовок и бинарный блок: массивы float
+    (в том числе во вложенных словарях) складываются подряд в bytes в виде
+    dtype, в заголовке остаются путь, форма и смещение каждого массива.
+    Метки "+1d".."+Nd" заменяются их количеством.
+    """
+    np_dtype = DTYPES[dtype]
+    chunks, arrays = [], []
+    offset = 0
+
+    def split(node: dict, path: list) -> dict:
+        nonlocal offset
+        header = {}
+        for key, value in node.items():
+            if isinstance(value, dict):
+                header[key] = split(value, path + [key])
+            elif (array := _as_float_array(value)) is not None:
+                array = np.ascontiguousarray(array, dtype=np_dtype)
+                chunks.append(array.tobytes())
+                arrays.append(
+                    {
+                        "path": path + [key],
+                        "dtype": dtype,
+                        "shape": list(array.shape),
+                        "offset": offset,
+                    }
+                )
+                offset += array.nbytes
+            elif _is_horizon_dates(value):
+                header[key] = {HORIZON_KEY: len(value)}
+            else:
+                header[key] = value
+        return header
+
+    header = split(payload, [])
+    header[ARRAYS_KEY] = {"version": FORMAT_VERSION, "arrays": arrays}
+    return header, b"".join(chunks) if chunks else None
+
+
+def decode(header: dict, blob: Optional[bytes]) -> dict:
+    """
+    Обратное преобразование. Результаты в старом формате (без служебного
+    ключа __arrays__) возвращаются как есть. Массивы - ndarray float64
+    поверх буфера, без копирования значений через Python-объекты.
+    """
+    if ARRAYS_KEY not in header:
+        return header
+
+    def restore(node: dict) -> dict:
+        result = {}
+        for key, value in node.items():
+            if key == ARRAYS_KEY:
+                continue
+            if isinstance(value, dict):
+                if set(value) == {HORIZON_KEY}:
+                    result[key] = [f"+{i}d" for i in range(1, value[HORIZON_KEY] + 1)]
+                else:
+                    result[key] = restore(value)
+            else:
+                result[key] = value
+        return result
+
+    payload = restore(header)
+    for meta in header[ARRAYS_KEY]["arrays"]:
+        np_dtype = DTYPES[meta["dtype"]]
+        count = int(np.prod(meta["shape"]))
+        array = np.frombuffer(
+            blob, dtype=np_dtype, count=count, offset=meta["offset"]
+        ).reshape(meta["shape"])
+
+        node = payload
+        for key in meta["path"][:-1]:
+            node = node.setdefault(key, {})
+        node[meta["path"][-1]] = array.astype(np.float64, copy=False)
+    return payload
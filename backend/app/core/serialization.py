@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    # orjson сериализует массивы numpy напрямую; сюда попадают только
+    # несмежные массивы, неподдерживаемые dtype и скаляры
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_builtin(obj):
+    """Переводит массивы numpy во вложенных dict/list в списки для Pydantic."""
+    if isinstance(obj, dict):
+        return {key: to_builtin(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_builtin(value) for value in obj]
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return obj
+
+
+def dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+
+def dumps_str(obj) -> str:
+    """Сериализатор JSON/JSONB-колонок SQLAlchemy."""
+    return dumps(obj).decode()
+
+
+class ORJSONResponse(JSONResponse):
+    """Ответ по умолчанию: orjson с поддержкой numpy вместо json.dumps."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def model_response(model: type[BaseModel], obj) -> ORJSONResponse:
+    """
+    Ответ по схеме без перевода в JSON-типы Pydantic: response_model
+    делает model_dump(mode="json") и не принимает массивы numpy, а здесь
+    их кодирует orjson. response_model в маршруте остаётся для OpenAPI.
+    """
+    return ORJSONResponse(model.model_validate(obj, from_attributes=True).model_dump())
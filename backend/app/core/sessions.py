@@ -1 +1,201 @@
-active_sessions = {}
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import config
+from app.core.logging_config import logger
+from app.core.metrics import cache_lookup
+from app.models.session import UserSession
+
+
+class SessionStore(ABC):
+    """
+    Интерфейс хранилища сессий. Данные сессии - JSON-совместимый словарь,
+    срок жизни задаётся хранилищем при записи.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, token: str) -> Optional[dict]:
+        """Данные сессии или None, если её нет или она истекла."""
+
+    @abstractmethod
+    async def set(self, token: str, data: dict):
+        """Записывает сессию со сроком жизни ttl."""
+
+    @abstractmethod
+    async def delete(self, token: str):
+        """Удаляет сессию (logout)."""
+
+    @abstractmethod
+    async def sweep(self) -> int:
+        """Удаляет истёкшие сессии, возвращает их количество."""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Сессии в памяти процесса: истечение по TTL и вытеснение давно не
+    использованных записей (LRU) при превышении max_size.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        super().__init__(ttl)
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def get(self, token: str) -> Optional[dict]:
+        item = self._items.get(token)
+        if item is None:
+            return None
+
+        expires_at, data = item
+        if expires_at <= time.time():
+            del self._items[token]
+            return None
+
+        self._items.move_to_end(token)
+        return data
+
+    async def set(self, token: str, data: dict, ttl: Optional[float] = None):
+        self._items[token] = (time.time() + (ttl or self.ttl), data)
+        self._items.move_to_end(token)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def delete(self, token: str):
+        self._items.pop(token, None)
+
+    async def sweep(self) -> int:
+        now = time.time()
+        expired = [t for t, (expires_at, _) in self._items.items() if expires_at <= now]
+        for token in expired:
+            del self._items[token]
+        return len(expired)
+
+
+class PostgresSessionStore(SessionStore):
+    """
+    Общее для всех воркеров хранилище в UNLOGGED-таблице user_sessions:
+    без записи в WAL, содержимое может потеряться при сбое сервера БД,
+    что для сессий допустимо (пользователь просто войдёт заново).
+    """
+
+    def __init__(self, ttl: int, session_factory):
+        super().__init__(ttl)
+        self._session_factory = session_factory
+
+    async def get(self, token: str) -> Optional[dict]:
+        stmt = select(UserSession.data).where(
+            UserSession.token == token, UserSession.expires_at > func.now()
+        )
+        async with self._session_factory() as db:
+            return (await db.execute(stmt)).scalars().first()
+
+    async def set(self, token: str, data: dict):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        stmt = insert(UserSession).values(token=token, data=data, expires_at=expires_at)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserSession.token],
+            set_={"data": stmt.excluded.data, "expires_at": stmt.excluded.expires_at},
+        )
+        async with self._session_factory() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    async def delete(self, token: str):
+        async with self._session_factory() as db:
+            await db.execute(delete(UserSession).where(UserSession.token == token))
+            await db.commit()
+
+    async def sweep(self) -> int:
+        stmt = delete(UserSession).where(UserSession.expires_at <= func.now())
+        async with self._session_factory() as db:
+            result = await db.execute(stmt)
+            await db.commit()
+            return result.rowcount
+
+
+class CachedSessionStore(SessionStore):
+    """
+    Read-through кэш процесса поверх общего хранилища. Запись кэша живёт не
+    дольше cache_ttl и не дольше самой сессии, поэтому logout на другом
+    воркере вступает в силу с задержкой не более cache_ttl.
+    """
+
+    def __init__(self, backend: SessionStore, cache_ttl: int, max_size: int):
+        super().__init__(backend.ttl)
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self._cache = MemorySessionStore(cache_ttl, max_size)
+
+    async def get(self, token: str) -> Optional[dict]:
+        data = await self._cache.get(token)
+        cache_lookup("session", data is not None)
+        if data is not None:
+            return data
+
+        data = await self.backend.get(token)
+        if data is not None:
+            await self._cache.set(token, data, ttl=self._cache_ttl_for(data))
+        return data
+
+    async def set(self, token: str, data: dict):
+        await self.backend.set(token, data)
+        await self._cache.set(token, data, ttl=self._cache_ttl_for(data))
+
+    async def delete(self, token: str):
+        await self._cache.delete(token)
+        await self.backend.delete(token)
+
+    async def sweep(self) -> int:
+        await self._cache.sweep()
+        return await self.backend.sweep()
+
+    def _cache_ttl_for(self, data: dict) -> float:
+        expires_at = data.get("expires_at")
+        if not expires_at:
+            return self.cache_ttl
+        remaining = datetime.fromisoformat(expires_at).timestamp() - time.time()
+        return max(min(self.cache_ttl, remaining), 0.001)
+
+
+def build_session_store() -> SessionStore:
+    ttl = config.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    if config.SESSION_BACKEND == "memory":
+        return MemorySessionStore(ttl, config.SESSION_MAX_SIZE)
+    elif config.SESSION_BACKEND == "postgres":
+        from app.db.session import async_session_factory
+
+        return CachedSessionStore(
+            PostgresSessionStore(ttl, async_session_factory),
+            cache_ttl=config.SESSION_CACHE_TTL,
+            max_size=config.SESSION_MAX_SIZE,
+        )
+    raise ValueError(f"Unknown session backend: {config.SESSION_BACKEND}")
+
+
+session_store = build_session_store()
+
+
+async def sweep_sessions_periodically():
+    """Фоновая очистка истёкших сессий, запускается в lifespan приложения."""
+    while True:
+        await asyncio.sleep(config.SESSION_SWEEP_INTERVAL)
+        try:
+            removed = await session_store.sweep()
+            if removed:
+                logger.info(f"🧹 Removed {removed} expired sessions")
+        except Exception as e:
+            logger.error(f"❌ Session sweep failed: {e}")
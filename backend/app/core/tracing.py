@@ -0,0 +1,285 @@
+import re
+import time
+import logging
+import secrets
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import config
+from app.core.logging_config import add_context_filter, logger
+
+# W3C Trace Context: 00-<trace_id 32 hex>-<span_id 16 hex>-<flags>
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+TRACE_ID_HEADER = b"x-trace-id"
+
+
+@dataclass
+class Span:
+    """
+    Отрезок работы в модели OpenTelemetry: trace_id общий для всей цепочки
+    (HTTP-запрос -> фоновая задача -> запросы к БД), parent_id связывает
+    отрезки в дерево. Время - наносекунды Unix, как в OTLP.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: int = 0
+    end_time: int = 0
+    attributes: Dict[str, object] = field(default_factory=dict)
+    status: str = "OK"
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_time - self.start_time) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        """Представление, близкое к JSON-кодированию OTLP."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.end_time,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class InMemorySpanExporter:
+    """
+    Хранит последние завершённые отрезки в памяти процесса: для проверки
+    трассировки без коллектора и для /api/admin/traces.
+    """
+
+    def __init__(self, max_spans: int):
+        self.spans: deque = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def get_finished_spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        return [s for s in self.spans if trace_id is None or s.trace_id == trace_id]
+
+    def clear(self):
+        self.spans.clear()
+
+
+class LogSpanExporter:
+    def export(self, span: Span):
+        logger.debug(
+            f"🧵 {span.name} {span.duration_ms:.1f} ms "
+            f"[trace {span.trace_id} span {span.span_id}] {span.attributes}"
+        )
+
+
+memory_exporter = InMemorySpanExporter(config.TRACING_BUFFER_SIZE)
+exporters: list = [memory_exporter]
+if config.TRACING_LOG_SPANS:
+    exporters.append(LogSpanExporter())
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# Сборщики отрезков (collect_spans), активные в текущем контексте
+_collectors: ContextVar[Tuple[list, ...]] = ContextVar("span_collectors", default=())
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+class TraceContextFilter(logging.Filter):
+    """Добавляет trace_id текущего отрезка к записям лога (поле JSON)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+
+add_context_filter(TraceContextFilter())
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span_id) из заголовка traceparent или None."""
+    match = TRACEPARENT.match(value or "")
+    if not match or match.group(1) == "0" * 32:
+        return None
+    return match.group(1), match.group(2)
+
+
+def _finish(span: Span):
+    for collector in _collectors.get():
+        collector.append(span)
+    for exporter in exporters:
+        exporter.export(span)
+
+
+def _new_span(name: str, attributes: dict, parent: Optional[Tuple[str, str]]) -> Span:
+    if parent is None:
+        current = _current.get()
+        parent = (current.trace_id, current.span_id) if current else None
+    trace_id, parent_id = parent or (secrets.token_hex(16), None)
+    return Span(
+        name=name,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_id=parent_id,
+        start_time=time.time_ns(),
+        attributes=attributes,
+    )
+
+
+@contextmanager
+def span(name: str, parent: Optional[Tuple[str, str]] = None, **attributes):
+    """
+    Отрезок вокруг блока кода, вложенный в текущий (или в parent из
+    traceparent). Текущий отрезок хранится в ContextVar, поэтому переходит
+    в фоновые задачи и в asyncio.to_thread. При TRACING_ENABLED=false
+    ничего не делает и отдаёт None.
+    """
+    if not config.TRACING_ENABLED:
+        yield None
+        return
+
+    current = _new_span(name, attributes, parent)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "ERROR"
+        current.attributes["exception"] = type(e).__name__
+        raise
+    finally:
+        current.end_time = time.time_ns()
+        _current.reset(token)
+        _finish(current)
+
+
+def record_span(name: str, duration: float, **attributes):
+    """
+    Завершённый отрезок длительностью duration секунд, закончившийся сейчас.
+    Для событий, у которых нет своего блока кода (запросы к БД). Пишется,
+    только если есть текущий отрезок, чтобы не плодить одиночные трассы.
+    """
+    parent = _current.get()
+    if not config.TRACING_ENABLED or parent is None:
+        return
+    end = time.time_ns()
+    _finish(
+        Span(
+            name=name,
+            trace_id=parent.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id,
+            start_time=end - int(duration * 1e9),
+            end_time=end,
+            attributes=attributes,
+        )
+    )
+
+
+@contextmanager
+def collect_spans():
+    """Собирает отрезки, завершённые внутри блока (в том числе в потоках)."""
+    collected: list = []
+    token = _collectors.set(_collectors.get() + (collected,))
+    try:
+        yield collected
+    finally:
+        _collectors.reset(token)
+
+
+def summarize(spans: List[Span]) -> Dict[str, dict]:
+    """Число и суммарная длительность (мс) отрезков по именам."""
+    summary: Dict[str, dict] = {}
+    for item in spans:
+        entry = summary.setdefault(item.name, {"count": 0, "total_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += item.duration_ms
+    for entry in summary.values():
+        entry["total_ms"] = round(entry["total_ms"], 3)
+    return summary
+
+
+def format_summary(summary: Dict[str, dict]) -> str:
+    return ", ".join(
+        f"{name} {entry['total_ms']:.1f} ms"
+        + (f" ({entry['count']}x)" if entry["count"] > 1 else "")
+        for name, entry in summary.items()
+    )
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware: корневой отрезок HTTP-запроса (продолжает входящий
+    traceparent, если он есть). Отрезок закрывается с последним куском
+    тела ответа; фоновые задачи запроса становятся его дочерними
+    отрезками. trace_id возвращается в X-Trace-Id и traceparent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        root = _new_span(
+            f"HTTP {scope['method']}",
+            {"http.method": scope["method"], "http.target": scope["path"]},
+            parent,
+        )
+        token = _current.set(root)
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if not finished:
+                finished = True
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"HTTP {scope['method']} {route.path}"
+                    root.attributes["http.route"] = route.path
+                root.end_time = time.time_ns()
+                _finish(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.status = "ERROR"
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (TRACE_ID_HEADER, root.trace_id.encode()),
+                    (b"traceparent", root.traceparent.encode()),
+                ]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            root.status = "ERROR"
+            raise
+        finally:
+            finish()
+            _current.reset(token)
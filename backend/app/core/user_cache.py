@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import config
+from app.core.metrics import cache_lookup
+from app.models.user import User
+
+USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+
+class UserCache:
+    """
+    Короткоживущий кэш пользователей для get_current_user, ключ - user_id.
+    Хранятся только значения колонок: на каждый запрос отдаётся новый
+    объект User, не привязанный ни к одной сессии БД.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[User]:
+        item = self._items.get(user_id)
+        if item is None:
+            cache_lookup("user", False)
+            return None
+
+        expires_at, values = item
+        if expires_at <= time.time():
+            del self._items[user_id]
+            cache_lookup("user", False)
+            return None
+
+        self._items.move_to_end(user_id)
+        cache_lookup("user", True)
+        return User(**values)
+
+    def set(self, user: User):
+        if self.ttl <= 0:
+            return
+        values = {key: getattr(user, key) for key in USER_COLUMNS}
+        self._items[str(user.id)] = (time.time() + self.ttl, values)
+        self._items.move_to_end(str(user.id))
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def invalidate(self, user_id):
+        self._items.pop(str(user_id), None)
+
+    def clear(self):
+        self._items.clear()
+
+
+user_cache = UserCache(config.USER_CACHE_TTL, config.USER_CACHE_MAX_SIZE)
@@ -1,16 +1,24 @@
+import json
+import base64
 from uuid import UUID
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import desc
+from sqlalchemy import desc, tuple_
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import job_events, tracing
 from app.core.logging_config import logger
-from app.models.crypto_data import Cryptocurrency
+from app.models.crypto_data import Cryptocurrency, CryptocurrencyData
 from app.models.portfolio import Portfolio, PortfolioAsset
 from app.models.simulation import SimulationJob, SimulationResult
-from app.schemas.dashboard import PortfolioCreate, SimulationCreate
+from app.schemas.dashboard import (
+    BatchForecastCreate,
+    PortfolioCreate,
+    SimulationCreate,
+)
 
 
 async def create_portfolio(
@@ -58,10 +66,23 @@ async def get_portfolio_by_id(
 
 
 async def create_simulation_job(
-    db: AsyncSession, user_id: UUID, sim_in: SimulationCreate
+    db: AsyncSession,
+    user_id: UUID,
+    sim_in: Union[SimulationCreate, BatchForecastCreate],
 ) -> SimulationJob:
+    if isinstance(sim_in, SimulationCreate):
+        crypto_id, model_type = sim_in.crypto_id, sim_in.model_type
+    else:
+        crypto_id, model_type = None, "BATCH"
+
     db_job = SimulationJob(
-        user_id=user_id, portfolio_id=sim_in.portfolio_id, status="pending"
+        user_id=user_id,
+        portfolio_id=sim_in.portfolio_id,
+        crypto_id=crypto_id,
+        model_type=model_type,
+        status="pending",
+        # Связывает задачу с трассой породившего её HTTP-запроса
+        trace_id=tracing.current_trace_id(),
     )
     db.add(db_job)
     await db.commit()
@@ -72,16 +93,107 @@ async def create_simulation_job(
     return db_job
 
 
-async def get_user_simulations(db: AsyncSession, user_id: UUID) -> List[SimulationJob]:
+def encode_cursor(job: SimulationJob) -> str:
+    raw = f"{job.created_at.isoformat()}|{job.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Разбирает курсор пагинации, при некорректном значении - ValueError."""
+    try:
+        created_at, job_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(job_id)
+    except Exception as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def _user_simulations_query(
+    user_id: UUID,
+    status: Optional[str] = None,
+    crypto_id: Optional[int] = None,
+    model_type: Optional[str] = None,
+):
+    query = select(SimulationJob).where(SimulationJob.user_id == user_id)
+    if status:
+        query = query.where(SimulationJob.status == status)
+    if crypto_id is not None:
+        query = query.where(SimulationJob.crypto_id == crypto_id)
+    if model_type:
+        query = query.where(SimulationJob.model_type == model_type)
+    return query
+
+
+async def get_user_simulations(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    crypto_id: Optional[int] = None,
+    model_type: Optional[str] = None,
+    summary: bool = False,
+) -> Tuple[List[SimulationJob], Optional[str]]:
+    """
+    Страница истории симуляций, от новых к старым. Keyset-пагинация по
+    (created_at, id): курсор - последняя строка предыдущей страницы.
+    В режиме summary результаты не загружаются.
+    """
+    query = _user_simulations_query(user_id, status, crypto_id, model_type)
+    if cursor:
+        created_at, job_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(SimulationJob.created_at, SimulationJob.id) < (created_at, job_id)
+        )
+
+    query = query.order_by(
+        desc(SimulationJob.created_at), desc(SimulationJob.id)
+    ).limit(limit + 1)
+    if summary:
+        query = query.options(noload(SimulationJob.result))
+    else:
+        query = query.options(selectinload(SimulationJob.result))
+
+    jobs = list((await db.execute(query)).scalars().all())
+    next_cursor = encode_cursor(jobs[limit - 1]) if len(jobs) > limit else None
+    return jobs[:limit], next_cursor
+
+
+async def estimate_user_simulations_count(
+    db: AsyncSession,
+    user_id: UUID,
+    status: Optional[str] = None,
+    crypto_id: Optional[int] = None,
+    model_type: Optional[str] = None,
+) -> int:
+    """
+    Оценка числа задач по статистике планировщика (EXPLAIN) вместо COUNT(*),
+    которому пришлось бы обойти всю историю пользователя.
+    """
+    query = _user_simulations_query(user_id, status, crypto_id, model_type)
+    # Значения фильтров уходят параметрами драйвера, а не текстом запроса
+    connection = await db.connection()
+    compiled = query.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", params
+    )
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def get_user_simulation(
+    db: AsyncSession, user_id: UUID, job_id: UUID
+) -> Optional[SimulationJob]:
     query = (
         select(SimulationJob)
-        .where(SimulationJob.user_id == user_id)
-        .order_by(desc(SimulationJob.created_at))
+        .where(SimulationJob.id == job_id, SimulationJob.user_id == user_id)
         .options(selectinload(SimulationJob.result))
     )
 
     result = await db.execute(query)
-    return result.scalars().all()
+    return result.scalars().first()
 
 
 # async def update_simulation_status(db: AsyncSession, job_id: UUID, status: str):
@@ -104,13 +216,16 @@ async def update_simulation_status(
     status: str,
     results: Optional[dict] = None,
     model_id: Optional[UUID] = None,
-):
+    timings: Optional[dict] = None,
+) -> Optional[SimulationJob]:
     query = select(SimulationJob).where(SimulationJob.id == job_id)
     result_exec = await db.execute(query)
     job = result_exec.scalars().first()
 
     if job:
         job.status = status
+        if timings is not None:
+            job.timings = timings
         if status == "completed":
             from datetime import datetime
 
@@ -118,13 +233,57 @@ async def update_simulation_status(
 
             if results and model_id:
                 db_result = SimulationResult(
-                    job_id=job_id, results=results, model_id=model_id
+                    job_id=job_id,
+                    job_created_at=job.created_at,
+                    results=results,
+                    model_id=model_id,
                 )
                 db.add(db_result)
 
+        # Уходит подписчикам /simulations/events вместе с COMMIT
+        await job_events.notify(db, job_event(job))
         await db.commit()
+    return job
+
+
+def job_event(job: SimulationJob) -> dict:
+    return {
+        "job_id": str(job.id),
+        "user_id": str(job.user_id),
+        "status": job.status,
+        "model_type": job.model_type,
+        "crypto_id": job.crypto_id,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "result_url": f"/api/dashboard/simulations/{job.id}",
+    }
+
+
+async def get_active_simulations(
+    db: AsyncSession, user_id: UUID
+) -> List[SimulationJob]:
+    """Незавершённые задачи пользователя: снимок для нового потока событий."""
+    query = (
+        _user_simulations_query(user_id)
+        .where(SimulationJob.status.in_(("pending", "running")))
+        .order_by(desc(SimulationJob.created_at))
+        .options(noload(SimulationJob.result))
+    )
+    return list((await db.execute(query)).scalars().all())
 
 
 async def get_all_cryptos(db: AsyncSession) -> List[Cryptocurrency]:
     result = await db.execute(select(Cryptocurrency).order_by(Cryptocurrency.id))
     return result.scalars().all()
+
+
+async def get_last_prices(db: AsyncSession, crypto_ids: List[int]) -> Dict[int, float]:
+    """Последние цены сразу для нескольких монет одним запросом (DISTINCT ON)."""
+    query = (
+        select(CryptocurrencyData.crypto_id, CryptocurrencyData.price_usd)
+        .where(CryptocurrencyData.crypto_id.in_(crypto_ids))
+        .order_by(CryptocurrencyData.crypto_id, desc(CryptocurrencyData.timestamp))
+        .distinct(CryptocurrencyData.crypto_id)
+    )
+
+    result = await db.execute(query)
+    return {row.crypto_id: float(row.price_usd) for row in result.all()}
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User, UserProfile, Role, UserRole
 from app.core.logging_config import logger
+from app.core.user_cache import user_cache
 from app.schemas.user import (
     UserCreate,
     UserUpdate,
@@ -75,6 +76,7 @@ async def update_user(
 
     await db.commit()
     await db.refresh(db_user)
+    user_cache.invalidate(user_id)
 
     logger.info(f"User ID {user_id} updated successfully")
 
@@ -139,6 +141,7 @@ async def update_user_profile(
     try:
         await db.commit()
         await db.refresh(profile)
+        user_cache.invalidate(user_id)
         return profile
     except Exception as e:
         await db.rollback()
@@ -171,6 +174,7 @@ async def update_user_password(
     user.password_hash = hashed_password
 
     await db.commit()
+    user_cache.invalidate(user_id)
 
 
 async def assign_role_to_user(db: AsyncSession, user_id: str, role_id: int) -> bool:
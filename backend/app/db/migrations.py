@@ -0,0 +1,117 @@
+import subprocess
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import config
+from app.core.logging_config import logger
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+ALEMBIC_INI = BACKEND_DIR / "alembic.ini"
+
+# Ключ pg_advisory_lock: миграции применяет только одна реплика
+MIGRATION_LOCK_ID = 0x5E7E_0040
+
+
+def _alembic_config():
+    # alembic импортируется только при старте, а не в каждом процессе с app.db
+    from alembic.config import Config
+
+    return Config(str(ALEMBIC_INI))
+
+
+def head_revisions() -> set:
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(_alembic_config()).get_heads())
+
+
+def _current_revisions(connection) -> set:
+    from alembic.runtime.migration import MigrationContext
+
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def _upgrade(connection):
+    from alembic import command
+
+    alembic_config = _alembic_config()
+    # env.py использует переданное соединение вместо своего движка
+    alembic_config.attributes["connection"] = connection
+    command.upgrade(alembic_config, "head")
+
+
+async def migrate_if_needed() -> bool:
+    """
+    Сверяет ревизию БД с head в процессе, без запуска alembic. Если схема
+    отстаёт, миграции применяются под pg_advisory_lock: остальные реплики
+    ждут блокировку и после неё видят, что схема уже обновлена.
+    Возвращает True, если миграции применялись.
+    """
+    heads = head_revisions()
+    engine = create_async_engine(config.postgres_url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            if await conn.run_sync(_current_revisions) == heads:
+                logger.info("✅ Database schema is at head, skipping migrations.")
+                return False
+
+            await conn.execute(
+                text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+            await conn.commit()
+            try:
+                if await conn.run_sync(_current_revisions) == heads:
+                    logger.info("✅ Migrations were applied by another replica.")
+                    return False
+
+                logger.info("🔄 Applying Alembic migrations in-process...")
+                await conn.run_sync(_upgrade)
+                await conn.commit()
+                logger.info("✅ Migrations applied successfully.")
+                return True
+            finally:
+                # После ошибки миграции транзакция прервана, снимаем её до unlock
+                await conn.rollback()
+                await conn.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+                )
+                await conn.commit()
+    finally:
+        await engine.dispose()
+
+
+def run_migrations_subprocess():
+    """
+    Запускает миграции Alembic синхронно.
+    Это гарантирует, что таблицы существуют ДО того, как приложение начнет работу.
+    """
+    logger.info("🔄 Running Alembic migrations via subprocess...")
+    try:
+        subprocess.run(["alembic", "upgrade", "head"], check=True, cwd=BACKEND_DIR)
+        logger.info("✅ Migrations applied successfully.")
+    except subprocess.CalledProcessError as e:
+        logger.error(f"❌ Migration failed (Process Error): {e}")
+    except FileNotFoundError:
+        logger.error("❌ Alembic command not found. Make sure alembic is installed.")
+    except Exception as e:
+        logger.error(f"❌ Migration failed (Unknown): {e}")
+
+
+async def run_startup_migrations():
+    """Миграции при старте приложения согласно STARTUP_MIGRATIONS."""
+    if config.STARTUP_MIGRATIONS == "auto":
+        try:
+            await migrate_if_needed()
+        except Exception as e:
+            logger.error(f"❌ Migration failed: {e}")
+    elif config.STARTUP_MIGRATIONS == "subprocess":
+        run_migrations_subprocess()
+    elif config.STARTUP_MIGRATIONS == "off":
+        logger.info("⏭️ Startup migrations are disabled.")
+    else:
+        raise ValueError(
+            f"Unknown startup migrations mode: {config.STARTUP_MIGRATIONS}"
+        )
@@ -0,0 +1,81 @@
+from datetime import date, datetime, timezone
+from typing import List, Tuple
+
+# Таблица -> колонка ключа секционирования. Результаты секционированы так же,
+# как задачи, чтобы месяц можно было удалить целиком в обеих таблицах.
+PARTITIONED_TABLES = {
+    "simulation_jobs": "created_at",
+    "simulation_results": "job_created_at",
+}
+# Порядок удаления: сначала ссылающаяся таблица
+DROP_ORDER = ("simulation_results", "simulation_jobs")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(first: date, last: date) -> List[date]:
+    """Первые числа месяцев от first до last включительно."""
+    months, month = [], month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def month_bounds(month: date) -> Tuple[datetime, datetime]:
+    """Границы секции месяца [начало, начало следующего) в UTC."""
+    upper = add_months(month, 1)
+    return (
+        datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+        datetime(upper.year, upper.month, 1, tzinfo=timezone.utc),
+    )
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def parse_partition_month(table: str, name: str):
+    """Месяц секции по её имени или None, если имя не по схеме partition_name."""
+    prefix = f"{table}_p"
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name[len(prefix) :], "%Y_%m").date()
+    except ValueError:
+        return None
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    # Границы в UTC, чтобы не зависеть от timezone сессии
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} "
+        f"PARTITION OF {table} FOR VALUES "
+        f"FROM ('{month.isoformat()} 00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00+00')"
+    )
+
+
+def drop_partition_sql(table: str, month: date) -> List[str]:
+    name = partition_name(table, month)
+    return [
+        f"ALTER TABLE {table} DETACH PARTITION {name}",
+        f"DROP TABLE {name}",
+    ]
+
+
+LIST_PARTITIONS_SQL = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = :table
+    ORDER BY child.relname
+"""
@@ -0,0 +1,102 @@
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core import metrics
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+pool_stats: Dict[str, PoolStats] = {}
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Очередь соединений, замеряющая время ожидания соединения (включая
+    создание нового и pre-ping). Статистика хранится по имени пула, поэтому
+    переживает пересоздание пула через recreate().
+    """
+
+    def connect(self):
+        stats = pool_stats.setdefault(self.logging_name, PoolStats())
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            raise
+        finally:
+            stats.record(time.perf_counter() - started)
+
+
+def pool_status(engine) -> dict:
+    """Снимок состояния пула: занятость и накопленная статистика ожидания."""
+    pool = engine.pool
+    stats = pool_stats.get(pool.logging_name, PoolStats())
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    return {
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "avg_wait_ms": round(stats.total_wait / stats.checkouts * 1000, 3)
+        if stats.checkouts
+        else 0.0,
+        "max_wait_ms": round(stats.max_wait * 1000, 3),
+    }
+
+
+def register_pool_metrics(engines: Dict[str, object]):
+    """Метрики пулов для /metrics, снимаются с pool_status при сборе."""
+    engines = {name: e for name, e in engines.items() if e is not None}
+
+    def collect(key: str):
+        def callback():
+            return {(name,): pool_status(e)[key] for name, e in engines.items()}
+
+        return callback
+
+    for name, key, documentation in (
+        ("db_pool_size", "size", "Configured pool size"),
+        ("db_pool_checked_out", "checked_out", "Connections in use"),
+        ("db_pool_overflow", "overflow", "Connections open above pool size"),
+        ("db_pool_saturation", "saturation", "Checked out / (size + max overflow)"),
+    ):
+        metrics.registry.register(
+            metrics.Gauge(name, documentation, ("pool",), callback=collect(key))
+        )
+    for name, key, documentation in (
+        ("db_pool_checkouts_total", "checkouts", "Connection checkouts"),
+        ("db_pool_timeouts_total", "timeouts", "Checkouts that timed out"),
+    ):
+        metrics.registry.register(
+            metrics.Counter(name, documentation, ("pool",), callback=collect(key))
+        )
+    metrics.registry.register(
+        metrics.Counter(
+            "db_pool_wait_seconds_total",
+            "Total time spent waiting for a connection",
+            ("pool",),
+            callback=lambda: {
+                (name,): pool_stats.get(e.pool.logging_name, PoolStats()).total_wait
+                for name, e in engines.items()
+            },
+        )
+    )
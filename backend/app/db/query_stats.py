@@ -0,0 +1,256 @@
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+
+from app.core import metrics, tracing
+from app.core.config import config
+from app.core.logging_config import logger
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):(?!:)\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Нормализованный текст запроса: литералы и параметры заменены на ?,
+    списки IN (...) и многострочные VALUES свёрнуты, пробелы схлопнуты.
+    Запросы, отличающиеся только значениями, получают один отпечаток.
+    """
+    text = _STRING.sub("?", statement)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("(...)", text)
+    text = _VALUES_ROWS.sub(r"\1, ...", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Типы параметров без значений: в лог не попадают пароли и данные."""
+
+    def shape(value) -> str:
+        if isinstance(value, dict):
+            return "{" + ", ".join(f"{k}: {shape(v)}" for k, v in value.items()) + "}"
+        if isinstance(value, (list, tuple)):
+            if len(value) > 5:
+                return f"{type(value).__name__}[{len(value)}]"
+            return "(" + ", ".join(shape(v) for v in value) + ")"
+        return type(value).__name__
+
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = shape(parameters[0]) if parameters else "()"
+        return f"{len(parameters)} x {first}"
+    return shape(parameters)
+
+
+@dataclass
+class StatementStats:
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def as_dict(self, statement: str) -> dict:
+        return {
+            "statement": statement,
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.calls * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+@dataclass
+class QueryCollector:
+    """Запросы, выполненные в рамках одного HTTP-запроса или блока кода."""
+
+    count: int = 0
+    total: float = 0.0
+    statements: List[str] = field(default_factory=list)
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        self.statements.append(statement)
+
+
+class QueryStats:
+    """
+    Накопленная статистика процесса: по отпечаткам запросов и по маршрутам.
+    Число отпечатков ограничено QUERY_STATS_MAX_STATEMENTS, новые сверх
+    лимита не учитываются.
+    """
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self.statements: Dict[str, StatementStats] = {}
+        self.routes: Dict[str, List[int]] = {}
+
+    def record(self, statement: str, elapsed: float):
+        stats = self.statements.get(statement)
+        if stats is None:
+            if len(self.statements) >= self.max_statements:
+                return
+            stats = self.statements[statement] = StatementStats()
+        stats.calls += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+
+    def record_request(self, route: str, count: int):
+        # [запросов, всего обращений к БД, максимум за запрос]
+        entry = self.routes.setdefault(route, [0, 0, 0])
+        entry[0] += 1
+        entry[1] += count
+        entry[2] = max(entry[2], count)
+
+    def top(self, limit: int) -> List[dict]:
+        items = sorted(self.statements.items(), key=lambda item: -item[1].total)
+        return [stats.as_dict(statement) for statement, stats in items[:limit]]
+
+    def route_summary(self) -> List[dict]:
+        return [
+            {
+                "route": route,
+                "requests": requests,
+                "mean_queries": round(total / requests, 2),
+                "max_queries": max_queries,
+            }
+            for route, (requests, total, max_queries) in sorted(
+                self.routes.items(), key=lambda item: -item[1][2]
+            )
+        ]
+
+    def reset(self):
+        self.statements.clear()
+        self.routes.clear()
+
+
+query_stats = QueryStats(config.QUERY_STATS_MAX_STATEMENTS)
+_collectors: ContextVar[Tuple[QueryCollector, ...]] = ContextVar(
+    "query_collectors", default=()
+)
+
+QUERIES_PER_REQUEST = metrics.registry.register(
+    metrics.Histogram(
+        "db_queries_per_request",
+        "Database statements issued before the response started",
+        ("route",),
+        buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+    )
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    normalized = fingerprint(statement)
+    tracing.record_span("db.query", elapsed, **{"db.statement": normalized})
+    if not config.QUERY_STATS_ENABLED:
+        return
+    query_stats.record(normalized, elapsed)
+    for collector in _collectors.get():
+        collector.record(normalized, elapsed)
+
+    if elapsed * 1000 >= config.SLOW_QUERY_MS:
+        logger.warning(
+            f"🐢 Slow query {elapsed * 1000:.1f} ms: {normalized} | "
+            f"params: {parameter_shape(parameters, executemany)}"
+        )
+
+
+def _handle_error(exception_context):
+    # Запрос упал: снимаем его отметку времени, чтобы стек не рос
+    started = exception_context.connection and exception_context.connection.info.get(
+        "query_started"
+    )
+    if started:
+        started.pop()
+
+
+def instrument_engine(engine):
+    """Подключает учёт и трассировку запросов к движку (AsyncEngine или Engine)."""
+    if engine is None or not (config.QUERY_STATS_ENABLED or config.TRACING_ENABLED):
+        return
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def collect_queries():
+    """Считает запросы, выполненные внутри блока (в том числе из ASGI-приложения)."""
+    collector = QueryCollector()
+    token = _collectors.set(_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Хелпер для тестов: падает, если внутри блока выполнено больше limit
+    запросов. Помогает ловить N+1 при изменении эндпоинтов:
+
+        with assert_max_queries(3):
+            await client.get("/api/dashboard/simulations")
+    """
+    with collect_queries() as collector:
+        yield collector
+    if collector.count > limit:
+        listing = "\n".join(f"  {s}" for s in collector.statements)
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {collector.count}:\n{listing}"
+        )
+
+
+class QueryCountMiddleware:
+    """
+    ASGI-middleware: число запросов к БД на HTTP-запрос. Значение фиксируется
+    в момент начала ответа (фоновые задачи после ответа не учитываются),
+    отдаётся в заголовке X-Query-Count и попадает в статистику маршрута.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_queries() as collector:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    route = scope.get("route")
+                    route = getattr(route, "path", "unmatched")
+                    count = collector.count
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"x-query-count", str(count).encode()),
+                    ]
+                    query_stats.record_request(route, count)
+                    QUERIES_PER_REQUEST.observe(count, route)
+                    if count > config.QUERY_COUNT_WARN:
+                        logger.warning(
+                            f"🔁 {scope['method']} {route} issued {count} queries "
+                            f"({collector.total * 1000:.1f} ms)"
+                        )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -1,12 +1,58 @@
+import time
+import orjson
 from typing import AsyncGenerator
+from fastapi import Request
 from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 from app.core.config import config
 from app.core.logging_config import logger
+from app.core.serialization import dumps_str
+from app.db.pool import InstrumentedQueuePool, register_pool_metrics
+from app.db.query_stats import instrument_engine
 from app.models.crypto_data import Cryptocurrency
 
-engine = create_async_engine(config.postgres_url, echo=True)
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def _create_engine(url: str, name: str, pool_size: int, max_overflow: int):
+    return create_async_engine(
+        url,
+        echo=config.DB_ECHO,
+        # JSONB-результаты пишутся через orjson, массивы numpy - без .tolist()
+        json_serializer=dumps_str,
+        json_deserializer=orjson.loads,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": config.DB_STATEMENT_CACHE_SIZE},
+    )
+
+
+# Отдельные пулы: фоновые задачи не могут занять соединения обработчиков API
+engine = _create_engine(
+    config.postgres_url, "api", config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW
+)
+jobs_engine = _create_engine(
+    config.postgres_url, "jobs", config.DB_JOBS_POOL_SIZE, config.DB_JOBS_MAX_OVERFLOW
+)
+replica_engine = (
+    _create_engine(
+        config.replica_url, "replica", config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW
+    )
+    if config.replica_url
+    else None
+)
+
+register_pool_metrics({"api": engine, "jobs": jobs_engine, "replica": replica_engine})
+for _engine in (engine, jobs_engine, replica_engine):
+    instrument_engine(_engine)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -18,6 +64,29 @@ AsyncSessionLocal = async_sessionmaker(
 
 async_session_factory = AsyncSessionLocal
 
+jobs_session_factory = async_sessionmaker(
+    bind=jobs_engine,
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+ReplicaSessionLocal = (
+    async_sessionmaker(
+        bind=replica_engine,
+        class_=AsyncSession,
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    if replica_engine
+    else None
+)
+
+_replica_down_until = 0.0
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -28,6 +97,40 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+def _reads_from_primary(request: Request) -> bool:
+    if ReplicaSessionLocal is None or time.time() < _replica_down_until:
+        return True
+    # Окно read-your-writes: после собственной записи пользователь читает с primary
+    until = request.cookies.get(READ_PRIMARY_COOKIE)
+    try:
+        return until is not None and time.time() < float(until)
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Сессия для read-only эндпоинтов: реплика, если она настроена и доступна,
+    иначе primary. После ошибки подключения реплика пропускается
+    REPLICA_RETRY_SECONDS секунд.
+    """
+    global _replica_down_until
+
+    if not _reads_from_primary(request):
+        async with ReplicaSessionLocal() as session:
+            try:
+                await session.connection()
+            except (OSError, DBAPIError, TimeoutError) as e:
+                _replica_down_until = time.time() + config.REPLICA_RETRY_SECONDS
+                logger.warning(f"⚠️ Read replica unavailable, using primary: {e}")
+            else:
+                yield session
+                return
+
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 async def init_db_data():
     async with async_session_factory() as db:
         try:
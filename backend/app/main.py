@@ -1,16 +1,37 @@
+import time
+import asyncio
 import uvicorn
-import subprocess
 from pathlib import Path
-from contextlib import asynccontextmanager
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager, contextmanager
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
 from fastapi import FastAPI, Request
 
-from app.db.session import init_db_data
+from app.core.config import config
+from app.core import job_events, metrics
+from app.core.compression import CompressionMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.serialization import ORJSONResponse
+from app.db.migrations import run_startup_migrations
+from app.db.query_stats import QueryCountMiddleware
+from app.db.session import (
+    READ_PRIMARY_COOKIE,
+    ReplicaSessionLocal,
+    init_db_data,
+    jobs_session_factory,
+)
 from app.core.logging_config import logger
+from app.core.rate_limit import sweep_rate_limits_periodically
+from app.core.sessions import sweep_sessions_periodically
 from app.services.model_loader import reload_models_in_db
-from app.api.endpoints import auth, users, health, dashboard
+from app.services.retention import (
+    create_partitions,
+    partitions_periodically,
+    retention_periodically,
+)
+from app.api.endpoints import auth, users, health, dashboard, admin
 
 
 CURRENT_FILE = Path(__file__).resolve()
@@ -22,30 +43,47 @@ TEMPLATES_DIR = APP_DIR / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
 
-def run_migrations():
-    """
-    Запускает миграции Alembic синхронно.
-    Это гарантирует, что таблицы существуют ДО того, как приложение начнет работу.
-    """
-    logger.info("🔄 Running Alembic migrations via subprocess...")
+@contextmanager
+def timed_step(timings: dict, name: str):
+    started = time.perf_counter()
     try:
-        subprocess.run(["alembic", "upgrade", "head"], check=True)
-        logger.info("✅ Migrations applied successfully.")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ Migration failed (Process Error): {e}")
-    except FileNotFoundError:
-        logger.error("❌ Alembic command not found. Make sure alembic is installed.")
-    except Exception as e:
-        logger.error(f"❌ Migration failed (Unknown): {e}")
+        yield
+    finally:
+        timings[name] = time.perf_counter() - started
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Application startup...")
-    run_migrations()
-    await init_db_data()
-    await reload_models_in_db()
+    timings = {}
+    started = time.perf_counter()
+    with timed_step(timings, "migrations"):
+        await run_startup_migrations()
+    with timed_step(timings, "partitions"):
+        await create_partitions(jobs_session_factory)
+    with timed_step(timings, "init_db"):
+        await init_db_data()
+    with timed_step(timings, "models"):
+        await reload_models_in_db()
+    logger.info(
+        f"⏱️ Startup finished in {time.perf_counter() - started:.2f}s ("
+        + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+        + ")"
+    )
+    tasks = [asyncio.create_task(sweep_sessions_periodically())]
+    if config.RATE_LIMIT_ENABLED:
+        tasks.append(asyncio.create_task(sweep_rate_limits_periodically()))
+    if config.METRICS_ENABLED:
+        tasks.append(asyncio.create_task(metrics.measure_event_loop_lag()))
+    if config.JOB_EVENTS_ENABLED:
+        tasks.append(asyncio.create_task(job_events.listen_for_job_events()))
+    if config.RETENTION_INTERVAL_HOURS > 0:
+        tasks.append(asyncio.create_task(retention_periodically(jobs_session_factory)))
+    else:
+        tasks.append(asyncio.create_task(partitions_periodically(jobs_session_factory)))
     yield
+    for task in tasks:
+        task.cancel()
     logger.info("Application shutdown...")
 
 
@@ -54,12 +92,67 @@ app = FastAPI(
     description="Базовый запуск для проверки БД и создания миграций.",
     version="0.0.1",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    gzip_level=config.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+)
+
+if config.METRICS_ENABLED:
+    # Поверх сжатия: время ответа включает и его
+    app.add_middleware(metrics.MetricsMiddleware)
+
+if config.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryCountMiddleware)
+
+if config.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if config.TRACING_ENABLED:
+    # Снаружи сжатия, метрик и профилирования: отрезок охватывает их работу
+    app.add_middleware(TracingMiddleware)
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """
+    После успешного изменяющего запроса ставит cookie, по которой чтения
+    этого клиента несколько секунд идут на primary, а не на реплику.
+    """
+    response = await call_next(request)
+    window = config.READ_YOUR_WRITES_SECONDS
+    if (
+        ReplicaSessionLocal is not None
+        and window > 0
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + window),
+            max_age=window,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"])
 app.include_router(health.router, prefix="/api", tags=["Health Check"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not config.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/", response_class=HTMLResponse, include_in_schema=False)
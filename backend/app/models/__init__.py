@@ -4,4 +4,6 @@ from app.models import (
     crypto_data,  # F401 # noqa: F401
     portfolio,  # F401 # noqa: F401
     simulation,  # F401 # noqa: F401
+    session,  # F401 # noqa: F401
+    rate_limit,  # F401 # noqa: F401
 )
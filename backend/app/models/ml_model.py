@@ -2,15 +2,28 @@ from app.db.base import Base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+    Integer,
+    ForeignKey,
+    UniqueConstraint,
+)
 
 
 class TrainedModel(Base):
     __tablename__ = "trained_models"
+    __table_args__ = (
+        # Одна запись на монету и тип модели: ключ upsert при загрузке моделей
+        UniqueConstraint(
+            "crypto_id", "model_type", name="uq_trained_models_crypto_model_type"
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=func.uuid_generate_v4())
     crypto_id = Column(Integer, ForeignKey("cryptocurrencies.id"), nullable=False)
-    model_type = Column(String, nullable=False)  # GARCH, ARIMA
+    model_type = Column(String, nullable=False)  # GARCH, ARIMA, EWMA, HAR
     parameters = Column(JSONB)
 
     trained_at = Column(
@@ -0,0 +1,14 @@
+from app.db.base import Base
+from sqlalchemy import Column, String, Float, DateTime, Index
+
+
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = (
+        Index("ix_rate_limit_buckets_updated_at", "updated_at"),
+        {"prefixes": ["UNLOGGED"]},
+    )
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
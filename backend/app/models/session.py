@@ -0,0 +1,15 @@
+from app.db.base import Base
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, String, DateTime, Index
+
+
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+    __table_args__ = (
+        Index("ix_user_sessions_expires_at", "expires_at"),
+        {"prefixes": ["UNLOGGED"]},
+    )
+
+    token = Column(String, primary_key=True)
+    data = Column(JSONB, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -2,22 +2,50 @@ from app.db.base import Base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    LargeBinary,
+)
+
+from app.core import result_codec
+from app.core.config import config
 
 
 class SimulationJob(Base):
     __tablename__ = "simulation_jobs"
+    __table_args__ = (
+        # Keyset-пагинация истории пользователя по (created_at, id)
+        Index("ix_simulation_jobs_user_created", "user_id", "created_at", "id"),
+        # Помесячные секции, см. app.db.partitions и services.retention
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=func.uuid_generate_v4())
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     portfolio_id = Column(UUID(as_uuid=True), ForeignKey("portfolios.id"))
+    crypto_id = Column(Integer, ForeignKey("cryptocurrencies.id"))
+    model_type = Column(String)  # GARCH, ARIMA, EWMA, HAR, BATCH
     status = Column(
         String, nullable=False, default="pending"
     )  # pending, running, completed, failed
+    # Ключ секционирования входит в первичный ключ
     created_at = Column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        nullable=False,
     )
     completed_at = Column(DateTime(timezone=True))
+    # trace_id запроса, создавшего задачу, и длительности её этапов
+    # {имя отрезка: {"count", "total_ms"}}, см. app.core.tracing
+    trace_id = Column(String(32))
+    timings = Column(JSONB)
 
     user = relationship("User", back_populates="simulation_jobs")
     portfolio = relationship("Portfolio", back_populates="simulation_jobs")
@@ -31,14 +59,37 @@ class SimulationJob(Base):
 
 class SimulationResult(Base):
     __tablename__ = "simulation_results"
-
-    job_id = Column(
-        UUID(as_uuid=True), ForeignKey("simulation_jobs.id"), primary_key=True
-    )
-    results = Column(JSONB, nullable=False)  # Распределение цен, VaR и т.д.
-    model_id = Column(
-        UUID(as_uuid=True), ForeignKey("trained_models.id"), nullable=False
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["job_id", "job_created_at"],
+            ["simulation_jobs.id", "simulation_jobs.created_at"],
+            ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (job_created_at)"},
     )
 
+    job_id = Column(UUID(as_uuid=True), primary_key=True)
+    # Копия created_at задачи: результат лежит в секции того же месяца
+    job_created_at = Column(DateTime(timezone=True), primary_key=True)
+    # JSON-заголовок результата; числовые массивы лежат в arrays (bytea)
+    header = Column("results", JSONB, nullable=False)
+    arrays = Column(LargeBinary)
+    # Пусто у пакетных задач: идентификаторы моделей лежат в results
+    model_id = Column(UUID(as_uuid=True), ForeignKey("trained_models.id"))
+
     job = relationship("SimulationJob", back_populates="result")
     model = relationship("TrainedModel")
+
+    @property
+    def results(self) -> dict:
+        """Распределение цен, VaR и т.д. - полный результат с массивами numpy."""
+        return result_codec.decode(self.header, self.arrays)
+
+    @results.setter
+    def results(self, payload: dict):
+        if config.RESULT_STORAGE == "binary":
+            self.header, self.arrays = result_codec.encode(
+                payload, config.RESULT_FLOAT_DTYPE
+            )
+        else:
+            self.header, self.arrays = payload, None
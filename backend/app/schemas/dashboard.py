@@ -1,4 +1,4 @@
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel, Field, UUID4
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from decimal import Decimal
@@ -43,6 +43,18 @@ class SimulationCreate(BaseModel):
     parameters: Dict[str, Any] = {}
 
 
+class BatchForecastItem(BaseModel):
+    crypto_id: int
+    model_type: str = "GARCH"
+    horizon: Optional[int] = Field(None, ge=1, le=365)
+
+
+class BatchForecastCreate(BaseModel):
+    portfolio_id: Optional[UUID4] = None
+    items: List[BatchForecastItem] = []  # пусто - все активные модели
+    horizon: int = Field(30, ge=1, le=365)
+
+
 class SimulationResultOut(BaseModel):
     results: Dict[str, Any]
 
@@ -53,8 +65,12 @@ class SimulationResultOut(BaseModel):
 class SimulationJobOut(BaseModel):
     id: UUID4
     status: str
+    crypto_id: Optional[int] = None
+    model_type: Optional[str] = None
     created_at: datetime
     completed_at: Optional[datetime] = None
+    trace_id: Optional[str] = None
+    timings: Optional[Dict[str, Dict[str, float]]] = None
 
     result: Optional[SimulationResultOut] = None
 
@@ -62,10 +78,37 @@ class SimulationJobOut(BaseModel):
         from_attributes = True
 
 
+class SimulationPage(BaseModel):
+    items: List[SimulationJobOut]
+    next_cursor: Optional[str] = None
+    total_estimate: int
+
+
 class CryptoOut(BaseModel):
     id: int
     symbol: str
     name: str
+    description: Optional[str] = None
 
     class Config:
         from_attributes = True
+
+
+class PortfolioRiskAsset(BaseModel):
+    crypto_id: int
+    symbol: str
+    amount: Decimal
+    value_usd: float
+    weight: float
+    risk_contribution: float
+
+
+class PortfolioRiskOut(BaseModel):
+    portfolio_id: UUID4
+    method: str
+    horizons: List[int]
+    volatility: List[float]
+    value_usd: float
+    assets: List[PortfolioRiskAsset]
+    correlation: Dict[str, Dict[str, float]]
+    excluded: List[str] = []
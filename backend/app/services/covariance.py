@@ -0,0 +1,279 @@
+import time
+import asyncio
+import numpy as np
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import config
+from app.core.logging_config import logger
+from app.core.metrics import cache_lookup
+from app.models.crypto_data import Cryptocurrency, CryptocurrencyData
+from app.services.ewma import SEED_WINDOW
+from app.services.garch_batch import conditional_variance, fit_garch_batch
+
+DCC = "DCC"
+EWMA_COV = "EWMA_COV"
+MODEL_TYPES = (DCC, EWMA_COV)
+
+HISTORY_DAYS = 750
+MIN_OBS = 250
+MAX_HORIZON = 90
+DCC_PERSISTENCE_MAX = 0.999
+
+
+@dataclass
+class CovarianceState:
+    """
+    Закэшированный прогноз ковариационной матрицы для всех поддерживаемых монет.
+    covariance[h] - прогноз дневной ковариации доходностей (в %^2) на шаг h+1,
+    cumulative[h] - ковариация суммарной доходности за h+1 дней.
+    """
+
+    method: str
+    crypto_ids: List[int]
+    symbols: List[str]
+    covariance: np.ndarray
+    cumulative: np.ndarray
+    parameters: dict
+    built_at: float = field(default_factory=time.time)
+    # Когда состояние последний раз сверялось с рыночными данными
+    checked_at: float = field(default_factory=time.time)
+    # Последняя дата цен, по которым построено состояние (_data_version)
+    data_version: Optional[datetime] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.checked_at < config.COVARIANCE_CACHE_TTL
+
+    @property
+    def correlation(self) -> np.ndarray:
+        cov = self.covariance[0]
+        std = np.sqrt(np.diag(cov))
+        return cov / np.outer(std, std)
+
+    def portfolio_volatility(self, weights: np.ndarray, horizon: int) -> np.ndarray:
+        """
+        Волатильность портфеля (в %) для горизонтов 1..horizon:
+        квадратичная форма w' Sigma_h w сразу по всем горизонтам.
+        """
+        cum = self.cumulative[:horizon]
+        return np.sqrt(np.einsum("i,hij,j->h", weights, cum, weights))
+
+
+_cache: Dict[str, CovarianceState] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def invalidate():
+    """
+    Сбрасывает кэш этого воркера сразу после синхронизации. Остальные
+    воркеры замечают новые данные по _data_version, когда истечёт
+    COVARIANCE_CACHE_TTL их состояния.
+    """
+    _cache.clear()
+
+
+async def _data_version(db: AsyncSession) -> Optional[datetime]:
+    """
+    Отметка общего для всех воркеров состояния цен: синхронизация
+    добавляет свежие дни, поэтому новые данные сдвигают последнюю дату.
+    """
+    return await db.scalar(select(func.max(CryptocurrencyData.timestamp)))
+
+
+def ewma_covariance_forecast(
+    returns: np.ndarray, lam: float, horizon: int
+) -> tuple[np.ndarray, dict]:
+    """
+    RiskMetrics-ковариация одной матричной операцией:
+    Sigma_T = lam^n * Sigma_0 + (1 - lam) * sum(lam^(n-1-t) r_t r_t').
+    Прогноз у интегрированной модели одинаков для всех горизонтов.
+    """
+    seed = returns[:SEED_WINDOW]
+    rest = returns[seed.shape[0] :]
+    weights = (1 - lam) * lam ** np.arange(rest.shape[0] - 1, -1, -1)
+    sigma = lam ** rest.shape[0] * (seed.T @ seed) / seed.shape[0]
+    sigma += (rest * weights[:, None]).T @ rest
+    forecast = np.broadcast_to(sigma, (horizon,) + sigma.shape).copy()
+    return forecast, {"lambda": lam}
+
+
+def _dcc_correlations(z: np.ndarray, q_bar: np.ndarray, a: float, b: float):
+    n_obs, n_assets = z.shape
+    q = np.empty((n_obs + 1, n_assets, n_assets))
+    q[0] = q_bar
+    outer = z[:, :, None] * z[:, None, :]
+    intercept = (1 - a - b) * q_bar
+    for t in range(n_obs):
+        q[t + 1] = intercept + a * outer[t] + b * q[t]
+    return q
+
+
+def _normalize(q: np.ndarray) -> np.ndarray:
+    d = np.sqrt(np.einsum("...ii->...i", q))
+    return q / (d[..., :, None] * d[..., None, :])
+
+
+def _dcc_negloglik(theta: np.ndarray, z: np.ndarray, q_bar: np.ndarray) -> float:
+    a, b = theta
+    if a < 0 or b < 0 or a + b >= DCC_PERSISTENCE_MAX:
+        return np.inf
+    r = _normalize(_dcc_correlations(z, q_bar, a, b)[:-1])
+    sign, logdet = np.linalg.slogdet(r)
+    if np.any(sign <= 0):
+        return np.inf
+    quad = np.einsum("ti,ti->t", z, np.linalg.solve(r, z[:, :, None])[:, :, 0])
+    return 0.5 * float(np.sum(logdet + quad))
+
+
+def dcc_forecast(returns: np.ndarray, horizon: int) -> tuple[np.ndarray, dict]:
+    """
+    Двухшаговая оценка DCC(1,1): пакетный GARCH(1,1) по каждому активу,
+    затем параметры корреляционной динамики (a, b) по стандартизированным
+    остаткам. Прогноз D_h R_h D_h строится сразу для всех горизонтов.
+    """
+    from scipy.optimize import minimize
+
+    univariate = fit_garch_batch(returns)
+    sigma2, eps = conditional_variance(returns, univariate)
+    z = eps / np.sqrt(sigma2)
+    q_bar = z.T @ z / z.shape[0]
+
+    best = min(
+        ((a, b) for a in (0.01, 0.03, 0.05) for b in (0.90, 0.94, 0.97)),
+        key=lambda theta: _dcc_negloglik(np.array(theta), z, q_bar),
+    )
+    fit = minimize(
+        _dcc_negloglik,
+        x0=np.array(best),
+        args=(z, q_bar),
+        method="SLSQP",
+        bounds=[(0.0, 1.0), (0.0, 1.0)],
+        constraints=[
+            {"type": "ineq", "fun": lambda x: DCC_PERSISTENCE_MAX - 1e-6 - x[0] - x[1]}
+        ],
+    )
+    a, b = fit.x if np.isfinite(fit.fun) else best
+
+    q = _dcc_correlations(z, q_bar, a, b)
+    steps = np.arange(horizon)[:, None, None]
+    q_path = q_bar + (a + b) ** steps * (q[-1] - q_bar)
+    r_path = _normalize(q_path)
+
+    vol = np.sqrt(univariate.forecast_variance(horizon)).T
+    forecast = vol[:, :, None] * r_path * vol[:, None, :]
+
+    parameters = {
+        "a": float(a),
+        "b": float(b),
+        "garch": [univariate.to_dict(i) for i in range(returns.shape[1])],
+    }
+    return forecast, parameters
+
+
+def build_state(
+    method: str, crypto_ids: List[int], symbols: List[str], returns: np.ndarray
+) -> CovarianceState:
+    if method == DCC:
+        covariance, parameters = dcc_forecast(returns, MAX_HORIZON)
+    elif method == EWMA_COV:
+        covariance, parameters = ewma_covariance_forecast(
+            returns, config.EWMA_LAMBDA, MAX_HORIZON
+        )
+    else:
+        raise ValueError(f"Unknown covariance model: {method}")
+
+    return CovarianceState(
+        method=method,
+        crypto_ids=crypto_ids,
+        symbols=symbols,
+        covariance=covariance,
+        cumulative=np.cumsum(covariance, axis=0),
+        parameters=parameters,
+    )
+
+
+async def _load_returns(db: AsyncSession):
+    since = datetime.now(timezone.utc) - timedelta(days=HISTORY_DAYS + 30)
+    stmt = (
+        select(
+            CryptocurrencyData.crypto_id,
+            CryptocurrencyData.timestamp,
+            CryptocurrencyData.price_usd,
+            Cryptocurrency.symbol,
+        )
+        .join(Cryptocurrency, Cryptocurrency.id == CryptocurrencyData.crypto_id)
+        .where(CryptocurrencyData.timestamp >= since)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return [], [], np.empty((0, 0))
+
+    import pandas as pd
+
+    df = pd.DataFrame(rows, columns=["crypto_id", "timestamp", "price", "symbol"])
+    df["price"] = df["price"].astype(float)
+    df["day"] = pd.to_datetime(df["timestamp"], utc=True).dt.normalize()
+    prices = df.pivot_table(
+        index="day", columns="crypto_id", values="price", aggfunc="last"
+    )
+    returns = prices.pct_change(fill_method=None).iloc[1:] * 100
+
+    # Активы с короткой историей исключаются, остальные выравниваются по общим датам
+    enough = returns.notna().sum() >= MIN_OBS
+    returns = returns.loc[:, enough].dropna().tail(HISTORY_DAYS)
+    symbols = df.drop_duplicates("crypto_id").set_index("crypto_id")["symbol"]
+
+    crypto_ids = [int(c) for c in returns.columns]
+    return crypto_ids, [symbols[c] for c in crypto_ids], returns.to_numpy()
+
+
+async def get_covariance_state(db: AsyncSession, method: str) -> CovarianceState:
+    """
+    Возвращает закэшированное состояние, при необходимости пересчитывая его.
+    Тяжёлая оценка выполняется в отдельном потоке, чтобы не блокировать event loop.
+    В пределах COVARIANCE_CACHE_TTL состояние отдаётся без обращения к БД и
+    без блокировки; после него сверяется с _data_version и пересчитывается,
+    только если появились новые цены.
+    """
+    if method not in MODEL_TYPES:
+        raise ValueError(f"Unknown covariance model: {method}")
+
+    state = _cache.get(method)
+    if state and state.fresh:
+        cache_lookup("covariance", True)
+        return state
+
+    async with _locks.setdefault(method, asyncio.Lock()):
+        # Пока ждали блокировку, состояние мог обновить другой запрос
+        state = _cache.get(method)
+        if state and state.fresh:
+            cache_lookup("covariance", True)
+            return state
+
+        version = await _data_version(db)
+        if state and state.data_version == version:
+            # Новых цен нет: продлеваем состояние без пересчёта
+            state.checked_at = time.time()
+            cache_lookup("covariance", True)
+            return state
+        cache_lookup("covariance", False)
+
+        crypto_ids, symbols, returns = await _load_returns(db)
+        if len(crypto_ids) < 2 or returns.shape[0] < MIN_OBS:
+            raise ValueError("Not enough market data to estimate a covariance model")
+
+        started = time.perf_counter()
+        state = await asyncio.to_thread(
+            build_state, method, crypto_ids, symbols, returns
+        )
+        logger.info(
+            f"🧮 {method} covariance for {len(crypto_ids)} assets built "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        state.data_version = version
+        _cache[method] = state
+        return state
@@ -0,0 +1,150 @@
+import numpy as np
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import config
+from app.core.logging_config import logger
+from app.models.crypto_data import Cryptocurrency, CryptocurrencyData
+from app.models.ml_model import TrainedModel
+
+MODEL_TYPE = "EWMA"
+SEED_WINDOW = 30
+
+
+def init_state(prices: List[float], lam: float) -> Optional[dict]:
+    """
+    Строит состояние RiskMetrics-модели по истории цен.
+    Дисперсия считается в процентах, как и у GARCH-моделей.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if prices.size < 2:
+        return None
+
+    returns = np.diff(prices) / prices[:-1] * 100
+    seed = returns[:SEED_WINDOW]
+    variance = float(np.mean(seed**2))
+
+    # var_T = lam^n * var_0 + (1 - lam) * sum(lam^(n-1-i) * r_i^2)
+    rest = returns[seed.size :]
+    weights = lam ** np.arange(rest.size - 1, -1, -1)
+    variance = lam**rest.size * variance + (1 - lam) * float(weights @ rest**2)
+
+    return {
+        "lambda": lam,
+        "variance": variance,
+        "last_price": float(prices[-1]),
+        "n_obs": int(returns.size),
+    }
+
+
+def update_state(state: dict, price: float) -> dict:
+    """O(1) обновление состояния новой ценой закрытия."""
+    ret = (price / state["last_price"] - 1) * 100
+    lam = state["lambda"]
+    return {
+        **state,
+        "variance": lam * state["variance"] + (1 - lam) * ret * ret,
+        "last_price": float(price),
+        "n_obs": state["n_obs"] + 1,
+    }
+
+
+def forecast(state: dict, horizon: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Прогноз волатильности сразу на горизонты 1..horizon.
+    Возвращает дневную волатильность и накопленную за h дней (в процентах).
+    У интегрированной модели прогноз дневной дисперсии постоянен.
+    """
+    steps = np.arange(1, horizon + 1)
+    daily = np.full(horizon, np.sqrt(state["variance"]))
+    cumulative = daily * np.sqrt(steps)
+    return daily, cumulative
+
+
+def build_payload(state: dict, horizon: int, last_price: float) -> dict:
+    daily, cumulative = forecast(state, horizon)
+    band = 1.96 * cumulative / 100
+
+    return {
+        "type": MODEL_TYPE,
+        "dates": [f"+{i}d" for i in range(1, horizon + 1)],
+        "prices": np.full(horizon, last_price),
+        "volatility": daily,
+        "confidence_interval": {
+            "upper": last_price * np.exp(band),
+            "lower": last_price * np.exp(-band),
+        },
+        "metrics": {
+            "Avg_Volatility": round(float(daily[0]), 2),
+            "Current_Price": round(last_price, 2),
+            "Lambda": state["lambda"],
+        },
+    }
+
+
+async def sync_ewma_model(db: AsyncSession, crypto: Cryptocurrency):
+    """
+    Поддерживает состояние EWMA-модели монеты в актуальном виде.
+    Если состояния нет (или сменилась lambda), оно строится по всей истории,
+    иначе догоняется только по новым точкам.
+    """
+    lam = config.EWMA_LAMBDA
+
+    stmt = select(TrainedModel).where(
+        TrainedModel.crypto_id == crypto.id,
+        TrainedModel.model_type == MODEL_TYPE,
+    )
+    db_model = (await db.execute(stmt)).scalars().first()
+    state = db_model.parameters if db_model else None
+
+    rebuild = not state or state.get("lambda") != lam
+
+    price_stmt = (
+        select(CryptocurrencyData.timestamp, CryptocurrencyData.price_usd)
+        .where(CryptocurrencyData.crypto_id == crypto.id)
+        .order_by(CryptocurrencyData.timestamp)
+    )
+    if not rebuild:
+        price_stmt = price_stmt.where(
+            CryptocurrencyData.timestamp
+            > datetime.fromisoformat(state["last_timestamp"])
+        )
+
+    rows = (await db.execute(price_stmt)).all()
+    if not rows:
+        return
+
+    if rebuild:
+        new_state = init_state([float(r.price_usd) for r in rows], lam)
+        if new_state is None:
+            return
+    else:
+        new_state = state
+        for row in rows:
+            new_state = update_state(new_state, float(row.price_usd))
+
+    new_state["last_timestamp"] = rows[-1].timestamp.isoformat()
+
+    if db_model:
+        db_model.parameters = new_state
+        if rebuild:
+            db_model.version += 1
+            db_model.trained_at = datetime.now(timezone.utc)
+    else:
+        db.add(
+            TrainedModel(
+                crypto_id=crypto.id,
+                model_type=MODEL_TYPE,
+                parameters=new_state,
+                version=1,
+                trained_at=datetime.now(timezone.utc),
+            )
+        )
+
+    await db.commit()
+    logger.info(
+        f"📈 EWMA state for {crypto.symbol} {'rebuilt' if rebuild else 'updated'} "
+        f"with {len(rows)} points"
+    )
@@ -0,0 +1,568 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+
+BACKCAST_WINDOW = 75
+BACKCAST_DECAY = 0.94
+NU_BOUNDS = (2.05, 500.0)
+PERSISTENCE_MAX = 1.0 - 1e-6
+BLOCK_SIZE = 256
+
+START_GRID = [(0.05, 0.90), (0.10, 0.85), (0.10, 0.60), (0.20, 0.75)]
+
+
+@dataclass
+class BatchGarchResult:
+    """
+    Результат пакетной оценки GARCH(1,1)/GJR-GARCH(1,1,1).
+    Строка `params` соответствует одному столбцу исходной матрицы доходностей.
+    """
+
+    param_names: List[str]
+    params: np.ndarray
+    loglikelihood: np.ndarray
+    converged: np.ndarray
+    iterations: int
+    nobs: np.ndarray
+    last_variance: np.ndarray
+
+    def param(self, name: str) -> np.ndarray:
+        return self.params[:, self.param_names.index(name)]
+
+    @property
+    def persistence(self) -> np.ndarray:
+        p = self.param("alpha") + self.param("beta")
+        if "gamma" in self.param_names:
+            p = p + 0.5 * self.param("gamma")
+        return p
+
+    def forecast_variance(self, horizon: int) -> np.ndarray:
+        """
+        Аналитический прогноз условной дисперсии на 1..horizon шагов
+        для всех столбцов сразу. Форма результата: (n_series, horizon).
+        """
+        persistence = self.persistence[:, None]
+        long_run = self.param("omega")[:, None] / (1.0 - persistence)
+        steps = np.arange(horizon)[None, :]
+        return long_run + persistence**steps * (self.last_variance[:, None] - long_run)
+
+    def to_dict(self, column: int) -> dict:
+        data = {
+            name: float(v) for name, v in zip(self.param_names, self.params[column])
+        }
+        data["last_variance"] = float(self.last_variance[column])
+        data["loglikelihood"] = float(self.loglikelihood[column])
+        return data
+
+
+def rolling_windows(returns: np.ndarray, window: int, step: int = 1) -> np.ndarray:
+    """
+    Превращает 1-D ряд доходностей в матрицу (window, n_windows) скользящих окон
+    без копирования данных.
+    """
+    returns = np.asarray(returns, dtype=float)
+    windows = np.lib.stride_tricks.sliding_window_view(returns, window)[::step]
+    return windows.T
+
+
+def _stack_series(
+    series: Union[np.ndarray, Sequence[np.ndarray]],
+) -> tuple[np.ndarray, np.ndarray]:
+    if isinstance(series, np.ndarray) and series.ndim == 2:
+        data = np.asarray(series, dtype=float)
+        mask = np.isfinite(data)
+        if not mask.all():
+            # Выравниваем каждый столбец по началу, хвост заполняем нулями
+            lengths = mask.sum(axis=0)
+            packed = np.zeros_like(data)
+            for j in range(data.shape[1]):
+                packed[: lengths[j], j] = data[mask[:, j], j]
+            data = packed
+            mask = np.arange(data.shape[0])[:, None] < lengths[None, :]
+        return data, mask
+
+    columns = [np.asarray(s, dtype=float) for s in series]
+    columns = [c[np.isfinite(c)] for c in columns]
+    lengths = np.array([len(c) for c in columns])
+    data = np.zeros((lengths.max(), len(columns)))
+    for j, c in enumerate(columns):
+        data[: len(c), j] = c
+    mask = np.arange(data.shape[0])[:, None] < lengths[None, :]
+    return data, mask
+
+
+def _backcast(resids: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    tau = min(BACKCAST_WINDOW, resids.shape[0])
+    weights = BACKCAST_DECAY ** np.arange(tau)
+    weights = weights[:, None] * mask[:tau]
+    weights /= weights.sum(axis=0, keepdims=True)
+    return (weights * resids[:tau] ** 2).sum(axis=0)
+
+
+class _Spec:
+    def __init__(self, asymmetric: bool, dist: str):
+        if dist not in ("normal", "t"):
+            raise ValueError(f"Unsupported distribution: {dist}")
+        self.asymmetric = asymmetric
+        self.student = dist == "t"
+        self.names = ["mu", "omega", "alpha"]
+        if asymmetric:
+            self.names.append("gamma")
+        self.names.append("beta")
+        if self.student:
+            self.names.append("nu")
+        self.k = len(self.names)
+        self.i_gamma = self.names.index("gamma") if asymmetric else None
+        self.i_beta = self.names.index("beta")
+        self.i_nu = self.names.index("nu") if self.student else None
+
+    def unpack(self, params: np.ndarray):
+        mu, omega, alpha = params[:, 0], params[:, 1], params[:, 2]
+        gamma = params[:, self.i_gamma] if self.asymmetric else np.zeros_like(mu)
+        beta = params[:, self.i_beta]
+        nu = params[:, self.i_nu] if self.student else None
+        return mu, omega, alpha, gamma, beta, nu
+
+    def feasible(self, params: np.ndarray, max_omega: np.ndarray) -> np.ndarray:
+        _, omega, alpha, gamma, beta, nu = self.unpack(params)
+        ok = (omega > 0) & (omega < max_omega) & (alpha >= 0) & (beta >= 0)
+        ok &= alpha + gamma >= 0
+        ok &= alpha + 0.5 * gamma + beta < PERSISTENCE_MAX
+        if nu is not None:
+            ok &= (nu > NU_BOUNDS[0]) & (nu < NU_BOUNDS[1])
+        return ok & np.isfinite(params).all(axis=1)
+
+    def constraints(self) -> List[tuple[np.ndarray, float]]:
+        """Линейные ограничения вида c @ params >= bound."""
+        rows = []
+        for i in [2, self.i_beta]:
+            c = np.zeros(self.k)
+            c[i] = 1.0
+            rows.append((c, 0.0))
+        if self.asymmetric:
+            c = np.zeros(self.k)
+            c[2] = c[self.i_gamma] = 1.0
+            rows.append((c, 0.0))
+        c = np.zeros(self.k)
+        c[2] = c[self.i_beta] = -1.0
+        if self.asymmetric:
+            c[self.i_gamma] = -0.5
+        rows.append((c, -PERSISTENCE_MAX))
+        return rows
+
+    def restrict_step(
+        self,
+        params: np.ndarray,
+        step: np.ndarray,
+        inv_info: np.ndarray,
+        max_omega: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Для столбцов, упёршихся в ограничение, заменяет шаг Ньютона шагом
+        в подпространстве этого ограничения (метод активного множества).
+        """
+        for c, bound in self.constraints():
+            slack = params @ c - bound
+            outward = step @ c < 0
+            active = (slack < 1e-5) & outward
+            if not active.any():
+                continue
+            hc = inv_info[active] @ c
+            denom = hc @ c
+            step[active] -= hc * ((step[active] @ c) / denom)[:, None]
+        omega_active = (params[:, 1] >= 0.99 * max_omega) & (step[:, 1] > 0)
+        step[omega_active, 1] = 0.0
+        return step
+
+    def project(self, params: np.ndarray, max_omega: np.ndarray) -> np.ndarray:
+        """Проекция на допустимую область, чтобы шаг мог скользить по границе."""
+        params = params.copy()
+        _, omega, alpha, gamma, beta, nu = self.unpack(params)
+        params[:, 1] = np.clip(omega, 1e-8 * max_omega, 0.999 * max_omega)
+        alpha = np.maximum(alpha, 0.0)
+        if self.asymmetric:
+            gamma = np.maximum(gamma, -alpha)
+            params[:, self.i_gamma] = gamma
+        beta = np.maximum(beta, 0.0)
+        persistence = alpha + 0.5 * gamma + beta
+        shrink = np.where(
+            persistence >= PERSISTENCE_MAX,
+            (PERSISTENCE_MAX - 1e-6) / np.maximum(persistence, 1e-12),
+            1.0,
+        )
+        params[:, 2] = alpha * shrink
+        if self.asymmetric:
+            params[:, self.i_gamma] = gamma * shrink
+        params[:, self.i_beta] = beta * shrink
+        if nu is not None:
+            params[:, self.i_nu] = np.clip(nu, NU_BOUNDS[0] + 1e-6, NU_BOUNDS[1] - 1e-6)
+        return params
+
+
+def _variance_path(
+    spec: _Spec,
+    params: np.ndarray,
+    data: np.ndarray,
+    mask: np.ndarray,
+    backcast: np.ndarray,
+):
+    mu, omega, alpha, gamma, beta, _ = spec.unpack(params)
+    n_obs, n_series = data.shape
+
+    eps = np.where(mask, data - mu, 0.0)
+    e2 = eps * eps
+    neg = eps < 0
+    shock = alpha + gamma * neg
+    innovation = shock * e2
+
+    sigma2 = np.empty((n_obs + 1, n_series))
+    sigma2[0] = omega + (alpha + 0.5 * gamma + beta) * backcast
+    for t in range(n_obs):
+        np.multiply(sigma2[t], beta, out=sigma2[t + 1])
+        sigma2[t + 1] += innovation[t]
+        sigma2[t + 1] += omega
+    return eps, e2, neg, shock, sigma2
+
+
+def _loglikelihood_block(
+    spec: _Spec,
+    params: np.ndarray,
+    data: np.ndarray,
+    mask: np.ndarray,
+    backcast: np.ndarray,
+    with_scores: bool,
+):
+    from scipy.special import digamma, gammaln
+
+    _, _, _, _, beta, nu = spec.unpack(params)
+    n_obs, n_series = data.shape
+
+    eps, e2, neg, shock, sigma2 = _variance_path(spec, params, data, mask, backcast)
+    next_variance = sigma2[mask.sum(axis=0), np.arange(n_series)]
+    sigma2 = sigma2[:-1]
+
+    if spec.student:
+        scale = nu - 2
+        const = (
+            gammaln(0.5 * (nu + 1)) - gammaln(0.5 * nu) - 0.5 * np.log(np.pi * scale)
+        )
+        z = e2 / (sigma2 * scale)
+        log1pz = np.log1p(z)
+        ll_t = const - 0.5 * np.log(sigma2) - 0.5 * (nu + 1) * log1pz
+    else:
+        ll_t = -0.5 * (np.log(2 * np.pi) + np.log(sigma2) + e2 / sigma2)
+    ll = np.where(mask, ll_t, 0.0).sum(axis=0)
+
+    if not with_scores:
+        return ll, None, None, next_variance
+
+    # dsigma2_t/dtheta = x_t + beta * dsigma2_{t-1}/dtheta, все параметры сразу
+    dsigma2 = np.zeros((n_obs, spec.k, n_series))
+    dsigma2[0, 1] = 1.0
+    dsigma2[0, 2] = backcast
+    dsigma2[0, spec.i_beta] = backcast
+    dsigma2[1:, 0] = -2.0 * shock[:-1] * eps[:-1]
+    dsigma2[1:, 1] = 1.0
+    dsigma2[1:, 2] = e2[:-1]
+    dsigma2[1:, spec.i_beta] = sigma2[:-1]
+    if spec.asymmetric:
+        dsigma2[0, spec.i_gamma] = 0.5 * backcast
+        dsigma2[1:, spec.i_gamma] = e2[:-1] * neg[:-1]
+    carry = np.empty((spec.k, n_series))
+    for t in range(1, n_obs):
+        np.multiply(dsigma2[t - 1], beta, out=carry)
+        dsigma2[t] += carry
+
+    if spec.student:
+        ratio = z / (1.0 + z)
+        dll_ds2 = (-0.5 + 0.5 * (nu + 1) * ratio) / sigma2
+        dll_de = -(nu + 1) * eps / (sigma2 * scale * (1.0 + z))
+    else:
+        dll_ds2 = 0.5 * (e2 / sigma2 - 1.0) / sigma2
+        dll_de = -eps / sigma2
+
+    scores = dsigma2
+    scores *= dll_ds2[:, None, :]
+    scores[:, 0] -= dll_de
+    if spec.student:
+        dconst_dnu = (
+            0.5 * digamma(0.5 * (nu + 1)) - 0.5 * digamma(0.5 * nu) - 0.5 / scale
+        )
+        scores[:, spec.i_nu] = (
+            dconst_dnu - 0.5 * log1pz + 0.5 * (nu + 1) * ratio / scale
+        )
+    scores *= mask[:, None, :]
+
+    grad = scores.sum(axis=0).T
+    info = np.empty((n_series, spec.k, spec.k))
+    for i in range(spec.k):
+        for j in range(i, spec.k):
+            info[:, i, j] = info[:, j, i] = np.einsum(
+                "tb,tb->b", scores[:, i], scores[:, j]
+            )
+    return ll, grad, info, next_variance
+
+
+def _loglikelihood(
+    spec: _Spec,
+    params: np.ndarray,
+    data: np.ndarray,
+    mask: np.ndarray,
+    backcast: np.ndarray,
+    with_scores: bool = False,
+):
+    """
+    Рекурсия дисперсии и лог-правдоподобие для всех столбцов одновременно.
+    При with_scores=True дополнительно считает аналитический градиент
+    и BHHH-приближение информационной матрицы (сумма внешних произведений скоров).
+    Столбцы обрабатываются блоками, чтобы ограничить объём промежуточных массивов.
+    """
+    n_series = params.shape[0]
+    ll = np.empty(n_series)
+    next_variance = np.empty(n_series)
+    grad = np.empty((n_series, spec.k)) if with_scores else None
+    info = np.empty((n_series, spec.k, spec.k)) if with_scores else None
+
+    for start in range(0, n_series, BLOCK_SIZE):
+        cols = slice(start, start + BLOCK_SIZE)
+        ll[cols], g, h, next_variance[cols] = _loglikelihood_block(
+            spec,
+            params[cols],
+            data[:, cols],
+            mask[:, cols],
+            backcast[cols],
+            with_scores,
+        )
+        if with_scores:
+            grad[cols] = g
+            info[cols] = h
+    return ll, grad, info, next_variance
+
+
+def _starting_values(
+    spec: _Spec,
+    data: np.ndarray,
+    mask: np.ndarray,
+    backcast: np.ndarray,
+    max_omega: np.ndarray,
+) -> np.ndarray:
+    nobs = mask.sum(axis=0)
+    mean = (data * mask).sum(axis=0) / nobs
+    var = (((data - mean) * mask) ** 2).sum(axis=0) / nobs
+
+    best = None
+    best_ll = np.full(data.shape[1], -np.inf)
+    for alpha, beta in START_GRID:
+        gamma = 0.5 * alpha if spec.asymmetric else 0.0
+        if spec.asymmetric:
+            alpha = 0.5 * alpha
+        persistence = alpha + 0.5 * gamma + beta
+        candidate = np.empty((data.shape[1], spec.k))
+        candidate[:, 0] = mean
+        candidate[:, 1] = var * (1 - persistence)
+        candidate[:, 2] = alpha
+        if spec.asymmetric:
+            candidate[:, spec.i_gamma] = gamma
+        candidate[:, spec.i_beta] = beta
+        if spec.student:
+            candidate[:, spec.i_nu] = 8.0
+
+        ll, *_ = _loglikelihood(spec, candidate, data, mask, backcast)
+        ll = np.where(spec.feasible(candidate, max_omega), ll, -np.inf)
+        if best is None:
+            best = candidate
+        better = ll > best_ll
+        best[better] = candidate[better]
+        best_ll = np.where(better, ll, best_ll)
+    return best
+
+
+def fit_garch_batch(
+    returns: Union[np.ndarray, Sequence[np.ndarray]],
+    asymmetric: bool = False,
+    dist: str = "normal",
+    start_params: Optional[np.ndarray] = None,
+    max_iter: int = 200,
+    tol: float = 1e-9,
+    max_halvings: int = 20,
+) -> BatchGarchResult:
+    """
+    Пакетная оценка GARCH(1,1) (или GJR-GARCH(1,1,1) при asymmetric=True)
+    с постоянным средним методом максимального правдоподобия.
+
+    returns - матрица (T, n_series), где каждый столбец это отдельный актив
+    или окно бэктеста (NaN допускаются, столбцы разной длины выравниваются),
+    либо список 1-D рядов. Спецификация совпадает с
+    `arch_model(y, vol="Garch", p=1, o=int(asymmetric), q=1, dist=dist)`.
+
+    Все столбцы оптимизируются одновременно квазиньютоновскими шагами
+    (BHHH на старте, затем BFGS-обновления) с покомпонентным дроблением шага
+    и учётом активных ограничений; сошедшиеся столбцы
+    исключаются из дальнейших итераций. start_params (n_series, k) позволяет
+    стартовать с решения предыдущего окна (warm start).
+    """
+    spec = _Spec(asymmetric, dist)
+    data, mask = _stack_series(returns)
+    n_series = data.shape[1]
+    nobs = mask.sum(axis=0)
+
+    mean = (data * mask).sum(axis=0) / nobs
+    demeaned = np.where(mask, data - mean, 0.0)
+    backcast = _backcast(demeaned, mask)
+    max_omega = 10.0 * (demeaned**2).sum(axis=0) / nobs
+
+    if start_params is None:
+        params = _starting_values(spec, data, mask, backcast, max_omega)
+    else:
+        params = np.array(start_params, dtype=float, copy=True)
+        if params.shape != (n_series, spec.k):
+            raise ValueError(
+                f"start_params must have shape {(n_series, spec.k)}, got {params.shape}"
+            )
+        bad = ~spec.feasible(params, max_omega)
+        if bad.any():
+            fallback = _starting_values(
+                spec, data[:, bad], mask[:, bad], backcast[bad], max_omega[bad]
+            )
+            params[bad] = fallback
+
+    ll = np.full(n_series, -np.inf)
+    next_variance = np.zeros(n_series)
+    active = np.ones(n_series, dtype=bool)
+    converged = np.zeros(n_series, dtype=bool)
+    ridge = 1e-8 * np.eye(spec.k)
+    eye = np.eye(spec.k)
+    inv_hess = np.zeros((n_series, spec.k, spec.k))
+    prev_params = np.zeros((n_series, spec.k))
+    prev_grad = np.zeros((n_series, spec.k))
+    has_prev = np.zeros(n_series, dtype=bool)
+    stale = np.zeros(n_series, dtype=bool)
+
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        cols = (data[:, idx], mask[:, idx], backcast[idx])
+        current = params[idx]
+        ll_cur, grad, info, nv = _loglikelihood(spec, current, *cols, with_scores=True)
+        ll[idx] = ll_cur
+        next_variance[idx] = nv
+        stale[idx] = False
+
+        scale = np.sqrt(np.einsum("bii->bi", info)) + 1e-12
+        scaled = info / (scale[:, :, None] * scale[:, None, :]) + ridge
+        inv_info = np.linalg.inv(scaled) / (scale[:, :, None] * scale[:, None, :])
+
+        # BHHH даёт хорошее начальное приближение, дальше уточняем его
+        # BFGS-обновлениями, чтобы сходимость у оптимума была сверхлинейной
+        s_k = current - prev_params[idx]
+        y_k = prev_grad[idx] - grad
+        sy = np.einsum("bi,bi->b", s_k, y_k)
+        curved = has_prev[idx] & (
+            sy > 1e-10 * np.linalg.norm(s_k, axis=1) * np.linalg.norm(y_k, axis=1)
+        )
+        hess = inv_info.copy()
+        if curved.any():
+            rho = 1.0 / sy[curved]
+            left = (
+                eye - rho[:, None, None] * s_k[curved, :, None] * y_k[curved, None, :]
+            )
+            hess[curved] = left @ inv_hess[idx[curved]] @ left.transpose(0, 2, 1)
+            hess[curved] += (
+                rho[:, None, None] * s_k[curved, :, None] * s_k[curved, None, :]
+            )
+        inv_hess[idx] = hess
+        prev_params[idx] = current
+        prev_grad[idx] = grad
+        has_prev[idx] = True
+
+        step = np.einsum("bij,bj->bi", hess, grad)
+        step = spec.restrict_step(current, step, hess, max_omega[idx])
+
+        decrement = np.einsum("bi,bi->b", grad, step) / nobs[idx]
+        done = decrement < tol
+        converged[idx[done]] = True
+        active[idx[done]] = False
+
+        todo = ~done
+        if not todo.any():
+            continue
+        idx, current, step = idx[todo], current[todo], step[todo]
+        ll_cur = ll_cur[todo]
+        cols = (data[:, idx], mask[:, idx], backcast[idx])
+
+        accepted = np.zeros(idx.size, dtype=bool)
+        lam = np.ones(idx.size)
+        new_params = current.copy()
+        ll_new = ll_cur.copy()
+        for _ in range(max_halvings):
+            pending = ~accepted
+            trial = spec.project(current + lam[:, None] * step, max_omega[idx])
+            ok = spec.feasible(trial, max_omega[idx]) & pending
+            if ok.any():
+                ll_trial, *_ = _loglikelihood(
+                    spec,
+                    trial[ok],
+                    cols[0][:, ok],
+                    cols[1][:, ok],
+                    cols[2][ok],
+                )
+                improved = np.zeros(idx.size, dtype=bool)
+                improved[ok] = ll_trial >= ll_cur[ok]
+                new_params[improved] = trial[improved]
+                ll_new[ok] = np.where(improved[ok], ll_trial, ll_new[ok])
+                accepted |= improved
+            if accepted.all():
+                break
+            lam = np.where(accepted, lam, 0.5 * lam)
+
+        params[idx] = new_params
+        stale[idx] = accepted
+        # На границе области шаг Ньютона не обнуляется, поэтому дополнительно
+        # останавливаемся, когда прирост правдоподобия стал пренебрежимо мал
+        gain = (ll_new - ll_cur) / nobs[idx]
+        stalled = ~accepted | (gain < tol)
+        converged[idx[stalled]] = True
+        active[idx[stalled]] = False
+
+    if stale.any():
+        idx = np.flatnonzero(stale)
+        ll[idx], _, _, next_variance[idx] = _loglikelihood(
+            spec, params[idx], data[:, idx], mask[:, idx], backcast[idx]
+        )
+
+    return BatchGarchResult(
+        param_names=list(spec.names),
+        params=params,
+        loglikelihood=ll,
+        converged=converged,
+        iterations=iteration,
+        nobs=nobs,
+        last_variance=next_variance,
+    )
+
+
+def conditional_variance(
+    returns: Union[np.ndarray, Sequence[np.ndarray]],
+    result: BatchGarchResult,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Условная дисперсия и остатки для уже оценённых параметров.
+    Возвращает две матрицы (T, n_series) в той же раскладке, что и вход
+    (значения за пределами длины столбца равны NaN).
+    """
+    asymmetric = "gamma" in result.param_names
+    dist = "t" if "nu" in result.param_names else "normal"
+    spec = _Spec(asymmetric, dist)
+    data, mask = _stack_series(returns)
+    nobs = mask.sum(axis=0)
+    mean = (data * mask).sum(axis=0) / nobs
+    backcast = _backcast(np.where(mask, data - mean, 0.0), mask)
+
+    eps, _, _, _, sigma2 = _variance_path(spec, result.params, data, mask, backcast)
+    sigma2 = np.where(mask, sigma2[:-1], np.nan)
+    eps = np.where(mask, eps, np.nan)
+    return sigma2, eps
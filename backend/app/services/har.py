@@ -0,0 +1,134 @@
+import numpy as np
+from typing import List, Sequence
+
+MODEL_TYPE = "HAR"
+LAGS = (1, 5, 22)
+SECONDS_PER_DAY = 86400
+
+
+def realized_variance(
+    timestamps: np.ndarray, prices: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Дневная реализованная дисперсия как сумма квадратов внутридневных
+    лог-доходностей (в процентах^2). Группировка по UTC-дням без pandas,
+    неполные дни (меньше половины типичного числа баров) отбрасываются.
+
+    timestamps - unix-время в секундах. Возвращает (дни, rv), дни - номера
+    суток от эпохи.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    prices = np.asarray(prices, dtype=float)
+    order = np.argsort(timestamps, kind="stable")
+    timestamps, prices = timestamps[order], prices[order]
+
+    returns = np.diff(np.log(prices)) * 100
+    days = timestamps[1:] // SECONDS_PER_DAY
+    valid = np.isfinite(returns)
+    days, returns = days[valid], returns[valid]
+
+    unique_days, index, counts = np.unique(
+        days, return_inverse=True, return_counts=True
+    )
+    rv = np.bincount(index, weights=returns**2)
+    full = counts >= 0.5 * np.median(counts)
+    return unique_days[full], rv[full]
+
+
+def _lagged_means(rv: np.ndarray) -> np.ndarray:
+    """Матрица регрессоров [1, RV_d, RV_w, RV_m] для дней с полной историей."""
+    cumsum = np.concatenate(([0.0], np.cumsum(rv)))
+    start = max(LAGS) - 1
+    end = np.arange(start, rv.size) + 1
+    columns = [np.ones(end.size)]
+    for lag in LAGS:
+        columns.append((cumsum[end] - cumsum[end - lag]) / lag)
+    return np.column_stack(columns)
+
+
+def fit_har_batch(rv_series: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    МНК-оценка HAR-RV сразу для нескольких активов:
+    RV_{t+1} = b0 + b_d RV_t + b_w RV_t^(5) + b_m RV_t^(22).
+
+    Ряды разной длины дополняются нулевыми строками, которые не меняют
+    нормальные уравнения, и решаются одним батчем. Форма результата (n_assets, 4).
+    """
+    designs, targets = [], []
+    for rv in rv_series:
+        rv = np.asarray(rv, dtype=float)
+        x = _lagged_means(rv)[:-1]
+        designs.append(x)
+        targets.append(rv[max(LAGS) :])
+
+    n_rows = max(x.shape[0] for x in designs)
+    k = len(LAGS) + 1
+    X = np.zeros((len(designs), n_rows, k))
+    y = np.zeros((len(designs), n_rows))
+    for i, (x, t) in enumerate(zip(designs, targets)):
+        X[i, : x.shape[0]] = x
+        y[i, : t.size] = t
+
+    xtx = np.einsum("bti,btj->bij", X, X)
+    xty = np.einsum("bti,bt->bi", X, y)
+    return np.linalg.solve(xtx, xty[:, :, None])[:, :, 0]
+
+
+def build_state(coef: np.ndarray, rv: np.ndarray, last_day: int) -> dict:
+    return {
+        "coef": [float(c) for c in coef],
+        "rv_tail": [float(v) for v in rv[-max(LAGS) :]],
+        "last_day": int(last_day),
+    }
+
+
+def forecast(state: dict, horizon: int) -> np.ndarray:
+    """
+    Итеративный прогноз дневной RV на горизонты 1..horizon: прогнозы
+    подставляются в недельное и месячное среднее вместо будущих значений.
+    """
+    coef = np.asarray(state["coef"])
+    history = np.empty(len(state["rv_tail"]) + horizon)
+    history[: len(state["rv_tail"])] = state["rv_tail"]
+    n = len(state["rv_tail"])
+    for h in range(horizon):
+        end = n + h
+        lagged = [history[end - lag : end].mean() for lag in LAGS]
+        history[end] = max(coef[0] + coef[1:] @ lagged, 0.0)
+    return history[n:]
+
+
+def build_payload(state: dict, horizon: int, last_price: float) -> dict:
+    rv_forecast = forecast(state, horizon)
+    vol_forecast_pct = np.sqrt(rv_forecast)
+
+    return {
+        "type": MODEL_TYPE,
+        "dates": [f"+{i}d" for i in range(1, horizon + 1)],
+        "prices": np.full(horizon, last_price),
+        "volatility": vol_forecast_pct,
+        "confidence_interval": None,
+        "metrics": {
+            "Avg_Volatility": round(float(np.mean(vol_forecast_pct)), 2),
+            "Current_Price": round(last_price, 2),
+            "Persistence": round(float(np.sum(state["coef"][1:])), 3),
+        },
+    }
+
+
+def state_from_hourly(series: List[tuple[np.ndarray, np.ndarray]]) -> List[dict]:
+    """
+    Полный цикл для набора активов: RV из часовых баров, батч-МНК и
+    компактное состояние для инференса. series - список (timestamps, prices).
+    """
+    rvs, last_days = [], []
+    for timestamps, prices in series:
+        days, rv = realized_variance(timestamps, prices)
+        rvs.append(rv)
+        last_days.append(days[-1])
+
+    coefs = fit_har_batch(rvs)
+    return [
+        build_state(coef, rv, last_day)
+        for coef, rv, last_day in zip(coefs, rvs, last_days)
+    ]
@@ -1,19 +1,28 @@
+import time
 import asyncio
-import joblib
 import numpy as np
 from pathlib import Path
 from uuid import UUID
+from typing import Dict, List, Optional
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
 
 from app.crud import crud_dashboard
+from app.services import ewma, har
+from app.core import metrics, tracing
+from app.core.admission import job_admission
+from app.core.profiling import profile_job
 from app.core.logging_config import logger
 from app.models.crypto_data import CryptocurrencyData
 from app.models.ml_model import TrainedModel
 from app.models.simulation import SimulationResult
 
 MODELS_DIR = Path("/app/ml_models")
+DEFAULT_HORIZON = 30
 
 
+@job_admission.limit
+@profile_job("prediction", id_arg="job_id")
 async def run_prediction_task(
     job_id: UUID, model_type: str, crypto_id: int, db_session_factory
 ):
@@ -23,101 +32,364 @@ async def run_prediction_task(
     logger.info(
         f"🚀 Inference started for Job {job_id} [Model: {model_type}, CryptoID: {crypto_id}]"
     )
+    started = time.perf_counter()
+    job_status = "failed"
 
     async with db_session_factory() as db:
-        try:
-            await crud_dashboard.update_simulation_status(db, job_id, "running")
-            await asyncio.sleep(0.5)
+        with (
+            tracing.span(
+                "job.prediction",
+                **{
+                    "job.id": str(job_id),
+                    "model.type": model_type,
+                    "crypto.id": crypto_id,
+                },
+            ),
+            tracing.collect_spans() as spans,
+        ):
+            try:
+                job = await crud_dashboard.update_simulation_status(
+                    db, job_id, "running"
+                )
+                await asyncio.sleep(0.5)
 
-            stmt = select(TrainedModel).where(
-                TrainedModel.crypto_id == crypto_id,
-                TrainedModel.model_type == model_type,
-            )
+                with tracing.span("model.lookup"):
+                    db_model = await _get_model(db, crypto_id, model_type)
 
-            db_model = (await db.execute(stmt)).scalars().first()
+                horizon = DEFAULT_HORIZON
+                last_price = await _get_last_price(db, crypto_id)
+                if model_type == ewma.MODEL_TYPE:
+                    if not db_model:
+                        raise ValueError(
+                            f"No EWMA state for CryptoID={crypto_id}. Please run market data sync."
+                        )
+                    with tracing.span("model.forecast"):
+                        result_payload = ewma.build_payload(
+                            db_model.parameters, horizon, last_price
+                        )
+                else:
+                    try:
+                        result_payload = await _run_model(
+                            db_model, model_type, crypto_id, horizon, last_price
+                        )
+                    except Exception as e:
+                        fallback = await _get_model(db, crypto_id, ewma.MODEL_TYPE)
+                        if not fallback:
+                            raise
+                        logger.warning(
+                            f"⚠️ {model_type} unavailable for Job {job_id} ({e}), "
+                            f"falling back to EWMA"
+                        )
+                        with tracing.span("model.forecast", fallback=True):
+                            result_payload = ewma.build_payload(
+                                fallback.parameters, horizon, last_price
+                            )
+                        result_payload["fallback_from"] = model_type
+                        db_model = fallback
+
+                db_result = SimulationResult(
+                    job_id=job_id,
+                    job_created_at=job.created_at,
+                    results=result_payload,
+                    model_id=db_model.id,
+                )
+                db.add(db_result)
 
-            if not db_model:
-                raise ValueError(
-                    f"No trained model found for CryptoID={crypto_id} Type={model_type}. Please run model training/import."
+                await crud_dashboard.update_simulation_status(
+                    db, job_id, "completed", timings=tracing.summarize(spans)
                 )
+                job_status = "completed"
+                logger.info(f"✅ Job {job_id} completed successfully.")
+
+            except Exception as e:
+                logger.exception(f"❌ Job {job_id} failed: {e}")
+                await crud_dashboard.update_simulation_status(
+                    db, job_id, "failed", timings=tracing.summarize(spans)
+                )
+
+            _log_timings(job_id, spans)
 
-            stored_path = db_model.parameters.get("path")
-            if not stored_path:
-                raise ValueError("Model path not found in DB parameters")
+    metrics.job_finished(job_status, model_type, time.perf_counter() - started)
+
+
+@job_admission.limit
+@profile_job("batch_prediction", id_arg="job_id")
+async def run_batch_prediction_task(
+    job_id: UUID, items: List[dict], horizon: int, db_session_factory
+):
+    """
+    Пакетный инференс: все модели считаются в рамках одной задачи и одной
+    сессии. items - список {crypto_id, model_type, horizon}; пустой список
+    означает все активные модели с горизонтом horizon.
+    """
+    logger.info(f"🚀 Batch inference started for Job {job_id} [{len(items)} items]")
+    started = time.perf_counter()
+    job_status = "failed"
+
+    async with db_session_factory() as db:
+        with (
+            tracing.span("job.batch_prediction", **{"job.id": str(job_id)}),
+            tracing.collect_spans() as spans,
+        ):
+            try:
+                job = await crud_dashboard.update_simulation_status(
+                    db, job_id, "running"
+                )
 
-            model_path = Path(stored_path)
-            if not model_path.is_absolute():
-                model_path = Path("/app") / model_path
+                stmt = select(TrainedModel).options(selectinload(TrainedModel.crypto))
+                if items:
+                    stmt = stmt.where(
+                        TrainedModel.crypto_id.in_(
+                            {item["crypto_id"] for item in items}
+                        )
+                    )
+                models = (await db.execute(stmt)).scalars().all()
+                by_key = {(m.crypto_id, m.model_type): m for m in models}
 
-            if not model_path.exists():
-                filename = model_path.name
-                model_path = MODELS_DIR / filename
-                if not model_path.exists():
-                    raise FileNotFoundError(f"Model file missing: {model_path}")
+                if not items:
+                    items = [
+                        {"crypto_id": m.crypto_id, "model_type": m.model_type}
+                        for m in sorted(
+                            models, key=lambda m: (m.crypto.symbol, m.model_type)
+                        )
+                    ]
+                items = [{"horizon": horizon, **item} for item in items]
 
-            logger.info(f"📂 Loading model from {model_path}...")
-            loaded_model = joblib.load(model_path)
+                prices = await crud_dashboard.get_last_prices(
+                    db, list({item["crypto_id"] for item in items})
+                )
 
-            horizon = 30
-            dates = [f"+{i}d" for i in range(1, horizon + 1)]
-            result_payload = {}
+                # ORM-объекты в потоки не передаются: только тип и параметры модели
+                tasks = []
+                for item in items:
+                    db_model = by_key.get((item["crypto_id"], item["model_type"]))
+                    fallback = by_key.get((item["crypto_id"], ewma.MODEL_TYPE))
+                    tasks.append(
+                        _evaluate(
+                            item,
+                            db_model and (db_model.id, db_model.parameters),
+                            fallback and (fallback.id, fallback.parameters),
+                            prices.get(item["crypto_id"], 0.0),
+                        )
+                    )
+                evaluated = await asyncio.gather(*tasks)
 
-            if model_type == "GARCH":
-                forecast = loaded_model.forecast(horizon=horizon, reindex=False)
-                vol_forecast_pct = np.sqrt(forecast.variance.values[-1, :])
+                symbols = {m.crypto_id: m.crypto.symbol for m in models}
+                result_payload = _to_columnar(items, evaluated, symbols, prices)
 
-                price_stmt = (
-                    select(CryptocurrencyData.price_usd)
-                    .where(CryptocurrencyData.crypto_id == crypto_id)
-                    .order_by(CryptocurrencyData.timestamp.desc())
-                    .limit(1)
+                db.add(
+                    SimulationResult(
+                        job_id=job_id,
+                        job_created_at=job.created_at,
+                        results=result_payload,
+                    )
                 )
-                last_price = float(
-                    (await db.execute(price_stmt)).scalars().first() or 0
+                await crud_dashboard.update_simulation_status(
+                    db, job_id, "completed", timings=tracing.summarize(spans)
                 )
+                job_status = "completed"
+                logger.info(
+                    f"✅ Batch Job {job_id} completed: {len(items)} forecasts, "
+                    f"{len(result_payload['errors'])} errors"
+                )
+
+            except Exception as e:
+                logger.exception(f"❌ Batch Job {job_id} failed: {e}")
+                await crud_dashboard.update_simulation_status(
+                    db, job_id, "failed", timings=tracing.summarize(spans)
+                )
+
+            _log_timings(job_id, spans)
+
+    metrics.job_finished(job_status, "BATCH", time.perf_counter() - started)
 
-                result_payload = {
-                    "type": "GARCH",
-                    "dates": dates,
-                    "prices": [last_price] * horizon,
-                    "volatility": vol_forecast_pct.tolist(),
-                    "confidence_interval": None,
-                    "metrics": {
-                        "Avg_Volatility": round(float(np.mean(vol_forecast_pct)), 2),
-                        "Current_Price": round(last_price, 2),
-                    },
-                }
-
-            elif model_type == "ARIMA":
-                forecast_res = loaded_model.get_forecast(steps=horizon)
-                pred_prices = forecast_res.predicted_mean
-                conf_int = forecast_res.conf_int(alpha=0.05)
-
-                result_payload = {
-                    "type": "ARIMA",
-                    "dates": dates,
-                    "prices": pred_prices.tolist(),
-                    "volatility": [0] * horizon,
-                    "confidence_interval": {
-                        "upper": conf_int.iloc[:, 1].tolist(),
-                        "lower": conf_int.iloc[:, 0].tolist(),
-                    },
-                    "metrics": {
-                        "Target_Price": round(float(pred_prices.iloc[-1]), 2),
-                        "Trend": "Bullish"
-                        if pred_prices.iloc[-1] > pred_prices.iloc[0]
-                        else "Bearish",
-                    },
-                }
-
-            db_result = SimulationResult(
-                job_id=job_id, results=result_payload, model_id=db_model.id
+
+def _log_timings(job_id: UUID, spans: list):
+    logger.info(
+        f"⏱️ Job {job_id} [trace {tracing.current_trace_id()}]: "
+        f"{tracing.format_summary(tracing.summarize(spans)) or 'no spans'}"
+    )
+
+
+async def _evaluate(
+    item: dict, model: Optional[tuple], fallback: Optional[tuple], last_price: float
+) -> dict:
+    model_type, horizon = item["model_type"], item["horizon"]
+    try:
+        if not model:
+            raise ValueError(f"No trained {model_type} model")
+        with tracing.span(
+            "model.forecast",
+            **{"model.type": model_type, "crypto.id": item["crypto_id"]},
+        ):
+            payload = await asyncio.to_thread(
+                build_forecast, model_type, model[1], horizon, last_price
             )
-            db.add(db_result)
+        return {"model_id": model[0], "payload": payload}
+    except Exception as e:
+        if not fallback or model_type == ewma.MODEL_TYPE:
+            return {"error": str(e)}
+        payload = ewma.build_payload(fallback[1], horizon, last_price)
+        return {
+            "model_id": fallback[0],
+            "payload": payload,
+            "fallback_from": model_type,
+        }
+
+
+def _to_columnar(
+    items: List[dict], evaluated: List[dict], symbols: Dict[int, str], prices: dict
+) -> dict:
+    """
+    Сводит прогнозы в колоночный вид: строки - пары (монета, модель),
+    столбцы - горизонты. Более короткие горизонты дополняются null.
+    """
+    n_horizons = max((item["horizon"] for item in items), default=0)
+
+    # NaN сериализуется orjson как null
+    volatility = np.full((len(items), n_horizons), np.nan)
+    price_paths = np.full((len(items), n_horizons), np.nan)
+    errors = {}
+    for i, result in enumerate(evaluated):
+        payload = result.get("payload")
+        if payload is None:
+            errors[str(i)] = result["error"]
+            continue
+        vol = np.asarray(payload["volatility"], dtype=float)
+        path = np.asarray(payload["prices"], dtype=float)
+        volatility[i, : vol.size] = vol
+        price_paths[i, : path.size] = path
+
+    return {
+        "type": "BATCH",
+        "horizons": list(range(1, n_horizons + 1)),
+        "crypto_id": [item["crypto_id"] for item in items],
+        "symbol": [symbols.get(item["crypto_id"]) for item in items],
+        "model_type": [item["model_type"] for item in items],
+        "horizon": [item["horizon"] for item in items],
+        "model_id": [
+            str(result["model_id"]) if "model_id" in result else None
+            for result in evaluated
+        ],
+        "fallback_from": [result.get("fallback_from") for result in evaluated],
+        "last_price": [prices.get(item["crypto_id"]) for item in items],
+        "volatility": volatility,
+        "prices": price_paths,
+        "errors": errors,
+    }
+
+
+async def _get_model(db, crypto_id: int, model_type: str):
+    stmt = select(TrainedModel).where(
+        TrainedModel.crypto_id == crypto_id,
+        TrainedModel.model_type == model_type,
+    )
+    return (await db.execute(stmt)).scalars().first()
+
+
+async def _get_last_price(db, crypto_id: int) -> float:
+    price_stmt = (
+        select(CryptocurrencyData.price_usd)
+        .where(CryptocurrencyData.crypto_id == crypto_id)
+        .order_by(CryptocurrencyData.timestamp.desc())
+        .limit(1)
+    )
+    return float((await db.execute(price_stmt)).scalars().first() or 0)
+
+
+async def _run_model(
+    db_model, model_type: str, crypto_id: int, horizon: int, last_price: float
+) -> dict:
+    if not db_model:
+        raise ValueError(
+            f"No trained model found for CryptoID={crypto_id} Type={model_type}. Please run model training/import."
+        )
+
+    with tracing.span("model.forecast", **{"model.type": model_type}):
+        return await asyncio.to_thread(
+            build_forecast, model_type, db_model.parameters, horizon, last_price
+        )
+
+
+def _resolve_model_path(parameters: dict) -> Path:
+    stored_path = parameters.get("path")
+    if not stored_path:
+        raise ValueError("Model path not found in DB parameters")
+
+    model_path = Path(stored_path)
+    if not model_path.is_absolute():
+        model_path = Path("/app") / model_path
+
+    if not model_path.exists():
+        filename = model_path.name
+        model_path = MODELS_DIR / filename
+        if not model_path.exists():
+            raise FileNotFoundError(f"Model file missing: {model_path}")
+
+    return model_path
+
+
+def build_forecast(
+    model_type: str, parameters: dict, horizon: int, last_price: float
+) -> dict:
+    """
+    Синхронный расчёт прогноза по параметрам модели из БД. Не обращается к
+    сессии, поэтому может выполняться в отдельном потоке.
+    """
+    if model_type == ewma.MODEL_TYPE:
+        return ewma.build_payload(parameters, horizon, last_price)
+    if model_type == har.MODEL_TYPE:
+        return har.build_payload(parameters, horizon, last_price)
+
+    # joblib (и arch/statsmodels при распаковке) загружаются при первом прогнозе
+    import joblib
+
+    with tracing.span("model.resolve_path"):
+        model_path = _resolve_model_path(parameters)
+    logger.info(f"📂 Loading model from {model_path}...")
+    load_started = time.perf_counter()
+    with tracing.span("model.load", **{"model.path": str(model_path)}):
+        loaded_model = joblib.load(model_path)
+    metrics.MODEL_LOAD_DURATION.observe(time.perf_counter() - load_started, model_type)
+
+    dates = [f"+{i}d" for i in range(1, horizon + 1)]
+
+    if model_type == "GARCH":
+        forecast = loaded_model.forecast(horizon=horizon, reindex=False)
+        vol_forecast_pct = np.sqrt(forecast.variance.values[-1, :])
+
+        return {
+            "type": "GARCH",
+            "dates": dates,
+            "prices": np.full(horizon, last_price),
+            "volatility": vol_forecast_pct,
+            "confidence_interval": None,
+            "metrics": {
+                "Avg_Volatility": round(float(np.mean(vol_forecast_pct)), 2),
+                "Current_Price": round(last_price, 2),
+            },
+        }
+
+    elif model_type == "ARIMA":
+        forecast_res = loaded_model.get_forecast(steps=horizon)
+        pred_prices = forecast_res.predicted_mean
+        conf_int = forecast_res.conf_int(alpha=0.05)
 
-            await crud_dashboard.update_simulation_status(db, job_id, "completed")
-            logger.info(f"✅ Job {job_id} completed successfully.")
+        return {
+            "type": "ARIMA",
+            "dates": dates,
+            "prices": pred_prices.to_numpy(),
+            "volatility": np.zeros(horizon),
+            "confidence_interval": {
+                "upper": conf_int.iloc[:, 1].to_numpy(),
+                "lower": conf_int.iloc[:, 0].to_numpy(),
+            },
+            "metrics": {
+                "Target_Price": round(float(pred_prices.iloc[-1]), 2),
+                "Trend": "Bullish"
+                if pred_prices.iloc[-1] > pred_prices.iloc[0]
+                else "Bearish",
+            },
+        }
 
-        except Exception as e:
-            logger.exception(f"❌ Job {job_id} failed: {e}")
-            await crud_dashboard.update_simulation_status(db, job_id, "failed")
+    raise ValueError(f"Unsupported model type: {model_type}")
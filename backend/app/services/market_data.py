@@ -1,10 +1,15 @@
-import yfinance as yf
-import pandas as pd
+import time
 from datetime import datetime, timedelta
 from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.crypto_data import Cryptocurrency, CryptocurrencyData
+from app.core import metrics
+from app.core.admission import job_admission
+from app.core.profiling import profile_job
 from app.core.logging_config import logger
+from app.core.response_cache import ACTIVE_MODELS, CRYPTOS, response_cache
+from app.services import covariance
+from app.services.ewma import sync_ewma_model
 
 DEFAULT_TICKERS = [
     {"symbol": "BTC", "name": "Bitcoin", "description": "Market Leader"},
@@ -49,11 +54,14 @@ async def init_supported_cryptos(db: AsyncSession):
     if new_cryptos:
         db.add_all(new_cryptos)
         await db.commit()
+        response_cache.bump(CRYPTOS)
         logger.info(f" Successfully added {len(new_cryptos)} new cryptocurrencies.")
     else:
         logger.info(" All cryptocurrencies already exist in DB.")
 
 
+@job_admission.limit
+@profile_job("market_sync")
 async def sync_market_data(db: AsyncSession):
     logger.info("🔄 Starting market data sync...")
 
@@ -69,6 +77,15 @@ async def sync_market_data(db: AsyncSession):
     for crypto in cryptos:
         await process_single_crypto(db, crypto)
 
+        try:
+            await sync_ewma_model(db, crypto)
+        except Exception as e:
+            logger.error(f"❌ Error updating EWMA state for {crypto.symbol}: {e}")
+            await db.rollback()
+
+    covariance.invalidate()
+    # Состояния EWMA-моделей обновились
+    response_cache.bump(ACTIVE_MODELS)
     logger.info("✅ Market data sync completed.")
 
 
@@ -89,6 +106,10 @@ async def process_single_crypto(db: AsyncSession, crypto: Cryptocurrency):
     if last_date:
         start_date = (last_date + timedelta(days=1)).strftime("%Y-%m-%d")
 
+    # pandas и yfinance нужны только синхронизации, импорт не на старте воркера
+    import pandas as pd
+    import yfinance as yf
+
     if pd.to_datetime(start_date) >= datetime.now():
         logger.info(f"⏳ {crypto.symbol} is up to date.")
         return
@@ -96,6 +117,7 @@ async def process_single_crypto(db: AsyncSession, crypto: Cryptocurrency):
     logger.info(f"📥 Downloading {ticker_yf} from {start_date}...")
 
     try:
+        download_started = time.perf_counter()
         df = yf.download(
             ticker_yf,
             start=start_date,
@@ -104,41 +126,55 @@ async def process_single_crypto(db: AsyncSession, crypto: Cryptocurrency):
             multi_level_index=False,
         )
 
+        metrics.SYNC_DOWNLOAD_DURATION.observe(
+            time.perf_counter() - download_started, ticker_yf
+        )
+
         if df.empty:
             logger.warning(f"No new data for {ticker_yf}")
             return
 
-        df.reset_index(inplace=True)
+        saved = await save_price_frame(db, crypto, df)
+        if saved:
+            metrics.SYNC_ROWS.inc(ticker_yf, amount=saved)
+            logger.info(f"💾 Saved {saved} records for {crypto.symbol}")
+
+    except Exception as e:
+        logger.error(f"❌ Error updating {crypto.symbol}: {e}")
+        await db.rollback()
+
 
-        if "Date" in df.columns:
-            df.rename(columns={"Date": "Timestamp"}, inplace=True)
+async def save_price_frame(db: AsyncSession, crypto: Cryptocurrency, df) -> int:
+    """
+    Сохраняет дневные цены закрытия из DataFrame в формате yfinance (дата
+    в индексе или в колонке Date) и возвращает число сохранённых строк.
+    """
+    df.reset_index(inplace=True)
 
-        df["Close"] = df["Close"].astype(float)
-        df["daily_return"] = df["Close"].pct_change()
-        df["daily_return"].fillna(0, inplace=True)
+    if "Date" in df.columns:
+        df.rename(columns={"Date": "Timestamp"}, inplace=True)
 
-        new_records = []
-        for _, row in df.iterrows():
-            ts = row["Timestamp"]
+    df["Close"] = df["Close"].astype(float)
+    df["daily_return"] = df["Close"].pct_change().fillna(0)
 
-            if ts.tzinfo is None:
-                ts = ts.tz_localize("UTC")
-            else:
-                ts = ts.tz_convert("UTC")
+    new_records = []
+    for _, row in df.iterrows():
+        ts = row["Timestamp"]
 
-            record = CryptocurrencyData(
-                crypto_id=crypto.id,
-                timestamp=ts,
-                price_usd=float(row["Close"]),
-                daily_return=float(row["daily_return"]),
-            )
-            new_records.append(record)
+        if ts.tzinfo is None:
+            ts = ts.tz_localize("UTC")
+        else:
+            ts = ts.tz_convert("UTC")
 
-        if new_records:
-            db.add_all(new_records)
-            await db.commit()
-            logger.info(f"💾 Saved {len(new_records)} records for {crypto.symbol}")
+        record = CryptocurrencyData(
+            crypto_id=crypto.id,
+            timestamp=ts,
+            price_usd=float(row["Close"]),
+            daily_return=float(row["daily_return"]),
+        )
+        new_records.append(record)
 
-    except Exception as e:
-        logger.error(f"❌ Error updating {crypto.symbol}: {e}")
-        await db.rollback()
+    if new_records:
+        db.add_all(new_records)
+        await db.commit()
+    return len(new_records)
@@ -1,17 +1,27 @@
 import json
 from pathlib import Path
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime, timezone
 
 from app.core.logging_config import logger
+from app.core.response_cache import ACTIVE_MODELS, response_cache
 from app.models.ml_model import TrainedModel
-from app.db.session import async_session_factory
+from app.db.session import jobs_session_factory
 from app.models.crypto_data import Cryptocurrency
 
 MODELS_DIR = Path("/app/ml_models")
 METADATA_FILE = MODELS_DIR / "models_metadata.json"
 
 
+def _trained_at(file_path: Path, default: datetime) -> datetime:
+    """Время обучения - время записи файла модели."""
+    try:
+        return datetime.fromtimestamp(file_path.stat().st_mtime, timezone.utc)
+    except OSError:
+        return default
+
+
 async def reload_models_in_db():
     if not METADATA_FILE.exists():
         logger.warning(
@@ -25,50 +35,55 @@ async def reload_models_in_db():
         with open(METADATA_FILE, "r") as f:
             metadata_list = json.load(f)
 
-        async with async_session_factory() as db:
-            crypto_map = {}
-            all_cryptos = (await db.execute(select(Cryptocurrency))).scalars().all()
-            for c in all_cryptos:
-                crypto_map[c.symbol] = c.id
+        async with jobs_session_factory() as db:
+            crypto_map = dict(
+                (
+                    await db.execute(select(Cryptocurrency.symbol, Cryptocurrency.id))
+                ).all()
+            )
 
-            count = 0
+            now_utc = datetime.now(timezone.utc)
+            rows = {}
             for item in metadata_list:
-                symbol = item["symbol"]
-                if symbol not in crypto_map:
+                crypto_id = crypto_map.get(item["symbol"])
+                if crypto_id is None:
                     continue
 
-                crypto_id = crypto_map[symbol]
-                model_type = item["model_type"]
-
-                file_path = str(MODELS_DIR / item["filename"])
-
-                full_params = {**item["parameters"], "path": file_path}
-
-                stmt = select(TrainedModel).where(
-                    TrainedModel.crypto_id == crypto_id,
-                    TrainedModel.model_type == model_type,
-                )
-                existing = (await db.execute(stmt)).scalars().first()
-
-                now_utc = datetime.now(timezone.utc)
-
-                if existing:
-                    existing.parameters = full_params
-                    existing.trained_at = now_utc
-                    existing.version += 1
-                else:
-                    new_model = TrainedModel(
-                        crypto_id=crypto_id,
-                        model_type=model_type,
-                        parameters=full_params,
-                        version=1,
-                        trained_at=now_utc,
-                    )
-                    db.add(new_model)
-                count += 1
-
+                file_path = MODELS_DIR / item["filename"]
+                rows[(crypto_id, item["model_type"])] = {
+                    "crypto_id": crypto_id,
+                    "model_type": item["model_type"],
+                    "parameters": {**item["parameters"], "path": str(file_path)},
+                    "version": 1,
+                    "trained_at": _trained_at(file_path, now_utc),
+                }
+
+            if not rows:
+                logger.info("✅ No models to register.")
+                return
+
+            # Один INSERT ... ON CONFLICT вместо SELECT на каждую модель;
+            # версия растёт, если изменились параметры или файл переобучен
+            # (train_local.py перезаписывает файл под тем же именем)
+            stmt = insert(TrainedModel).values(list(rows.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TrainedModel.crypto_id, TrainedModel.model_type],
+                set_={
+                    "parameters": stmt.excluded.parameters,
+                    "trained_at": stmt.excluded.trained_at,
+                    "version": TrainedModel.version + 1,
+                },
+                where=or_(
+                    TrainedModel.parameters.is_distinct_from(stmt.excluded.parameters),
+                    TrainedModel.trained_at.is_distinct_from(stmt.excluded.trained_at),
+                ),
+            )
+            updated = (await db.execute(stmt)).rowcount
             await db.commit()
-            logger.info(f"✅ Successfully loaded {count} models into DB.")
+            response_cache.bump(ACTIVE_MODELS)
+            logger.info(
+                f"✅ Registered {len(rows)} models in DB ({updated} new or changed)."
+            )
 
     except Exception as e:
         logger.error(f"❌ Failed to auto-load models: {e}")
@@ -0,0 +1,353 @@
+import os
+import asyncio
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, select, text
+
+from app.core import result_codec
+from app.core.config import config
+from app.core.logging_config import logger
+from app.core.serialization import dumps_str
+from app.db import partitions
+from app.models.simulation import SimulationJob, SimulationResult
+
+# Ключ pg_advisory_lock: одновременно очистку выполняет только один процесс
+RETENTION_LOCK_ID = 0x5E7E_0039
+# Создание секций: воркеры при старте делают его одновременно
+PARTITIONS_LOCK_ID = 0x5E7E_003A
+PARTITIONS_INTERVAL_HOURS = 24
+
+
+@dataclass
+class RetentionReport:
+    created_partitions: List[str] = field(default_factory=list)
+    dropped_partitions: List[str] = field(default_factory=list)
+    archived: Dict[str, int] = field(default_factory=dict)
+    files: List[str] = field(default_factory=list)
+    skipped: bool = False
+
+
+class ParquetArchive:
+    """
+    Потоковая запись архивируемых задач в Parquet (zstd). Файл пишется под
+    временным именем и переименовывается только после успешного закрытия,
+    поэтому в каталоге архива не бывает недописанных файлов. Методы
+    вызываются из потоков (asyncio.to_thread), запись и закрытие не
+    пересекаются: abort после отмены ждёт начатую запись.
+    """
+
+    def __init__(self, path: Path):
+        # pyarrow нужен только очистке, приложение импортирует его лениво
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path = path
+        self.rows = 0
+        self._tmp_path = path.with_name(path.name + ".tmp")
+        self._lock = threading.Lock()
+        self._schema = pa.schema(
+            [
+                ("job_id", pa.string()),
+                ("user_id", pa.string()),
+                ("portfolio_id", pa.string()),
+                ("crypto_id", pa.int32()),
+                ("model_type", pa.string()),
+                ("status", pa.string()),
+                ("created_at", pa.timestamp("us", tz="UTC")),
+                ("completed_at", pa.timestamp("us", tz="UTC")),
+                ("model_id", pa.string()),
+                ("trace_id", pa.string()),
+                ("timings", pa.string()),  # JSON
+                ("results", pa.string()),  # полный результат в JSON
+            ]
+        )
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(
+            self._tmp_path, self._schema, compression="zstd"
+        )
+
+    def write(self, rows: List[dict]):
+        table = self._pa.Table.from_pylist(rows, schema=self._schema)
+        with self._lock:
+            self._writer.write_table(table)
+            self.rows += len(rows)
+
+    def close(self):
+        with self._lock:
+            self._writer.close()
+            os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        with self._lock:
+            self._writer.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+
+def _archive_row(row) -> dict:
+    results = None
+    if row.header is not None:
+        results = dumps_str(result_codec.decode(row.header, row.arrays))
+    return {
+        "job_id": str(row.id),
+        "user_id": str(row.user_id),
+        "portfolio_id": row.portfolio_id and str(row.portfolio_id),
+        "crypto_id": row.crypto_id,
+        "model_type": row.model_type,
+        "status": row.status,
+        "created_at": row.created_at,
+        "completed_at": row.completed_at,
+        "model_id": row.model_id and str(row.model_id),
+        "trace_id": row.trace_id,
+        "timings": row.timings and dumps_str(row.timings),
+        "results": results,
+    }
+
+
+def _write_batch(archive: ParquetArchive, rows):
+    # Декодирование результатов и сжатие - CPU, выполняется вне event loop
+    archive.write([_archive_row(row) for row in rows])
+
+
+async def _archive(db, condition, path: Path, batch_size: int) -> int:
+    """Выгружает задачи, подходящие под condition, вместе с результатами."""
+    stmt = (
+        select(
+            SimulationJob.id,
+            SimulationJob.user_id,
+            SimulationJob.portfolio_id,
+            SimulationJob.crypto_id,
+            SimulationJob.model_type,
+            SimulationJob.status,
+            SimulationJob.created_at,
+            SimulationJob.completed_at,
+            SimulationJob.trace_id,
+            SimulationJob.timings,
+            SimulationResult.header,
+            SimulationResult.arrays,
+            SimulationResult.model_id,
+        )
+        .outerjoin(SimulationJob.result)
+        .where(condition)
+        .execution_options(yield_per=batch_size)
+    )
+
+    archive = None
+    try:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            if archive is None:
+                archive = await asyncio.to_thread(ParquetArchive, path)
+            await asyncio.to_thread(_write_batch, archive, rows)
+        if archive is not None:
+            await asyncio.to_thread(archive.close)
+    except BaseException:
+        if archive is not None:
+            await asyncio.to_thread(archive.abort)
+        raise
+    return archive.rows if archive else 0
+
+
+async def _begin_snapshot(db):
+    # Выгрузка и удаление видят один снимок: строка, изменённая между ними,
+    # даст ошибку сериализации, а не удалится без архива
+    await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+async def list_partitions(db, table: str) -> Dict[date, str]:
+    rows = await db.execute(text(partitions.LIST_PARTITIONS_SQL), {"table": table})
+    months = {}
+    for (name,) in rows:
+        month = partitions.parse_partition_month(table, name)
+        if month is not None:
+            months[month] = name
+    return months
+
+
+async def ensure_partitions(
+    db, now: Optional[datetime] = None, months_ahead: Optional[int] = None
+) -> List[str]:
+    """Создаёт секции текущего месяца и months_ahead следующих."""
+    now = now or datetime.now(timezone.utc)
+    if months_ahead is None:
+        months_ahead = config.SIMULATION_PARTITIONS_AHEAD
+
+    current = partitions.month_start(now)
+    months = partitions.month_range(
+        current, partitions.add_months(current, months_ahead)
+    )
+
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITIONS_LOCK_ID}
+    )
+    created = []
+    for table in partitions.PARTITIONED_TABLES:
+        existing = await list_partitions(db, table)
+        for month in months:
+            if month not in existing:
+                await db.execute(text(partitions.create_partition_sql(table, month)))
+                created.append(partitions.partition_name(table, month))
+    await db.commit()
+    return created
+
+
+async def _drop_expired_partitions(
+    db_session_factory, cutoff: datetime, report: RetentionReport, dry_run: bool
+):
+    """Месяцы, целиком старше cutoff: архив всех задач и удаление секций."""
+    archive_dir = Path(config.SIMULATION_ARCHIVE_DIR)
+
+    async with db_session_factory() as db:
+        months = await list_partitions(db, "simulation_jobs")
+
+    for month in sorted(months):
+        lower, upper = partitions.month_bounds(month)
+        if upper > cutoff:
+            continue
+
+        name = partitions.partition_name("simulation_jobs", month)
+        async with db_session_factory() as db:
+            await _begin_snapshot(db)
+            condition = and_(
+                SimulationJob.created_at >= lower, SimulationJob.created_at < upper
+            )
+            if dry_run:
+                count = await db.scalar(
+                    select(func.count()).select_from(SimulationJob).where(condition)
+                )
+            else:
+                path = archive_dir / f"{name}.parquet"
+                count = await _archive(db, condition, path, config.RETENTION_BATCH_SIZE)
+                if count:
+                    report.files.append(str(path))
+                for table in partitions.DROP_ORDER:
+                    for sql in partitions.drop_partition_sql(table, month):
+                        await db.execute(text(sql))
+                await db.commit()
+
+        report.archived[name] = count
+        report.dropped_partitions.append(name)
+        if not dry_run:
+            logger.info(f"🗄️ Partition {name}: {count} jobs archived, partition dropped")
+
+
+async def _purge_status(
+    db_session_factory,
+    status: str,
+    cutoff: datetime,
+    stamp: str,
+    report: RetentionReport,
+    dry_run: bool,
+):
+    """Задачи со статусом status старше cutoff в оставшихся секциях."""
+    condition = and_(SimulationJob.status == status, SimulationJob.created_at < cutoff)
+
+    async with db_session_factory() as db:
+        await _begin_snapshot(db)
+        if dry_run:
+            count = await db.scalar(
+                select(func.count()).select_from(SimulationJob).where(condition)
+            )
+        else:
+            path = Path(config.SIMULATION_ARCHIVE_DIR) / f"{status}-{stamp}.parquet"
+            count = await _archive(db, condition, path, config.RETENTION_BATCH_SIZE)
+            if count:
+                report.files.append(str(path))
+                # Результаты удаляются каскадом по внешнему ключу
+                await db.execute(delete(SimulationJob).where(condition))
+                await db.commit()
+
+    if count:
+        report.archived[status] = count
+        if not dry_run:
+            logger.info(f"🗄️ Archived and deleted {count} {status} jobs before {cutoff}")
+
+
+async def run_retention(
+    db_session_factory, now: Optional[datetime] = None, dry_run: bool = False
+) -> RetentionReport:
+    """
+    Полный цикл: секции наперёд, удаление целиком устаревших месяцев и
+    поштучная очистка по срокам хранения статусов. Перед удалением строки
+    выгружаются в Parquet в SIMULATION_ARCHIVE_DIR.
+    """
+    now = now or datetime.now(timezone.utc)
+    retention = config.SIMULATION_RETENTION_DAYS
+    report = RetentionReport()
+
+    async with db_session_factory() as lock_db:
+        locked = await lock_db.scalar(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": RETENTION_LOCK_ID}
+        )
+        if not locked:
+            logger.info("⏭️ Retention is already running in another process")
+            report.skipped = True
+            return report
+
+        try:
+            if not dry_run:
+                async with db_session_factory() as db:
+                    report.created_partitions = await ensure_partitions(db, now)
+
+            if retention:
+                # Статусы без своего срока хранятся как самый долгий из заданных
+                longest = now - timedelta(days=max(retention.values()))
+                await _drop_expired_partitions(
+                    db_session_factory, longest, report, dry_run
+                )
+
+            stamp = now.strftime("%Y%m%dT%H%M%S")
+            for status, days in retention.items():
+                await _purge_status(
+                    db_session_factory,
+                    status,
+                    now - timedelta(days=days),
+                    stamp,
+                    report,
+                    dry_run,
+                )
+        finally:
+            await lock_db.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": RETENTION_LOCK_ID}
+            )
+
+    return report
+
+
+async def create_partitions(db_session_factory):
+    """Секции на SIMULATION_PARTITIONS_AHEAD месяцев вперёд: без них вставка задач падает."""
+    async with db_session_factory() as db:
+        created = await ensure_partitions(db)
+    if created:
+        logger.info(f"🧱 Created partitions: {', '.join(created)}")
+
+
+async def partitions_periodically(db_session_factory):
+    """
+    Только создание секций, когда плановая очистка выключена
+    (RETENTION_INTERVAL_HOURS=0): иначе их создаёт run_retention.
+    """
+    while True:
+        await asyncio.sleep(PARTITIONS_INTERVAL_HOURS * 3600)
+        try:
+            await create_partitions(db_session_factory)
+        except Exception as e:
+            logger.error(f"❌ Partition maintenance failed: {e}")
+
+
+async def retention_periodically(db_session_factory):
+    """Фоновый запуск run_retention раз в RETENTION_INTERVAL_HOURS."""
+    while True:
+        try:
+            report = await run_retention(db_session_factory)
+            if report.created_partitions:
+                logger.info(
+                    f"🧱 Created partitions: {', '.join(report.created_partitions)}"
+                )
+        except Exception as e:
+            logger.error(f"❌ Simulation retention failed: {e}")
+        await asyncio.sleep(config.RETENTION_INTERVAL_HOURS * 3600)
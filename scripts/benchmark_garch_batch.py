@@ -0,0 +1,133 @@
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from arch import arch_model
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from app.services.garch_batch import fit_garch_batch, rolling_windows  # noqa: E402
+
+DATA_DIR = ROOT_DIR / "qf_models" / "data" / "data_days"
+
+SPECS = [
+    {"asymmetric": False, "dist": "normal"},
+    {"asymmetric": False, "dist": "t"},
+    {"asymmetric": True, "dist": "normal"},
+    {"asymmetric": True, "dist": "t"},
+]
+
+PARAM_TOLERANCE = 1e-2
+LOGLIK_TOLERANCE = 1e-5
+
+
+def load_returns(path: Path) -> np.ndarray:
+    df = pd.read_csv(path, skiprows=3, header=None, index_col=0)
+    return (df[1].pct_change().dropna() * 100).to_numpy()
+
+
+def validate(series: dict) -> bool:
+    """
+    Сравнивает оценки пакетного фиттера с `arch` на полной истории каждого актива.
+    Параметры и правдоподобие сверяются с относительным допуском.
+    """
+    ok = True
+    names = list(series)
+    for spec in SPECS:
+        label = f"{'GJR' if spec['asymmetric'] else 'GARCH'}-{spec['dist']}"
+        started = time.perf_counter()
+        batch = fit_garch_batch([series[n] for n in names], **spec)
+        batch_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for j, name in enumerate(names):
+            ref = arch_model(
+                series[name],
+                vol="Garch",
+                p=1,
+                o=int(spec["asymmetric"]),
+                q=1,
+                dist=spec["dist"],
+            ).fit(disp="off", show_warning=False)
+
+            if ref.convergence_flag != 0:
+                print(f"   ⚠️ {label} {name}: arch did not converge, skipped")
+                continue
+
+            ll_diff = batch.loglikelihood[j] - ref.loglikelihood
+            ll_tol = LOGLIK_TOLERANCE * abs(ref.loglikelihood)
+            param_diff = np.max(
+                np.abs(batch.params[j] - ref.params.values)
+                / np.maximum(np.abs(ref.params.values), 1e-2)
+            )
+            # Более высокое правдоподобие считаем успехом, даже если параметры другие
+            passed = ll_diff > -ll_tol and (
+                param_diff < PARAM_TOLERANCE or ll_diff > ll_tol
+            )
+            ok &= passed
+            mark = "✅" if passed else "❌"
+            print(
+                f"   {mark} {label} {name}: max rel param diff={param_diff:.2e}, "
+                f"loglik diff={ll_diff:+.4f}"
+            )
+        arch_time = time.perf_counter() - started
+        print(f" {label}: batch {batch_time:.2f}s vs arch {arch_time:.2f}s")
+    return ok
+
+
+def benchmark(series: dict, window: int, n_windows: int, n_assets: int):
+    columns = []
+    names = list(series)
+    for i in range(n_assets):
+        returns = series[names[i % len(names)]]
+        windows = rolling_windows(returns, window)
+        columns.append(windows[:, :n_windows])
+    matrix = np.hstack(columns)
+    print(f"\n Rolling benchmark: {matrix.shape[1]} windows x {window} observations")
+
+    for dist in ("normal", "t"):
+        started = time.perf_counter()
+        cold = fit_garch_batch(matrix, dist=dist)
+        cold_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        warm = fit_garch_batch(matrix, dist=dist, start_params=cold.params)
+        warm_time = time.perf_counter() - started
+
+        print(
+            f"   GARCH-{dist}: cold {cold_time:.1f}s ({cold.iterations} it, "
+            f"{cold.converged.mean():.2%} converged), "
+            f"warm start {warm_time:.1f}s ({warm.iterations} it)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate and benchmark the batched GARCH fitter against arch"
+    )
+    parser.add_argument("--window", type=int, default=750)
+    parser.add_argument("--windows", type=int, default=1000)
+    parser.add_argument("--assets", type=int, default=15)
+    parser.add_argument("--skip-benchmark", action="store_true")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    series = {path.stem: load_returns(path) for path in sorted(DATA_DIR.glob("*.csv"))}
+    print(f" Loaded {len(series)} assets from {DATA_DIR}")
+
+    ok = validate(series)
+    if not args.skip_benchmark:
+        benchmark(series, args.window, args.windows, args.assets)
+
+    if not ok:
+        print("\n❌ Batched estimates deviate from arch beyond tolerance.")
+        sys.exit(1)
+    print("\n🎉 Batched estimates match arch within tolerance.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from app.core import logging_config  # noqa: E402
+from app.core.logging_config import logger  # noqa: E402
+
+ENDPOINT = "/bench"
+
+
+def build_app(lines: int) -> FastAPI:
+    """Эндпоинт, который логирует как вход и get_user_by_email: несколько INFO за запрос."""
+    app = FastAPI()
+
+    @app.get(ENDPOINT)
+    async def bench():
+        for i in range(lines):
+            logger.info(f"Fetching user by email: bench-{i}@example.com")
+        return {"ok": True}
+
+    return app
+
+
+class SlowFileHandler(logging.FileHandler):
+    """Файл с задержкой на запись: медленный диск или заблокированный pipe stdout."""
+
+    def __init__(self, path: Path, delay: float):
+        super().__init__(path)
+        self.delay_seconds = delay
+
+    def emit(self, record):
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        super().emit(record)
+
+
+def sync_handlers(log_dir: Path, delay: float) -> list:
+    """Прежняя схема: консоль и файл пишутся прямо из потока event loop."""
+    console = logging.StreamHandler(open(os.devnull, "w"))
+    console.setFormatter(logging_config._console_formatter())
+    file_handler = SlowFileHandler(log_dir / "sync.log", delay)
+    file_handler.setFormatter(logging_config.JSONFormatter())
+    return [console, file_handler]
+
+
+async def run_load(client, requests: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(ENDPOINT)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def benchmark(requests: int, concurrency: int, lines: int, delay: float):
+    app = build_app(lines)
+    queue_handlers = list(logger.handlers)
+    sampling = [
+        (handler, f)
+        for handler in queue_handlers
+        for f in handler.filters
+        if isinstance(f, logging_config.SamplingFilter)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        # Слушатель очереди пишет в те же приёмники, что и синхронная схема
+        listener = logging_config.listener
+        original = listener.handlers
+        listener.stop()
+        listener.handlers = tuple(sync_handlers(Path(tmp), delay))
+        listener.start()
+
+        modes = (
+            ("off", [], logging.CRITICAL, False),
+            ("sync", sync_handlers(Path(tmp), delay), logging.DEBUG, False),
+            ("queue", queue_handlers, logging.DEBUG, False),
+            ("queue+sampling", queue_handlers, logging.DEBUG, True),
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for label, handlers, level, sampled in modes:
+                logger.handlers = handlers
+                logger.setLevel(level)
+                for handler, sampling_filter in sampling:
+                    if sampled:
+                        handler.addFilter(sampling_filter)
+                    else:
+                        handler.removeFilter(sampling_filter)
+                await run_load(client, concurrency, concurrency)
+
+                started = time.perf_counter()
+                latencies = sorted(await run_load(client, requests, concurrency))
+                elapsed = time.perf_counter() - started
+                print(
+                    f" {label:>14}: {requests / elapsed:8.1f} req/s, "
+                    f"p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms, "
+                    f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms"
+                )
+        logger.handlers = queue_handlers
+        listener.stop()
+        listener.handlers = original
+        listener.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Request throughput with logging off, synchronous handlers "
+        "and the queue-based pipeline"
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=5, help="INFO records per request")
+    parser.add_argument(
+        "--sink-delay-ms",
+        type=float,
+        default=0.0,
+        help="Extra latency of every file write (slow disk, blocked stdout)",
+    )
+    args = parser.parse_args()
+
+    print(
+        f" {args.requests} requests, concurrency {args.concurrency}, "
+        f"{args.lines} log records per request, "
+        f"sink delay {args.sink_delay_ms} ms"
+    )
+    asyncio.run(
+        benchmark(
+            args.requests, args.concurrency, args.lines, args.sink_delay_ms / 1000
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import sys
+import time
+import uuid
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import field_serializer
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from app.core.compression import CompressionMiddleware  # noqa: E402
+from app.core.config import config  # noqa: E402
+from app.core.serialization import model_response, to_builtin  # noqa: E402
+from app.schemas.dashboard import (  # noqa: E402
+    SimulationJobOut,
+    SimulationPage,
+    SimulationResultOut,
+)
+from app.services import ewma  # noqa: E402
+
+
+def forecast_payload(horizon: int) -> dict:
+    state = ewma.init_state(100 * np.exp(np.cumsum(np.random.randn(750) / 50)), 0.94)
+    return ewma.build_payload(state, horizon, state["last_price"])
+
+
+def job(results: dict) -> SimpleNamespace:
+    """Завершённая задача, как её отдаёт crud_dashboard (результат уже декодирован)."""
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        status="completed",
+        crypto_id=1,
+        model_type="EWMA",
+        created_at=datetime.now(timezone.utc),
+        completed_at=datetime.now(timezone.utc),
+        trace_id=None,
+        timings=None,
+        result=SimpleNamespace(results=results),
+    )
+
+
+def history_payload(n_jobs: int, horizon: int) -> dict:
+    return {
+        "items": [job(forecast_payload(horizon)) for _ in range(n_jobs)],
+        "next_cursor": None,
+        "total_estimate": n_jobs,
+    }
+
+
+def monte_carlo_payload(n_paths: int, horizon: int) -> dict:
+    paths = 100 * np.exp(np.cumsum(np.random.randn(n_paths, horizon) / 50, axis=1))
+    return {
+        "type": "MONTE_CARLO",
+        "dates": [f"+{i}d" for i in range(1, horizon + 1)],
+        "paths": paths,
+        "quantiles": np.quantile(paths, [0.05, 0.5, 0.95], axis=0),
+    }
+
+
+class LegacyResultOut(SimulationResultOut):
+    """Прежняя схема: массивы переводились в списки при сериализации."""
+
+    @field_serializer("results")
+    def serialize_results(self, results: Dict[str, Any]):
+        return to_builtin(results)
+
+
+class LegacyJobOut(SimulationJobOut):
+    result: Optional[LegacyResultOut] = None
+
+
+class LegacyPage(SimulationPage):
+    items: List[LegacyJobOut]
+
+
+LEGACY = {SimulationJobOut: LegacyJobOut, SimulationPage: LegacyPage}
+
+
+def response_model_encode(model, obj) -> bytes:
+    """Прежний путь: response_model -> model_dump(mode="json") -> JSONResponse."""
+    legacy = LEGACY[model].model_validate(obj, from_attributes=True)
+    return JSONResponse(legacy.model_dump(mode="json")).body
+
+
+def orjson_encode(model, obj) -> bytes:
+    """Текущий путь эндпоинтов: model_response, массивы кодирует orjson."""
+    return model_response(model, obj).body
+
+
+def timed(func, *args, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1000
+
+
+def report(name: str, model, obj, repeat: int):
+    old_body, old_ms = timed(response_model_encode, model, obj, repeat=repeat)
+    body, new_ms = timed(orjson_encode, model, obj, repeat=repeat)
+    compression = CompressionMiddleware(
+        None,
+        minimum_size=0,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+    )
+    gz, gz_ms = timed(compression.compress, body, "gzip", repeat=repeat)
+    br, br_ms = timed(compression.compress, body, "br", repeat=repeat)
+
+    print(f"\n {name}")
+    print(f"   response_model + json:  {old_ms:9.2f} ms  {len(old_body):>11,} B")
+    print(
+        f"   model_response (orjson):{new_ms:9.2f} ms  {len(body):>11,} B"
+        f"  ({old_ms / max(new_ms, 1e-9):.1f}x faster)"
+    )
+    print(f"   + gzip:                 {gz_ms:9.2f} ms  {len(gz):>11,} B")
+    print(f"   + brotli:               {br_ms:9.2f} ms  {len(br):>11,} B")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark JSON encoding and compression of forecast payloads"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--paths", type=int, default=5000)
+    parser.add_argument("--horizon", type=int, default=365)
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    report(
+        "Single forecast (30 days)",
+        SimulationJobOut,
+        job(forecast_payload(30)),
+        args.repeat,
+    )
+    report(
+        "History page (20 jobs with results)",
+        SimulationPage,
+        history_payload(20, 30),
+        args.repeat,
+    )
+    report(
+        f"Worst case: Monte Carlo {args.paths} paths x {args.horizon} days",
+        SimulationJobOut,
+        job(monte_carlo_payload(args.paths, args.horizon)),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+import sys
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import warnings
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from arch import arch_model
+from statsmodels.tsa.arima.model import ARIMA
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from train_local import HOURLY_DATA_DIR, MODEL_CONFIGS, load_hourly_prices  # noqa: E402
+from app.core import result_codec  # noqa: E402
+from app.core.config import config  # noqa: E402
+from app.core.logging_config import logger  # noqa: E402
+from app.core.serialization import dumps  # noqa: E402
+from app.services import ewma, har  # noqa: E402
+from app.services.inference import build_forecast  # noqa: E402
+
+DAILY_DATA_DIR = ROOT_DIR / "qf_models" / "data" / "data_days"
+RESULTS_DIR = ROOT_DIR / "benchmark-results"
+GROUPS = ("train", "forecast", "encode", "ingest")
+HORIZON = 30
+
+
+class Suite:
+    """
+    Набор замеров: каждый - несколько прогонов после прогрева, в результат
+    идут все времена и сводная статистика. Сравнение (compare) ведётся по
+    медиане, поэтому для всех замеров меньше - лучше.
+    """
+
+    def __init__(self, rounds: int):
+        self.rounds = rounds
+        self.results = []
+
+    def measure(self, name: str, func, rounds: int = None, warmup: int = 1, **extra):
+        for _ in range(warmup):
+            func()
+        timings = []
+        for _ in range(rounds or self.rounds):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        self.add(name, timings, **extra)
+
+    def add(self, name: str, timings: list, **extra):
+        result = {
+            "name": name,
+            "rounds": len(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.fmean(timings),
+            "min": min(timings),
+            "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "timings": timings,
+            **extra,
+        }
+        self.results.append(result)
+        throughput = ""
+        if "items" in extra:
+            throughput = f", {extra['items'] / result['median']:,.0f} {extra['unit']}/s"
+        print(
+            f" {name:<32} median {result['median'] * 1000:9.2f} ms, "
+            f"min {result['min'] * 1000:9.2f} ms{throughput}"
+        )
+
+    def skip(self, name: str, reason: str):
+        self.results.append({"name": name, "skipped": reason})
+        print(f" {name:<32} skipped: {reason}")
+
+
+def load_daily(path: Path) -> pd.Series:
+    df = pd.read_csv(path, skiprows=3, header=None, usecols=[0, 1], index_col=0)
+    prices = df[1].astype(float)
+    prices.index = pd.to_datetime(prices.index)
+    return prices
+
+
+def daily_series() -> dict:
+    return {
+        path.name.split("-")[0]: load_daily(path)
+        for path in sorted(DAILY_DATA_DIR.glob("*.csv"))
+    }
+
+
+def fit(model_type: str, params: dict, prices: pd.Series):
+    """Обучение как в scripts/train_local.py."""
+    if model_type == "GARCH":
+        returns = prices.pct_change().dropna() * 100
+        return arch_model(
+            returns,
+            vol="Garch",
+            p=params["p"],
+            q=params["q"],
+            dist=params.get("dist", "normal"),
+        ).fit(disp="off", show_warning=False)
+    return ARIMA(prices, order=params["order"]).fit()
+
+
+def bench_train(suite: Suite, series: dict, train_rounds: int) -> dict:
+    """Обучение каждой модели на каждом активе; возвращает последние модели по типу."""
+    fitted = {}
+    for model_config in MODEL_CONFIGS:
+        model_type, params = model_config["type"], model_config["params"]
+        for symbol, prices in series.items():
+            holder = {}
+
+            def run():
+                holder["model"] = fit(model_type, params, prices)
+
+            suite.measure(
+                f"train.{model_type}.{symbol}", run, rounds=train_rounds, warmup=0
+            )
+            fitted[model_type] = holder["model"]
+
+    hourly = [
+        load_hourly_prices(path) for path in sorted(HOURLY_DATA_DIR.glob("*.csv"))
+    ]
+    suite.measure(
+        f"train.{har.MODEL_TYPE}.all",
+        lambda: har.state_from_hourly(hourly),
+        items=len(hourly),
+        unit="assets",
+    )
+    return fitted
+
+
+def forecast_parameters(series: dict, fitted: dict, model_dir: Path) -> dict:
+    """Параметры моделей в том виде, в каком они лежат в trained_models."""
+    prices = series.get("BTC", next(iter(series.values())))
+    parameters = {
+        ewma.MODEL_TYPE: ewma.init_state(prices.to_numpy(), config.EWMA_LAMBDA)
+    }
+    hourly = [
+        load_hourly_prices(path) for path in sorted(HOURLY_DATA_DIR.glob("*.csv"))
+    ]
+    if hourly:
+        parameters[har.MODEL_TYPE] = {
+            "lags": list(har.LAGS),
+            **har.state_from_hourly(hourly)[0],
+        }
+    for model_config in MODEL_CONFIGS:
+        model_type = model_config["type"]
+        model = fitted.get(model_type) or fit(
+            model_type, model_config["params"], prices
+        )
+        path = model_dir / f"bench_{model_type}.pkl"
+        joblib.dump(model, path)
+        parameters[model_type] = {"path": str(path)}
+    return parameters
+
+
+def bench_forecast(suite: Suite, parameters: dict, last_price: float):
+    """Загрузка модели (joblib.load для GARCH/ARIMA) и прогноз, как в инференсе."""
+    for model_type, params in parameters.items():
+        suite.measure(
+            f"forecast.{model_type}",
+            lambda: build_forecast(model_type, params, HORIZON, last_price),
+        )
+
+
+def bench_encode(suite: Suite, parameters: dict, last_price: float):
+    payload = ewma.build_payload(parameters[ewma.MODEL_TYPE], 365, last_price)
+    batch = [payload] * 100
+    suite.measure("encode.json.forecast", lambda: dumps(payload), rounds=200)
+    suite.measure(
+        "encode.json.batch100", lambda: dumps(batch), items=100, unit="payloads"
+    )
+    suite.measure(
+        "encode.binary.forecast",
+        lambda: result_codec.encode(payload, config.RESULT_FLOAT_DTYPE),
+        rounds=200,
+    )
+
+
+async def _ingest(series: dict, rounds: int) -> list:
+    from sqlalchemy import delete
+
+    from app.db.session import async_session_factory, engine
+    from app.models.crypto_data import Cryptocurrency, CryptocurrencyData
+    from app.services.market_data import save_price_frame
+
+    symbol, prices = next(iter(series.items()))
+    frame = prices.rename("Close").rename_axis("Date").to_frame()
+    timings = []
+    try:
+        async with async_session_factory() as db:
+            crypto = Cryptocurrency(
+                symbol=f"B{uuid.uuid4().hex[:8]}", name=f"Benchmark {symbol}"
+            )
+            db.add(crypto)
+            await db.commit()
+            try:
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    await save_price_frame(db, crypto, frame.copy())
+                    timings.append(time.perf_counter() - started)
+                    await db.execute(
+                        delete(CryptocurrencyData).where(
+                            CryptocurrencyData.crypto_id == crypto.id
+                        )
+                    )
+                    await db.commit()
+            finally:
+                await db.delete(crypto)
+                await db.commit()
+    finally:
+        await engine.dispose()
+    return timings
+
+
+def bench_ingest(suite: Suite, series: dict):
+    """CSV -> cryptocurrency_data через save_price_frame; нужен локальный Postgres."""
+    rows = len(next(iter(series.values())))
+    try:
+        # Тысячи строк за прогон: хватает нескольких повторов
+        timings = asyncio.run(_ingest(series, min(suite.rounds, 5)))
+    except (OSError, ConnectionError) as e:
+        suite.skip("ingest.csv_to_db", f"database unavailable ({e})")
+        return
+    suite.add("ingest.csv_to_db", timings, items=rows, unit="rows")
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run(args):
+    groups = set(args.only.split(",")) if args.only else set(GROUPS)
+    unknown = groups - set(GROUPS)
+    if unknown:
+        sys.exit(f"Unknown groups: {', '.join(sorted(unknown))}")
+
+    # Сообщения о загрузке моделей на каждом прогоне не нужны
+    logger.setLevel(logging.WARNING)
+    warnings.simplefilter("ignore")
+
+    suite = Suite(args.rounds)
+    series = daily_series()
+    last_price = float(series["BTC"].iloc[-1]) if "BTC" in series else 100.0
+
+    fitted = {}
+    if "train" in groups:
+        fitted = bench_train(suite, series, args.train_rounds)
+    with tempfile.TemporaryDirectory() as model_dir:
+        if groups & {"forecast", "encode"}:
+            parameters = forecast_parameters(series, fitted, Path(model_dir))
+        if "forecast" in groups:
+            bench_forecast(suite, parameters, last_price)
+        if "encode" in groups:
+            bench_encode(suite, parameters, last_price)
+    if "ingest" in groups:
+        bench_ingest(suite, series)
+
+    env = environment()
+    output = Path(args.output) if args.output else None
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{env['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"environment": env, "benchmarks": suite.results}, indent=2)
+    )
+    print(f"\n Results written to {output}")
+
+
+def compare(args):
+    baseline = json.loads(Path(args.baseline).read_text())
+    current = json.loads(Path(args.current).read_text())
+    base = {b["name"]: b for b in baseline["benchmarks"] if "median" in b}
+    cur = {b["name"]: b for b in current["benchmarks"] if "median" in b}
+
+    print(
+        f" baseline {baseline['environment'].get('commit')} -> "
+        f"current {current['environment'].get('commit')}, "
+        f"threshold {args.threshold:.0f}%\n"
+    )
+    regressions = []
+    for name in sorted(base.keys() | cur.keys()):
+        if name not in cur or name not in base:
+            print(f" {name:<32} {'only in baseline' if name in base else 'new'}")
+            continue
+        before, after = base[name]["median"], cur[name]["median"]
+        change = (after / before - 1) * 100
+        status = ""
+        if change > args.threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -args.threshold:
+            status = "faster"
+        print(
+            f" {name:<32} {before * 1000:9.2f} ms -> {after * 1000:9.2f} ms "
+            f"{change:+7.1f}% {status}"
+        )
+
+    if regressions:
+        print(f"\n FAIL: {len(regressions)} benchmark(s) slower than the threshold")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks for training, forecasts, result encoding "
+        "and market data ingestion"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and save results")
+    run_parser.add_argument(
+        "--only", help=f"Comma-separated groups: {', '.join(GROUPS)}"
+    )
+    run_parser.add_argument("--rounds", type=int, default=20)
+    run_parser.add_argument(
+        "--train-rounds", type=int, default=3, help="Rounds per model fit"
+    )
+    run_parser.add_argument(
+        "--output",
+        help=f"Results file (default: {RESULTS_DIR.name}/<time>-<commit>.json)",
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Compare two result files, exit 1 on regressions"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Allowed slowdown of the median, %%",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
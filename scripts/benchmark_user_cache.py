@@ -0,0 +1,121 @@
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, event
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from app.main import app  # noqa: E402
+from app.core.config import config  # noqa: E402
+from app.core.sessions import session_store  # noqa: E402
+from app.core.user_cache import user_cache  # noqa: E402
+from app.db.session import async_session_factory, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+ENDPOINT = "/api/dashboard/cryptos"
+
+
+class QueryCounter:
+    """Считает SELECT-запросы к таблице users, выполненные движком."""
+
+    def __init__(self):
+        self.user_selects = 0
+        self.total = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+        if (
+            statement.lstrip().upper().startswith("SELECT")
+            and "FROM users" in statement
+        ):
+            self.user_selects += 1
+
+
+async def run_load(client, token: str, requests: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(
+                ENDPOINT, headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def benchmark(requests: int, concurrency: int):
+    engine.echo = False
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+
+    async with async_session_factory() as db:
+        user = User(
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password_hash="x"
+        )
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    token = str(uuid.uuid4())
+    await session_store.set(token, {"user_id": str(user_id), "user_email": user.email})
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            # Прогрев пула соединений
+            await run_load(client, token, concurrency, concurrency)
+
+            for label, ttl in (("no cache", 0), ("cached", config.USER_CACHE_TTL)):
+                user_cache.clear()
+                user_cache.ttl = ttl
+                counter.user_selects = counter.total = 0
+
+                started = time.perf_counter()
+                latencies = sorted(await run_load(client, token, requests, concurrency))
+                elapsed = time.perf_counter() - started
+
+                print(
+                    f" {label:>8}: {requests / elapsed:8.1f} req/s, "
+                    f"p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms, "
+                    f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms, "
+                    f"users SELECT/request {counter.user_selects / requests:.3f}, "
+                    f"queries/request {counter.total / requests:.3f}"
+                )
+    finally:
+        await session_store.delete(token)
+        async with async_session_factory() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure get_current_user DB round trips with and without the user cache"
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f" {args.requests} requests to {ENDPOINT}, concurrency {args.concurrency}, "
+        f"user cache TTL {config.USER_CACHE_TTL}s"
+    )
+    asyncio.run(benchmark(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+TARGET = "app.main"
+# Загружаются только сервисами по требованию, на старте воркера их быть не должно
+LAZY_MODULES = {
+    "pandas",
+    "yfinance",
+    "scipy",
+    "joblib",
+    "arch",
+    "statsmodels",
+    "pyarrow",
+    "alembic",
+}
+
+RSS_SNIPPET = f"""
+import resource, sys
+import {TARGET}
+rss = 0
+try:
+    with open("/proc/self/status") as f:
+        rss = next(int(l.split()[1]) for l in f if l.startswith("VmRSS:"))
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(rss)
+"""
+
+
+def _run(args: list) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(BACKEND_DIR)}
+    return subprocess.run(
+        [sys.executable, *args],
+        # Логгер приложения создаёт ./logs, поэтому не в каталоге проекта
+        cwd=tempfile.gettempdir(),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_import() -> tuple[float, dict]:
+    """Время импорта TARGET (мс) и накопленное время каждого модуля."""
+    stderr = _run(["-X", "importtime", "-c", f"import {TARGET}"]).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules[TARGET], modules
+
+
+def measure_rss() -> int:
+    """Резидентная память процесса после импорта TARGET (КБ)."""
+    return int(_run(["-c", RSS_SNIPPET]).stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=f"Fail if importing {TARGET} exceeds the time budget "
+        "or loads heavy libraries eagerly"
+    )
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings, modules = [], {}
+    for _ in range(args.runs):
+        total, modules = measure_import()
+        timings.append(total)
+    median = statistics.median(timings)
+    rss = measure_rss()
+
+    print(f" import {TARGET}: median {median:.0f} ms over {args.runs} runs")
+    print(f" resident memory after import: {rss / 1024:.1f} MB")
+    print(" slowest top-level packages:")
+    packages = {}
+    for name, cumulative in modules.items():
+        root = name.split(".")[0]
+        if root != "app":
+            packages[root] = max(packages.get(root, 0), cumulative)
+    for name, cumulative in sorted(packages.items(), key=lambda p: -p[1])[: args.top]:
+        print(f"   {name:<20} {cumulative:8.1f} ms")
+
+    failures = []
+    eager = sorted({name.split(".")[0] for name in modules} & LAZY_MODULES)
+    if eager:
+        failures.append(f"heavy modules imported eagerly: {', '.join(eager)}")
+    if median > args.budget_ms:
+        failures.append(f"{median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f" FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
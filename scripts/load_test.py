@@ -0,0 +1,353 @@
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+API = "/api/dashboard"
+DEFAULT_MIX = "cryptos=35,portfolios=20,simulations=40,predict=5"
+OPERATIONS = ("cryptos", "portfolios", "simulations", "predict")
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    token: str = ""
+    # Задачи, статус которых пользователь ещё опрашивает
+    pending_jobs: List[str] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@dataclass
+class OperationStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, latency: float, error: Optional[str]):
+        self.latencies.append(latency)
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+class LoadTest:
+    """
+    Генератор нагрузки с открытой моделью: запросы запускаются по
+    расписанию с целевой частотой, не дожидаясь предыдущих ответов.
+    Задержка считается от запланированного момента старта, поэтому
+    перегруженный сервер не прячет очередь (coordinated omission).
+    """
+
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.users: List[VirtualUser] = []
+        self.crypto_ids: List[int] = []
+        self.stats: Dict[str, OperationStats] = {
+            op: OperationStats() for op in OPERATIONS
+        }
+        self.dropped = 0
+        self.in_flight = 0
+
+    async def setup(self):
+        """Регистрирует и логинит синтетических пользователей, создаёт портфели."""
+        run_id = uuid.uuid4().hex[:8]
+        semaphore = asyncio.Semaphore(20)
+
+        async def create(i: int) -> VirtualUser:
+            async with semaphore:
+                user = VirtualUser(email=f"load-{run_id}-{i}@example.com")
+                password = uuid.uuid4().hex
+                response = await self.client.post(
+                    "/api/auth/register",
+                    json={"email": user.email, "plain_password": password},
+                )
+                response.raise_for_status()
+                response = await self.client.post(
+                    "/api/auth/login", data={"email": user.email, "password": password}
+                )
+                response.raise_for_status()
+                user.token = response.json()["token"]
+                response = await self.client.post(
+                    f"{API}/portfolios",
+                    json={"name": f"Load test {i}", "assets": []},
+                    headers=user.headers,
+                )
+                response.raise_for_status()
+                return user
+
+        self.users = await asyncio.gather(*(create(i) for i in range(self.args.users)))
+        response = await self.client.get(
+            f"{API}/cryptos", headers=self.users[0].headers
+        )
+        response.raise_for_status()
+        self.crypto_ids = [crypto["id"] for crypto in response.json()]
+        if "predict" in self.args.mix and not self.crypto_ids:
+            raise RuntimeError("No cryptocurrencies in the database, run a sync first")
+
+    async def request(self, user: VirtualUser, operation: str) -> httpx.Response:
+        if operation == "cryptos":
+            return await self.client.get(f"{API}/cryptos", headers=user.headers)
+        if operation == "portfolios":
+            return await self.client.get(f"{API}/portfolios", headers=user.headers)
+        if operation == "predict":
+            response = await self.client.post(
+                f"{API}/predict",
+                json={
+                    "crypto_id": random.choice(self.crypto_ids),
+                    "model_type": random.choice(self.args.model_types),
+                },
+                headers=user.headers,
+            )
+            if response.is_success:
+                user.pending_jobs.append(response.json()["id"])
+            return response
+
+        # simulations: опрос незавершённой задачи, иначе первая страница истории
+        if user.pending_jobs:
+            job_id = user.pending_jobs[0]
+            response = await self.client.get(
+                f"{API}/simulations/{job_id}", headers=user.headers
+            )
+            if response.is_success and response.json()["status"] in (
+                "completed",
+                "failed",
+            ):
+                user.pending_jobs.remove(job_id)
+            return response
+        return await self.client.get(
+            f"{API}/simulations",
+            params={"limit": 20, "summary": "true"},
+            headers=user.headers,
+        )
+
+    async def fire(self, operation: str, scheduled: float, record: bool):
+        user = random.choice(self.users)
+        error = None
+        self.in_flight += 1
+        try:
+            response = await self.request(user, operation)
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        finally:
+            self.in_flight -= 1
+        if record:
+            self.stats[operation].record(time.perf_counter() - scheduled, error)
+
+    async def run(self):
+        operations, weights = zip(*self.args.mix.items())
+        interval = 1 / self.args.rate
+        warmup_end = self.args.warmup
+        total = self.args.warmup + self.args.duration
+        tasks = set()
+
+        started = time.perf_counter()
+        tick = 0
+        while (scheduled_offset := tick * interval) < total:
+            scheduled = started + scheduled_offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tick += 1
+            record = scheduled_offset >= warmup_end
+            if self.in_flight >= self.args.max_in_flight:
+                # Клиент не успевает: запрос не отправлен, это тоже нарушение SLO
+                self.dropped += record
+                continue
+            operation = random.choices(operations, weights)[0]
+            task = asyncio.create_task(self.fire(operation, scheduled, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.args.timeout)
+        return time.perf_counter() - started - warmup_end
+
+    def report(self, elapsed: float) -> dict:
+        operations = {}
+        all_latencies, all_errors = [], 0
+        for name, stats in self.stats.items():
+            if not stats.latencies:
+                continue
+            all_latencies += stats.latencies
+            all_errors += stats.error_count
+            operations[name] = {
+                "requests": len(stats.latencies),
+                "errors": stats.errors,
+                "error_rate": stats.error_count / len(stats.latencies) * 100,
+                **{
+                    f"p{p}_ms": percentile(stats.latencies, p) * 1000
+                    for p in PERCENTILES
+                },
+                "max_ms": max(stats.latencies) * 1000,
+            }
+        requests = len(all_latencies)
+        return {
+            "target_rate": self.args.rate,
+            "duration": elapsed,
+            "users": len(self.users),
+            "requests": requests,
+            "dropped": self.dropped,
+            "throughput": requests / elapsed if elapsed else 0.0,
+            "error_rate": all_errors / requests * 100 if requests else 0.0,
+            **{f"p{p}_ms": percentile(all_latencies, p) * 1000 for p in PERCENTILES},
+            "operations": operations,
+        }
+
+
+def print_report(report: dict):
+    print(
+        f"\n {report['requests']} requests in {report['duration']:.1f}s: "
+        f"{report['throughput']:.1f} req/s (target {report['target_rate']:.1f}), "
+        f"errors {report['error_rate']:.2f}%, dropped {report['dropped']}"
+    )
+    header = " ".join(f"{f'p{p}':>8}" for p in PERCENTILES)
+    print(f"\n {'operation':<12} {'requests':>9} {'errors':>7} {header} {'max':>8}")
+    rows = list(report["operations"].items()) + [("total", report)]
+    for name, row in rows:
+        errors = row["error_rate"]
+        latencies = " ".join(f"{row[f'p{p}_ms']:8.1f}" for p in PERCENTILES)
+        max_ms = f"{row['max_ms']:8.1f}" if "max_ms" in row else " " * 8
+        print(f" {name:<12} {row['requests']:>9} {errors:>6.2f}% {latencies} {max_ms}")
+    print(" (latencies in ms, measured from the scheduled start)")
+
+
+def check_slo(report: dict, args) -> List[str]:
+    failures = []
+    if report["requests"] == 0:
+        return ["no requests completed"]
+    if report["p95_ms"] > args.slo_p95_ms:
+        failures.append(f"p95 {report['p95_ms']:.1f} ms > {args.slo_p95_ms} ms")
+    if report["p99_ms"] > args.slo_p99_ms:
+        failures.append(f"p99 {report['p99_ms']:.1f} ms > {args.slo_p99_ms} ms")
+    if report["error_rate"] > args.slo_error_rate:
+        failures.append(
+            f"error rate {report['error_rate']:.2f}% > {args.slo_error_rate}%"
+        )
+    min_throughput = args.rate * args.slo_throughput / 100
+    if report["throughput"] < min_throughput:
+        failures.append(
+            f"throughput {report['throughput']:.1f} req/s < {min_throughput:.1f} req/s"
+        )
+    if report["dropped"]:
+        failures.append(f"{report['dropped']} requests not sent (client saturated)")
+    return failures
+
+
+async def main_async(args) -> dict:
+    limits = httpx.Limits(max_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+    if args.in_process:
+        from app.main import app
+
+        # Приложение и генератор делят один event loop: для сравнения версий,
+        # а не для оценки ёмкости. Фоновые задачи /predict выполняются до
+        # возврата ответа транспортом ASGI.
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://load-test", timeout=timeout
+            ) as client:
+                return await run_test(client, args)
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=timeout
+    ) as client:
+        return await run_test(client, args)
+
+
+async def run_test(client: httpx.AsyncClient, args) -> dict:
+    test = LoadTest(client, args)
+    print(f" Creating {args.users} synthetic users...")
+    await test.setup()
+    print(
+        f" Driving {args.rate} req/s for {args.duration}s "
+        f"(+{args.warmup}s warm-up), mix {args.mix}"
+    )
+    elapsed = await test.run()
+    return test.report(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Open-loop load test of the dashboard API; "
+        "exits 1 when the SLOs are not met"
+    )
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default="http://localhost:8000")
+    target.add_argument(
+        "--in-process", action="store_true", help="Run app.main in this process"
+    )
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=50, help="Target requests/s")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds, not measured")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument(
+        "--model-types", type=lambda v: v.split(","), default=["EWMA", "HAR"]
+    )
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30, help="Request timeout, s")
+    parser.add_argument("--slo-p95-ms", type=float, default=300)
+    parser.add_argument("--slo-p99-ms", type=float, default=1000)
+    parser.add_argument("--slo-error-rate", type=float, default=1.0, help="%%")
+    parser.add_argument(
+        "--slo-throughput",
+        type=float,
+        default=95,
+        help="Minimum achieved share of the target rate, %%",
+    )
+    parser.add_argument("--report", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+
+    failures = check_slo(report, args)
+    for failure in failures:
+        print(f" FAIL: {failure}")
+    if not failures:
+        print(" All SLOs met")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
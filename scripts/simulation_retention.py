@@ -0,0 +1,68 @@
+import sys
+import asyncio
+import argparse
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from app.core.config import config  # noqa: E402
+from app.db.session import jobs_engine, jobs_session_factory  # noqa: E402
+from app.services import retention  # noqa: E402
+
+
+async def run(args):
+    try:
+        if args.partitions_only:
+            async with jobs_session_factory() as db:
+                created = await retention.ensure_partitions(db)
+            print(f" Created partitions: {', '.join(created) or 'none'}")
+            return
+
+        report = await retention.run_retention(
+            jobs_session_factory, dry_run=args.dry_run
+        )
+    finally:
+        await jobs_engine.dispose()
+
+    if report.skipped:
+        print(" Another process holds the retention lock, nothing done")
+        return
+
+    prefix = "Would archive" if args.dry_run else "Archived"
+    print(f" Retention policy (days): {config.SIMULATION_RETENTION_DAYS}")
+    print(f" Created partitions: {', '.join(report.created_partitions) or 'none'}")
+    print(f" Dropped partitions: {', '.join(report.dropped_partitions) or 'none'}")
+    for key, count in report.archived.items():
+        print(f" {prefix} {count:>8} jobs: {key}")
+    for path in report.files:
+        print(f" Archive file: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Archive expired simulation jobs to Parquet and drop old partitions"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only count jobs that would be archived",
+    )
+    parser.add_argument(
+        "--partitions-only",
+        action="store_true",
+        help="only create partitions for the coming months",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=config.SIMULATION_ARCHIVE_DIR,
+        help="directory for Parquet files",
+    )
+    args = parser.parse_args()
+
+    config.SIMULATION_ARCHIVE_DIR = args.archive_dir
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
+import sys
 import json
+import time
 import joblib
+import pandas as pd
 import yfinance as yf
 from pathlib import Path
 from arch import arch_model
 from statsmodels.tsa.arima.model import ARIMA
 
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from app.services import har  # noqa: E402
+
 OUTPUT_DIR = Path("ml_models")
 METADATA_FILE = OUTPUT_DIR / "models_metadata.json"
+HOURLY_DATA_DIR = ROOT_DIR / "qf_models" / "data" / "data_hourly"
 
 TICKERS = ["BTC", "ETH", "SOL", "BNB", "XRP", "ADA", "DOGE", "TON", "AVAX", "LINK"]
 
@@ -20,6 +29,50 @@ MODEL_CONFIGS = [
 START_DATE = "2020-01-01"
 
 
+def load_hourly_prices(path: Path):
+    df = pd.read_csv(
+        path, skiprows=3, header=None, usecols=[0, 1], names=["Datetime", "Close"]
+    )
+    timestamps = pd.to_datetime(df["Datetime"], utc=True)
+    seconds = (timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return seconds.to_numpy(), df["Close"].to_numpy(dtype=float)
+
+
+def train_har_models(metadata_list: list):
+    """
+    HAR-RV обучается сразу на всех часовых файлах из qf_models/data/data_hourly.
+    Состояние модели небольшое, поэтому хранится прямо в parameters.
+    """
+    files = sorted(HOURLY_DATA_DIR.glob("*_hourly.csv"))
+    if not files:
+        print(f"⚠️ No hourly data found in {HOURLY_DATA_DIR}. Skipping HAR.")
+        return
+
+    started = time.perf_counter()
+    symbols = [f.name.split("-")[0] for f in files]
+    states = har.state_from_hourly([load_hourly_prices(f) for f in files])
+    print(
+        f"\n Trained HAR-RV for {len(symbols)} assets "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+    for symbol, state in zip(symbols, states):
+        filename = f"{symbol}_{har.MODEL_TYPE}.json"
+        with open(OUTPUT_DIR / filename, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+        metadata_list.append(
+            {
+                "symbol": symbol,
+                "model_type": har.MODEL_TYPE,
+                "parameters": {"lags": list(har.LAGS), **state},
+                "filename": filename,
+                "relative_path": str(Path("ml_models") / filename),
+            }
+        )
+        print(f"   ✅ Saved: {filename}")
+
+
 def main():
     OUTPUT_DIR.mkdir(exist_ok=True)
 
@@ -105,6 +158,8 @@ def main():
             except Exception as e:
                 print(f"   ❌ Failed to train {model_type}: {e}")
 
+    train_har_models(metadata_list)
+
     print(f"\nSaving metadata registry to {METADATA_FILE}...")
     with open(METADATA_FILE, "w", encoding="utf-8") as f:
         json.dump(metadata_list, f, indent=4)